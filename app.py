@@ -8,9 +8,14 @@ import sys
 import time
 import datetime
 import re
+import nest_asyncio
 import streamlit as st
 from datetime import timedelta
 
+# Let crewAI's asyncio.run() calls nest inside Streamlit's event loop. Only this entry
+# point patches asyncio; importing crew leaves the loop of kickoff_async() callers alone.
+nest_asyncio.apply()
+
 # Ensure reports directory exists
 reports_dir = 'reports'
 os.makedirs(reports_dir, exist_ok=True)
@@ -173,6 +178,8 @@ try:
         st.session_state.planning_error = None
     if 'selected_destination' not in st.session_state:
         st.session_state.selected_destination = None
+    if 'crew_runner' not in st.session_state:
+        st.session_state.crew_runner = None
     
     # Header
     st.markdown("<h1 class='main-header'>✈️ AI Travel Planner</h1>", unsafe_allow_html=True)
@@ -470,8 +477,12 @@ try:
                     start_time = time.time()
                     
                     try:
-                        # Initialize the crew with the selected agents
-                        crew_runner = TravelAgentCrew(active_agents=active_agents)
+                        # Reuse the previous crew so an edited trip only reruns the affected agents
+                        crew_runner = st.session_state.crew_runner
+                        incremental = crew_runner is not None and crew_runner.active_agents == active_agents
+                        if not incremental:
+                            crew_runner = TravelAgentCrew(active_agents=active_agents)
+                            st.session_state.crew_runner = crew_runner
                         
                         # Display agent-specific progress messages while actually running the crew
                         for i, message in enumerate(all_progress_messages):
@@ -483,7 +494,7 @@ try:
                             # Only in the first step do we actually run the crew
                             if i == 0:
                                 # Run the crew with the inputs
-                                report_path = crew_runner.kickoff(inputs=inputs)
+                                report_path = crew_runner.kickoff(inputs=inputs, incremental=incremental)
                                 
                                 # Record planning time
                                 end_time = time.time()
@@ -3,10 +3,12 @@ Enhanced crew implementation for the travel agent system.
 Uses specialized agents with distinct tasks including a dedicated Yelp dining expert.
 """
 import os
+import copy
+import time
+import asyncio
 import yaml
 import datetime
 import re
-import nest_asyncio
 from dotenv import load_dotenv
 import sys
 from typing import Optional, Dict, List, Any
@@ -17,22 +19,30 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 RAW_DIR = os.path.join('reports', 'raw')
 os.makedirs(RAW_DIR, exist_ok=True)
 
-def _dump_raw(agent_name: str, content: str):
+def _dump_raw(agent_name: str, content: str, raw_dir: str = RAW_DIR):
     """Write the raw output of each agent to a file for later evaluation."""
     safe = re.sub(r'[^A-Za-z0-9_\-]', '_', agent_name)
-    path = os.path.join(RAW_DIR, f"{safe}.txt")
+    os.makedirs(raw_dir, exist_ok=True)
+    path = os.path.join(raw_dir, f"{safe}.txt")
     with open(path, "w", encoding="utf-8") as f:
         f.write(content.strip())
 # ------------------------------------------------------------
 
-# Apply nest_asyncio
-nest_asyncio.apply()
-
 # CrewAI imports
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.llm import LLM
 from crewai.tools import BaseTool
+from crewai.tasks.task_output import TaskOutput
+
+from planning.scheduler import TaskGraphScheduler, DEFAULT_MAX_CONCURRENCY
+from planning.batch import SharedTaskOutputs
+from planning.events import PlanCompletedEvent
+from planning.output_cache import TaskOutputCache
+from planning.llm_pool import LLMKeyPool, PooledLLM
+from planning.context import ContextCompactor, DEFAULT_CONTEXT_BUDGET, format_inputs
+from planning.inputs import task_input_key, changed_fields, trip_key
+from concurrent.futures import ThreadPoolExecutor
 
 # Import tools
 try: 
@@ -65,6 +75,15 @@ try:
 except ImportError: 
     AmadeusFlightSearchTool = AmadeusHotelSearchTool = None
 
+from tools.response_cache import cached_call
+from tools.cassette import get_cassette, make_cassette, set_cassette
+from tools.single_flight import get_single_flight
+from tools.circuit_breaker import breaker_stats, guarded_call
+from tools.deadline import Deadline, current_deadline
+from tools.business_store import get_business_store
+from tools.geo_tiles import get_tile_cache
+from tools.ranking import BUDGET_PRICE_TIERS
+
 # Handle SerperDevTool import
 try:
     from crewai_tools import SerperDevTool as OriginalSerperDevTool
@@ -81,7 +100,9 @@ try:
         def _run(self, query: str) -> str:
             """Run the web search using Serper.dev API"""
             try:
-                return self.original_tool._run(query)
+                # Every agent carries this tool; identical searches in flight share one request
+                return cached_call("serper", {"query": query},
+                                   lambda: guarded_call("serper", lambda: self.original_tool._run(query)))
             except Exception as e:
                 return f"Error searching with Serper: {str(e)}"
                 
@@ -107,9 +128,69 @@ groq_api_key_1 = os.getenv('GROQ_API_KEY_1')
 groq_api_key_2 = os.getenv('GROQ_API_KEY_2')
 serper_api_key = os.getenv('SERPER_API_KEY')
 yelp_api_key = os.getenv('YELP_API_KEY')
+
+GEMINI_MODEL = "gemini/gemini-2.0-flash"
+
 def _safe_raw(o):
     return getattr(o, "raw", str(o))
 
+def _first_sentence(text: str, limit: int = 200) -> str:
+    """First sentence of the first prose line of a markdown section (headings, tables and rules skipped)."""
+    for line in text.replace('```markdown', '').replace('```', '').splitlines():
+        line = line.strip().lstrip('-*> ').strip()
+        if not line or line.startswith(('#', '|', '---')):
+            continue
+        line = re.sub(r'\*\*|__|[*`]', '', line)
+        sentence = re.split(r'(?<=[.!?])\s', line, maxsplit=1)[0]
+        return sentence if len(sentence) <= limit else sentence[:limit].rsplit(' ', 1)[0] + '…'
+    return ""
+
+# Task graph: specialist tasks are independent, report tasks fan in after them
+SPECIALIST_TASKS = {
+    'find_transportation_task': 'transport_planner',
+    'find_accommodation_task': 'accommodation_finder',
+    'get_local_context_task': 'local_guide',
+    'get_dining_recommendations_task': 'yelp_dining_expert',
+    'get_weather_and_packing_advice_task': 'packing_and_weather_advisor',
+}
+REPORT_TASKS = {
+    'compile_travel_report_task': 'report_compiler',
+    'evaluate_report_task': 'report_evaluator',
+}
+
+# Kickoff inputs each specialist task actually depends on
+TASK_INPUT_FIELDS = {
+    'find_transportation_task': ('starting_point', 'destination', 'start_date', 'end_date'),
+    'find_accommodation_task': ('destination', 'start_date', 'end_date', 'budget', 'travel_style', 'accommodation'),
+    'get_local_context_task': ('destination', 'start_date', 'end_date', 'interests', 'travel_style'),
+    'get_dining_recommendations_task': ('destination', 'start_date', 'end_date', 'budget', 'travel_style',
+                                        'interests', 'stay_coordinates'),
+    'get_weather_and_packing_advice_task': ('destination', 'start_date', 'end_date'),
+}
+
+COMPILE_MODES = ('llm', 'deterministic')
+
+# How long (seconds) a cached specialist output stays valid
+TASK_CACHE_TTLS = {
+    'find_transportation_task': 6 * 3600,           # flight prices move quickly
+    'find_accommodation_task': 24 * 3600,
+    'get_local_context_task': 7 * 24 * 3600,        # history and attractions rarely change
+    'get_dining_recommendations_task': 3 * 24 * 3600,
+    'get_weather_and_packing_advice_task': 6 * 3600,
+}
+
+def _reserve_report_path(reports_dir: str, stem: str) -> str:
+    """Create an empty report file for stem, adding a counter if the name is taken."""
+    counter = 1
+    while True:
+        suffix = f"_{counter}" if counter > 1 else ""
+        path = os.path.join(reports_dir, f"{stem}{suffix}.md")
+        try:
+            with open(path, 'x', encoding='utf-8'):
+                return path
+        except FileExistsError:
+            counter += 1
+
 # Configuration Loading
 def load_configs():
     """Load agent and task configurations from YAML files."""
@@ -204,7 +285,8 @@ def _get_default_configs():
 class TravelAgentCrew():
     """Enhanced TravelAgentCrew with specialized agents and detailed tasks."""
     
-    def __init__(self, active_agents=None):
+    def __init__(self, active_agents=None, max_concurrency=None, cache_outputs=True, compile_mode=None,
+                 context_budget=None, cassette=None, deadline=None):
         """
         Initializes the TravelAgentCrew with multiple LLMs.
         
@@ -214,83 +296,98 @@ class TravelAgentCrew():
                                                Possible values: ['transport_planner', 'accommodation_finder',
                                                                 'local_guide', 'yelp_dining_expert',
                                                                 'packing_and_weather_advisor', 'report_compiler']
+            max_concurrency (int, optional): Maximum number of tasks run in parallel by kickoff.
+                                             Defaults to TRAVEL_AGENT_MAX_CONCURRENCY (5).
+            cache_outputs (bool): Reuse specialist outputs from the on-disk cache when the inputs
+                                  they depend on match a previous run (see TASK_CACHE_TTLS).
+            compile_mode (str, optional): 'llm' to have the report_compiler agent write the report, or
+                                          'deterministic' to assemble it from the specialist outputs
+                                          without an LLM call. Defaults to TRAVEL_AGENT_COMPILE_MODE ('llm').
+            context_budget (int, optional): Token budget for the upstream context of the compile and
+                                            evaluate tasks (0 only removes boilerplate and duplicates).
+                                            Defaults to TRAVEL_AGENT_CONTEXT_BUDGET (6000).
+            cassette (str or Cassette, optional): 'record' to capture every tool's upstream traffic to
+                                                  the cassette at TRAVEL_AGENT_CASSETTE, 'replay' to serve
+                                                  it back offline, 'off', or a tools.cassette.Cassette.
+                                                  Applies to all tools in the process. Defaults to
+                                                  TRAVEL_AGENT_CASSETTE_MODE (off).
+            deadline (float, optional): Seconds each kickoff may take. Tasks, LLM calls and tool calls
+                                        get the remaining time; whatever has not finished when it runs
+                                        out is left out of the report. Defaults to
+                                        TRAVEL_AGENT_DEADLINE (no deadline).
         """
         # Store active agents configuration
         self.active_agents = active_agents or ['transport_planner', 'accommodation_finder', 
                                               'local_guide', 'yelp_dining_expert',
                                               'packing_and_weather_advisor', 'report_compiler','report_evaluator']
         
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        
+        self.compile_mode = compile_mode or os.getenv('TRAVEL_AGENT_COMPILE_MODE', 'llm')
+        if self.compile_mode not in COMPILE_MODES:
+            raise ValueError(f"Unknown compile_mode '{self.compile_mode}', expected one of: {', '.join(COMPILE_MODES)}")
+        
+        if cassette is not None:
+            set_cassette(make_cassette(cassette) if isinstance(cassette, str) else cassette)
+        self.cassette = get_cassette()
+        
+        self.deadline = deadline if deadline is not None else float(os.getenv('TRAVEL_AGENT_DEADLINE', '0'))
+        
+        self.context_compactor = ContextCompactor(
+            DEFAULT_CONTEXT_BUDGET if context_budget is None else context_budget
+        )
+        
+        # Specialist output cache shared by every kickoff of this crew
+        self.output_cache = None
+        if cache_outputs:
+            try:
+                self.output_cache = TaskOutputCache(ttls=TASK_CACHE_TTLS)
+            except Exception as e:
+                print(f"Error initializing task output cache: {str(e)}")
+        
         # Load configs
         self.agents_config, self.tasks_config = load_configs()
         self.kickoff_inputs = None
         
-        # Initialize LLMs dictionary
-        self.llms = {}
-        
-        # Initialize Gemini LLM 1 (for Transport Planner)
-        if 'transport_planner' in self.active_agents:
-            if gemini_api_key_1:
-                try:
-                    self.llms['gemini_1'] = LLM(
-                        model="gemini/gemini-2.0-flash",
-                        api_key=gemini_api_key_1,
-                        max_tokens=1024
-                    )
-                    print("Initialized Gemini LLM 1 for Transport Planner")
-                except Exception as e:
-                    print(f"Error initializing Gemini LLM 1: {str(e)}")
+        # Where task callbacks dump raw agent outputs (concurrent plans get a directory each)
+        self.raw_dir = RAW_DIR
         
-        # Initialize Gemini LLM 3 (for Accommodation Finder)
-        if 'accommodation_finder' in self.active_agents:
-            if gemini_api_key_3:
-                try:
-                    self.llms['gemini_3'] = LLM(
-                        model="gemini/gemini-2.0-flash",
-                        api_key=gemini_api_key_3,
-                        max_tokens=1024
-                    )
-                    print("Initialized Gemini LLM 3 for Accommodation Finder")
-                except Exception as e:
-                    print(f"Error initializing Gemini LLM 3: {str(e)}")
+        # Agents and tasks built for the current kickoff, keyed by method name
+        self._graph = {}
+        self.last_run = None
+        self.last_evaluation = None
         
-        # Initialize Gemini LLM 2 (for Local Guide)
-        if 'local_guide' in self.active_agents:
-            if gemini_api_key_2:
-                try:
-                    self.llms['gemini_2'] = LLM(
-                        model="gemini/gemini-2.0-flash",
-                        api_key=gemini_api_key_2,
-                        max_tokens=1024
-                    )
-                    print("Initialized Gemini LLM 2 for Local Guide")
-                except Exception as e:
-                    print(f"Error initializing Gemini LLM 2: {str(e)}")
+        # Initialize LLMs dictionary
+        self.llms = {}
         
-        # Initialize a model for Yelp Dining Expert
-        if 'yelp_dining_expert' in self.active_agents:
-            if gemini_api_key_1:
-                try:
-                    self.llms['yelp_expert'] = LLM(
-                        model="gemini/gemini-2.0-flash",
-                        api_key=gemini_api_key_1,
-                        max_tokens=1024
-                    )
-                    print("Initialized LLM for Yelp Dining Expert")
-                except Exception as e:
-                    print(f"Error initializing LLM for Yelp Expert: {str(e)}")
+        # All Gemini keys form one pool; every agent's LLM spreads its calls over the
+        # least-loaded key instead of being pinned to one
+        self.llm_pool = None
+        gemini_keys = [k for k in (gemini_api_key_1, gemini_api_key_2, gemini_api_key_3) if k]
+        if gemini_keys:
+            self.llm_pool = LLMKeyPool(gemini_keys)
+            print(f"Initialized Gemini key pool with {len(self.llm_pool.keys)} key(s)")
         
-        # Initialize a model for Weather Advisor
-        if 'packing_and_weather_advisor' in self.active_agents:
-            if gemini_api_key_2:
+        # One LLM per agent (keeps token usage per agent), named as before
+        agent_llms = [
+            ('transport_planner', 'gemini_1', "Transport Planner"),
+            ('accommodation_finder', 'gemini_3', "Accommodation Finder"),
+            ('local_guide', 'gemini_2', "Local Guide"),
+            ('yelp_dining_expert', 'yelp_expert', "Yelp Dining Expert"),
+            ('packing_and_weather_advisor', 'weather_advisor', "Weather Advisor"),
+        ]
+        for agent_name, llm_name, label in agent_llms:
+            if agent_name in self.active_agents and self.llm_pool:
                 try:
-                    self.llms['weather_advisor'] = LLM(
-                        model="gemini/gemini-2.0-flash",
-                        api_key=gemini_api_key_2,
+                    self.llms[llm_name] = PooledLLM(
+                        self.llm_pool,
+                        lambda key: LLM(model=GEMINI_MODEL, api_key=key, max_tokens=1024),
+                        model=GEMINI_MODEL,
                         max_tokens=1024
                     )
-                    print("Initialized LLM for Weather Advisor")
+                    print(f"Initialized pooled Gemini LLM for {label}")
                 except Exception as e:
-                    print(f"Error initializing LLM for Weather Advisor: {str(e)}")
+                    print(f"Error initializing Gemini LLM for {label}: {str(e)}")
         
         # Initialize tools
         self.tools = {}
@@ -494,6 +591,97 @@ Research the typical weather for {destination} during your travel dates ({start_
 """
         return report
 
+    def _compose_report(self, tasks_output, executive_summary=False, deadline=None):
+        """Assemble the report markdown from the specialist task outputs, without any LLM call."""
+        # Reconstruct the full report from individual task outputs
+        final_report_content = f"# Your Travel Plan to {self.kickoff_inputs.get('destination', 'Your Destination')}\n\n"
+
+        # Add trip overview
+        final_report_content += "## Trip Overview\n"
+        final_report_content += f"- **Destination**: {self.kickoff_inputs.get('destination', 'Your Destination')}\n"
+        final_report_content += f"- **Dates**: {self.kickoff_inputs.get('start_date', 'Start Date')} to {self.kickoff_inputs.get('end_date', 'End Date')}\n"
+        final_report_content += f"- **Starting Point**: {self.kickoff_inputs.get('starting_point', 'Starting Point')}\n"
+        final_report_content += f"- **Travelers**: {self.kickoff_inputs.get('travelers', '1')}\n"
+        final_report_content += f"- **Budget**: {self.kickoff_inputs.get('budget', 'Not specified')}\n"
+
+        if 'interests' in self.kickoff_inputs and self.kickoff_inputs['interests']:
+            final_report_content += f"- **Interests**: {', '.join(self.kickoff_inputs['interests'])}\n\n"
+        else:
+            final_report_content += "\n"
+        overview_end = len(final_report_content)
+
+        # Process transportation task output
+        transport_tasks = [t for t in tasks_output if 'transport' in t.name.lower() or 'flight' in t.name.lower()]
+        if transport_tasks:
+            transport_content = transport_tasks[0].raw
+            transport_content = transport_content.replace('```markdown', '').replace('```', '')
+            final_report_content += "## Transportation\n\n"
+            final_report_content += transport_content + "\n\n"
+
+        # Process accommodation task output
+        accomm_tasks = [t for t in tasks_output if 'accommodation' in t.name.lower() or 'hotel' in t.name.lower()]
+        if accomm_tasks:
+            accomm_content = accomm_tasks[0].raw
+            accomm_content = accomm_content.replace('```markdown', '').replace('```', '')
+            final_report_content += "## Accommodation\n\n"
+            final_report_content += accomm_content + "\n\n"
+
+        # Process local guide task output
+        local_tasks = [t for t in tasks_output if 'local' in t.name.lower() or 'context' in t.name.lower()]
+        if local_tasks:
+            local_content = local_tasks[0].raw
+            local_content = local_content.replace('```markdown', '').replace('```', '')
+            final_report_content += "## Destination Guide\n\n"
+            final_report_content += local_content + "\n\n"
+
+        # Process dining recommendations task output
+        dining_tasks = [t for t in tasks_output if 'dining' in t.name.lower() or 'food' in t.name.lower()]
+        if dining_tasks:
+            dining_content = dining_tasks[0].raw
+            dining_content = dining_content.replace('```markdown', '').replace('```', '')
+            final_report_content += "## Dining & Culinary Experiences\n\n"
+            final_report_content += dining_content + "\n\n"
+
+        # Process weather and packing advice
+        weather_tasks = [t for t in tasks_output if 'weather' in t.name.lower() or 'packing' in t.name.lower()]
+        if weather_tasks:
+            weather_content = weather_tasks[0].raw
+            weather_content = weather_content.replace('```markdown', '').replace('```', '')
+            final_report_content += "## Weather & Packing\n\n"
+            final_report_content += weather_content + "\n\n"
+
+        # Summarize each section by its opening sentence, right after the overview
+        if executive_summary:
+            summary = "## Executive Summary\n"
+            for section, section_tasks in [('Transportation', transport_tasks), ('Accommodation', accomm_tasks),
+                                           ('Destination Guide', local_tasks), ('Dining', dining_tasks),
+                                           ('Weather & Packing', weather_tasks)]:
+                highlight = _first_sentence(section_tasks[0].raw) if section_tasks else ""
+                summary += f"- **{section}**: {highlight or 'Not available for this plan.'}\n"
+            final_report_content = final_report_content[:overview_end] + summary + "\n" + final_report_content[overview_end:]
+
+        # Add Practical Information section
+        final_report_content += "## Practical Information\n\n"
+        final_report_content += "### Important Notes\n"
+        final_report_content += "- This travel plan provides recommendations based on available information at the time of creation.\n"
+        final_report_content += "- Prices, availability, and schedules may change; always verify current information before booking.\n"
+        final_report_content += "- For real-time pricing and booking, please visit the official websites of the recommended services.\n\n"
+
+        # Verify the content is complete by checking for sections no task produced
+        sections_to_check = [('Transportation', transport_tasks), ('Accommodation', accomm_tasks),
+                             ('Destination Guide', local_tasks), ('Dining', dining_tasks),
+                             ('Weather', weather_tasks)]
+        missing_sections = [section for section, section_tasks in sections_to_check if not section_tasks]
+
+        if missing_sections:
+            final_report_content += "\n\n---\n*Note: This report may be incomplete. The following sections are missing: "
+            final_report_content += ", ".join(missing_sections) + "."
+            if deadline is not None and deadline.expired:
+                final_report_content += f" They did not finish within the {deadline.seconds:g}s planning budget."
+            final_report_content += "*"
+
+        return final_report_content
+
     def aggregate_results(self, context):
         """Aggregate results and save the report."""
         try:
@@ -507,80 +695,10 @@ Research the typical weather for {destination} during your travel dates ({start_
 
             # Extract report content based on the context type
             if hasattr(context, 'tasks_output') and context.tasks_output:
-                # Reconstruct the full report from individual task outputs
-                final_report_content = f"# Your Travel Plan to {self.kickoff_inputs.get('destination', 'Your Destination')}\n\n"
-
-                # Add trip overview
-                final_report_content += "## Trip Overview\n"
-                final_report_content += f"- **Destination**: {self.kickoff_inputs.get('destination', 'Your Destination')}\n"
-                final_report_content += f"- **Dates**: {self.kickoff_inputs.get('start_date', 'Start Date')} to {self.kickoff_inputs.get('end_date', 'End Date')}\n"
-                final_report_content += f"- **Starting Point**: {self.kickoff_inputs.get('starting_point', 'Starting Point')}\n"
-                final_report_content += f"- **Travelers**: {self.kickoff_inputs.get('travelers', '1')}\n"
-                final_report_content += f"- **Budget**: {self.kickoff_inputs.get('budget', 'Not specified')}\n"
-
-                if 'interests' in self.kickoff_inputs and self.kickoff_inputs['interests']:
-                    final_report_content += f"- **Interests**: {', '.join(self.kickoff_inputs['interests'])}\n\n"
-                else:
-                    final_report_content += "\n"
-
-                # Process transportation task output
-                transport_tasks = [t for t in context.tasks_output if 'transport' in t.name.lower() or 'flight' in t.name.lower()]
-                if transport_tasks:
-                    transport_content = transport_tasks[0].raw
-                    transport_content = transport_content.replace('```markdown', '').replace('```', '')
-                    final_report_content += "## Transportation\n\n"
-                    final_report_content += transport_content + "\n\n"
-
-                # Process accommodation task output
-                accomm_tasks = [t for t in context.tasks_output if 'accommodation' in t.name.lower() or 'hotel' in t.name.lower()]
-                if accomm_tasks:
-                    accomm_content = accomm_tasks[0].raw
-                    accomm_content = accomm_content.replace('```markdown', '').replace('```', '')
-                    final_report_content += "## Accommodation\n\n"
-                    final_report_content += accomm_content + "\n\n"
-
-                # Process local guide task output
-                local_tasks = [t for t in context.tasks_output if 'local' in t.name.lower() or 'context' in t.name.lower()]
-                if local_tasks:
-                    local_content = local_tasks[0].raw
-                    local_content = local_content.replace('```markdown', '').replace('```', '')
-                    final_report_content += "## Destination Guide\n\n"
-                    final_report_content += local_content + "\n\n"
-
-                # Process dining recommendations task output
-                dining_tasks = [t for t in context.tasks_output if 'dining' in t.name.lower() or 'food' in t.name.lower()]
-                if dining_tasks:
-                    dining_content = dining_tasks[0].raw
-                    dining_content = dining_content.replace('```markdown', '').replace('```', '')
-                    final_report_content += "## Dining & Culinary Experiences\n\n"
-                    final_report_content += dining_content + "\n\n"
-
-                # Process weather and packing advice
-                weather_tasks = [t for t in context.tasks_output if 'weather' in t.name.lower() or 'packing' in t.name.lower()]
-                if weather_tasks:
-                    weather_content = weather_tasks[0].raw
-                    weather_content = weather_content.replace('```markdown', '').replace('```', '')
-                    final_report_content += "## Weather & Packing\n\n"
-                    final_report_content += weather_content + "\n\n"
-
-                # Add Practical Information section
-                final_report_content += "## Practical Information\n\n"
-                final_report_content += "### Important Notes\n"
-                final_report_content += "- This travel plan provides recommendations based on available information at the time of creation.\n"
-                final_report_content += "- Prices, availability, and schedules may change; always verify current information before booking.\n"
-                final_report_content += "- For real-time pricing and booking, please visit the official websites of the recommended services.\n\n"
-
-                # Verify the content is complete by checking for missing sections
-                sections_to_check = ['Transportation', 'Accommodation', 'Destination Guide', 'Dining', 'Weather']
-                missing_sections = []
-                for section in sections_to_check:
-                    if section.lower() not in final_report_content.lower():
-                        missing_sections.append(section)
-
-                if missing_sections:
-                    final_report_content += "\n\n---\n*Note: This report may be incomplete. The following sections are missing: "
-                    final_report_content += ", ".join(missing_sections) + ".*"
-            
+                final_report_content = self._compose_report(
+                    context.tasks_output, executive_summary=self.compile_mode == 'deterministic',
+                    deadline=getattr(context, 'deadline', None)
+                )
             else:
                 final_report_content = self._generate_fallback_report()
 
@@ -590,7 +708,8 @@ Research the typical weather for {destination} during your travel dates ({start_
             safe_destination = "".join(c if c.isalnum() else "_" for c in destination)
             reports_dir = 'reports'
             os.makedirs(reports_dir, exist_ok=True)
-            filename = os.path.join(reports_dir, f"travel_plan_{safe_destination}_{timestamp}.md")
+            # Concurrent trips to the same destination can finish in the same second
+            filename = _reserve_report_path(reports_dir, f"travel_plan_{safe_destination}_{timestamp}")
 
             with open(filename, 'w', encoding='utf-8') as file:
                 file.write(final_report_content)
@@ -605,6 +724,7 @@ Research the typical weather for {destination} during your travel dates ({start_
                     f.write(evaluator_output)
 
             # ------------- auto-evaluate ----------------
+            # Scored on a background worker pool; the report is returned right away
             try:
                 # Ensure evaluation package is importable
                 # Add the parent directory of 'crew.py' to sys.path to find the 'evaluation' package
@@ -612,14 +732,12 @@ Research the typical weather for {destination} during your travel dates ({start_
                 if project_root not in sys.path:
                     sys.path.insert(0, project_root)
 
-                # Import from the evaluation package
-                from evaluation.runner import evaluate_now
-                eval_json = evaluate_now(
+                from evaluation.background import submit_evaluation
+                self.last_evaluation = submit_evaluation(
                     summary_path=filename,
-                    ref_dir    = RAW_DIR,                # all agent dumps
+                    ref_dir    = self.raw_dir,           # all agent dumps of this plan
                     meta       = self.kickoff_inputs
                 )
-                print(f"✓ Evaluation written to {eval_json}")
             except ModuleNotFoundError as e:
                 print(f"Evaluation skipped: Could not import evaluation module - {e}")
             except Exception as e:
@@ -635,8 +753,8 @@ Research the typical weather for {destination} during your travel dates ({start_
                 file.write(emergency_content)
             return emergency_file
     
-    def kickoff(self, inputs=None):
-        """Kick off the crew with the given inputs."""
+    def _prepare_kickoff(self, inputs):
+        """Validate kickoff inputs and apply any active_agents override they carry."""
         if inputs is None:
             raise ValueError("Inputs dictionary cannot be None for kickoff.")
 
@@ -661,9 +779,83 @@ Research the typical weather for {destination} during your travel dates ({start_
             if 'report_compiler' not in self.active_agents:
                 self.active_agents.append('report_compiler')
 
-        # Create and run the crew
-        crew_instance = self.crew()
-        result = crew_instance.kickoff(inputs=inputs)
+    def _task_input_keys(self, inputs):
+        """Cache/share key of every specialist task for these inputs."""
+        return {name: task_input_key(name, fields, inputs) for name, fields in TASK_INPUT_FIELDS.items()}
+
+    def _local_tasks(self):
+        """Tasks the scheduler completes in-process instead of with an LLM run."""
+        if self.compile_mode == 'deterministic':
+            return {'compile_travel_report_task': self._compile_deterministic}
+        return {}
+
+    def _compile_deterministic(self, task):
+        """Output of the compile task built straight from its context, with no compiler LLM call."""
+        tasks_output = [c.output for c in task.context or [] if getattr(c, 'output', None) is not None]
+        report = self._compose_report(tasks_output, executive_summary=True, deadline=current_deadline())
+        if task.output_file:
+            with open(task.output_file, 'w', encoding='utf-8') as f:
+                f.write(report)
+        return TaskOutput(
+            description=task.description,
+            name=task.name,
+            expected_output=task.expected_output,
+            raw=report,
+            agent=getattr(task.agent, 'role', 'report_compiler')
+        )
+
+    def _retained_outputs(self, inputs):
+        """
+        Specialist outputs of the previous kickoff that are still valid for these inputs,
+        i.e. tasks that succeeded last time and depend on none of the changed fields.
+        """
+        previous = self.last_run
+        if previous is None:
+            return {}
+
+        changed = changed_fields(previous.inputs, inputs)
+        retained = {}
+        for name, fields in TASK_INPUT_FIELDS.items():
+            if name in previous.outputs and name not in previous.errors and not changed & set(fields):
+                retained[name] = previous.outputs[name]
+        print(f"Incremental re-plan: changed fields {sorted(changed) or 'none'}, "
+              f"rerunning {len(TASK_INPUT_FIELDS) - len(retained)} of {len(TASK_INPUT_FIELDS)} specialist tasks")
+        return retained
+
+    def _deadline(self, seconds):
+        """Deadline for one kickoff: seconds, or the crew's default; None when there is no budget."""
+        seconds = self.deadline if seconds is None else seconds
+        return Deadline(seconds) if seconds and seconds > 0 else None
+
+    def kickoff(self, inputs=None, shared_outputs=None, incremental=False, deadline=None):
+        """
+        Kick off the crew with the given inputs.
+        
+        Args:
+            inputs (dict): Trip details; starting_point, destination, start_date and end_date are required.
+            shared_outputs (SharedTaskOutputs, optional): Registry used to share specialist task
+                                                          outputs with other trips (see kickoff_many).
+            incremental (bool): Re-plan from the previous kickoff of this crew, rerunning only the
+                                specialist tasks whose inputs (TASK_INPUT_FIELDS) changed. The report
+                                is always recompiled.
+            deadline (float, optional): Seconds this kickoff may take, overriding the crew's deadline.
+                                        The report is compiled from whatever finished in time.
+        
+        Returns the report path as soon as the markdown is written; the report is scored in the
+        background and self.last_evaluation holds the handle of that job.
+        """
+        retained = self._retained_outputs(inputs or {}) if incremental else {}
+        budget = self._deadline(deadline)
+        self._prepare_kickoff(inputs)
+
+        # Run the task graph: specialists in parallel, then compiler and evaluator
+        scheduler = TaskGraphScheduler(self.build_tasks(), max_concurrency=self.max_concurrency,
+                                       shared=shared_outputs, share_keys=self._task_input_keys(inputs),
+                                       cache=self.output_cache, retained=retained,
+                                       local_tasks=self._local_tasks(), compactor=self.context_compactor,
+                                       deadline=budget)
+        result = scheduler.run(inputs)
+        self.last_run = result
         
         # Create a report filename
         destination = inputs.get('destination', "UnknownDestination")
@@ -683,8 +875,127 @@ Research the typical weather for {destination} during your travel dates ({start_
         
         return self.aggregate_results(None)  # Use fallback report
 
-    @agent
-    def transport_planner(self):
+    async def kickoff_async(self, inputs=None, deadline=None):
+        """
+        Kick off the crew on the running event loop, yielding progress as tasks finish.
+        
+        Usage:
+            async for event in crew.kickoff_async(inputs):
+                ...
+        
+        Yields a TaskCompletedEvent (name, raw output, duration, token usage) for every
+        task in the graph, then a PlanCompletedEvent carrying the report path and the
+        handle of its background evaluation (`await event.evaluation` for the scores).
+        Each call plans on a fork of this crew, so one crew can serve many
+        concurrent requests on the same loop. deadline works as in kickoff.
+        """
+        started = time.perf_counter()
+        budget = self._deadline(deadline)
+        plan = self._fork()
+        plan._prepare_kickoff(inputs)
+        plan.raw_dir = os.path.join(RAW_DIR, trip_key(inputs))
+
+        scheduler = TaskGraphScheduler(plan.build_tasks(), max_concurrency=plan.max_concurrency,
+                                       share_keys=plan._task_input_keys(inputs), cache=plan.output_cache,
+                                       local_tasks=plan._local_tasks(), compactor=plan.context_compactor,
+                                       deadline=budget)
+        async for event in scheduler.run_async(inputs):
+            yield event
+
+        result = plan.last_run = scheduler.result
+        # Report writing and scoring are blocking file/CPU work, keep them off the loop
+        report_path = await asyncio.to_thread(plan.aggregate_results, result if result.tasks_output else None)
+        yield PlanCompletedEvent(
+            report_path=report_path,
+            duration=time.perf_counter() - started,
+            errors={name: str(e) for name, e in result.errors.items()},
+            evaluation=plan.last_evaluation
+        )
+
+    def _fork(self):
+        """Copy of this crew sharing configs, LLMs and tools but with its own per-kickoff state."""
+        forked = copy.copy(self)
+        forked.active_agents = list(self.active_agents)
+        forked.kickoff_inputs = None
+        forked._graph = {}
+        forked.last_run = None
+        forked.last_evaluation = None
+        return forked
+
+    def kickoff_many(self, inputs_list, max_workers=4):
+        """
+        Plan many trips with the LLMs and tools already loaded by this crew.
+        
+        Trips run on a pool of max_workers threads. Specialist tasks whose relevant
+        inputs (TASK_INPUT_FIELDS) match across trips run once and are shared, e.g.
+        ten trips to Paris on the same dates share one weather task. Identical tool
+        requests in flight at the same time are coalesced (tools.single_flight),
+        and the manifest reports each provider's circuit breaker state. A shared
+        task that fails is not reused: the next trip needing it runs it again.
+        Each trip dumps its raw agent outputs to reports/raw/<trip_key(inputs)>/.
+        
+        Args:
+            inputs_list (List[dict]): Kickoff inputs for each trip.
+            max_workers (int): Maximum number of trips planned at once.
+        
+        Returns:
+            dict: Manifest with one entry per trip (in input order) plus batch totals.
+        """
+        shared = SharedTaskOutputs()
+        batch_started = time.perf_counter()
+
+        def plan_trip(index, inputs):
+            trip_crew = self._fork()
+            # Trips run concurrently; each dumps its raw outputs (the evaluation refs) apart
+            trip_crew.raw_dir = os.path.join(RAW_DIR, trip_key(inputs or {}))
+            started = time.perf_counter()
+            entry = {
+                'index': index,
+                'destination': (inputs or {}).get('destination'),
+                'status': 'ok',
+                'report_path': None,
+                'error': None,
+                'task_errors': {},
+                'shared_tasks': [],
+                'cached_tasks': [],
+                'timed_out_tasks': [],
+                'eval_path': None,
+            }
+            try:
+                entry['report_path'] = trip_crew.kickoff(inputs=inputs, shared_outputs=shared)
+                if trip_crew.last_run:
+                    entry['task_errors'] = {name: str(e) for name, e in trip_crew.last_run.errors.items()}
+                    entry['shared_tasks'] = list(trip_crew.last_run.reused)
+                    entry['cached_tasks'] = list(trip_crew.last_run.cached)
+                    entry['timed_out_tasks'] = list(trip_crew.last_run.timed_out)
+                if trip_crew.last_evaluation:
+                    entry['eval_path'] = str(trip_crew.last_evaluation.eval_path)
+            except Exception as e:
+                print(f"Trip {index} failed: {str(e)}")
+                entry['status'] = 'failed'
+                entry['error'] = str(e)
+            entry['duration'] = round(time.perf_counter() - started, 2)
+            return entry
+
+        coalesced_before = get_single_flight().stats()['coalesced']
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="travel-trip") as pool:
+            trips = list(pool.map(plan_trip, range(len(inputs_list)), inputs_list))
+
+        return {
+            'trips': trips,
+            'total': len(trips),
+            'succeeded': sum(1 for t in trips if t['status'] == 'ok'),
+            'failed': sum(1 for t in trips if t['status'] == 'failed'),
+            'specialist_tasks_run': shared.computed,
+            'specialist_tasks_shared': shared.reused,
+            'tool_calls_coalesced': get_single_flight().stats()['coalesced'] - coalesced_before,
+            'circuit_breakers': breaker_stats(),
+            'business_store': get_business_store().stats() if get_business_store() else None,
+            'geoapify_tiles': get_tile_cache().stats() if get_tile_cache() else None,
+            'duration': round(time.perf_counter() - batch_started, 2),
+        }
+
+    def _build_transport_planner(self):
         """Defines the enhanced Transport Planner agent."""
         if 'transport_planner' not in self.active_agents:
             return None
@@ -707,8 +1018,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             allow_delegation=False
         )
 
-    @agent
-    def accommodation_finder(self):
+    def _build_accommodation_finder(self):
         """Defines the enhanced Accommodation & Local Stay Specialist agent."""
         if 'accommodation_finder' not in self.active_agents:
             return None
@@ -731,8 +1041,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             allow_delegation=False
         )
 
-    @agent
-    def local_guide(self):
+    def _build_local_guide(self):
         """Defines the enhanced Local Guide agent."""
         if 'local_guide' not in self.active_agents:
             return None
@@ -755,8 +1064,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             allow_delegation=False
         )
 
-    @agent
-    def yelp_dining_expert(self):
+    def _build_yelp_dining_expert(self):
         """Defines the specialized Yelp Dining Expert agent."""
         if 'yelp_dining_expert' not in self.active_agents:
             return None
@@ -784,8 +1092,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             allow_delegation=False
         )
 
-    @agent
-    def packing_and_weather_advisor(self):
+    def _build_packing_and_weather_advisor(self):
         """Defines the enhanced Weather and Packing Advisor agent."""
         if 'packing_and_weather_advisor' not in self.active_agents:
             return None
@@ -813,8 +1120,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             allow_delegation=False
         )
 
-    @agent
-    def report_compiler(self):
+    def _build_report_compiler(self):
         """Defines the Report Compiler agent using any available LLM from the active ones."""
         if 'report_compiler' not in self.active_agents:
             return None
@@ -837,8 +1143,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             llm=self.llms[llm_key],
             verbose=True
         )
-    @agent
-    def report_evaluator(self):
+    def _build_report_evaluator(self):
         """QA agent that scores the final itinerary."""
         if 'report_evaluator' not in self.active_agents:
             return None
@@ -859,8 +1164,7 @@ Research the typical weather for {destination} during your travel dates ({start_
             allow_delegation = False
         )
 
-    @task
-    def evaluate_report_task(self):
+    def _build_evaluate_report_task(self):
         """Task: score the compiled report with a rubric."""
         if 'report_evaluator' not in self.active_agents:
             return None
@@ -869,22 +1173,22 @@ Research the typical weather for {destination} during your travel dates ({start_
         if not cfg:
             return None
 
-        evaluator = self.report_evaluator()
+        evaluator = self._agent('report_evaluator')
         if not evaluator:
             return None
 
-        description = cfg['description'] + f"\n\n[meta] {self.kickoff_inputs}"
+        description = cfg['description'] + f"\n\n[meta] {format_inputs(self.kickoff_inputs)}"
         return Task(
+            name            = 'evaluate_report_task',
             description     = description,
             expected_output = cfg['expected_output'],
             agent           = evaluator,
             # context is the compiled report task itself
-            context         = [self.compile_travel_report_task()],
-            callback        = lambda output, _t=evaluator.role: _dump_raw(_t, output.raw)
+            context         = [self._task('compile_travel_report_task')],
+            callback        = lambda output, _t=evaluator.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
 
-    @task
-    def find_transportation_task(self):
+    def _build_find_transportation_task(self):
         """Defines the enhanced task for finding transportation."""
         if 'transport_planner' not in self.active_agents:
             return None
@@ -893,7 +1197,7 @@ Research the typical weather for {destination} during your travel dates ({start_
         if not task_config:
             return None
             
-        planner = self.transport_planner()
+        planner = self._agent('transport_planner')
         if not planner:
             return None
             
@@ -901,14 +1205,14 @@ Research the typical weather for {destination} during your travel dates ({start_
         expected_output = task_config.get('expected_output', 'A comprehensive transportation section.')
         
         return Task(
+            name='find_transportation_task',
             description=description,
             expected_output=expected_output,
             agent=planner,
-            callback=lambda output, _t=planner.role: _dump_raw(_t, output.raw)
+            callback=lambda output, _t=planner.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
 
-    @task
-    def find_accommodation_task(self):
+    def _build_find_accommodation_task(self):
         """Defines the enhanced task for finding accommodation."""
         if 'accommodation_finder' not in self.active_agents:
             return None
@@ -917,7 +1221,7 @@ Research the typical weather for {destination} during your travel dates ({start_
         if not task_config:
             return None
             
-        finder = self.accommodation_finder()
+        finder = self._agent('accommodation_finder')
         if not finder:
             return None
             
@@ -925,14 +1229,14 @@ Research the typical weather for {destination} during your travel dates ({start_
         expected_output = task_config.get('expected_output', 'A well-structured accommodation section.')
         
         return Task(
+            name='find_accommodation_task',
             description=description,
             expected_output=expected_output,
             agent=finder,
-            callback=lambda output, _t=finder.role: _dump_raw(_t, output.raw)
+            callback=lambda output, _t=finder.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
 
-    @task
-    def get_local_context_task(self):
+    def _build_get_local_context_task(self):
         """Defines the enhanced task for getting local context and attractions."""
         if 'local_guide' not in self.active_agents:
             return None
@@ -941,7 +1245,7 @@ Research the typical weather for {destination} during your travel dates ({start_
         if not task_config:
             return None
             
-        guide = self.local_guide()
+        guide = self._agent('local_guide')
         if not guide:
             return None
             
@@ -949,14 +1253,14 @@ Research the typical weather for {destination} during your travel dates ({start_
         expected_output = task_config.get('expected_output', 'A comprehensive local guide section.')
         
         return Task(
+            name='get_local_context_task',
             description=description,
             expected_output=expected_output,
             agent=guide,
-            callback=lambda output, _t=guide.role: _dump_raw(_t, output.raw)
+            callback=lambda output, _t=guide.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
 
-    @task
-    def get_dining_recommendations_task(self):
+    def _build_get_dining_recommendations_task(self):
         """Defines the specialized task for getting dining recommendations."""
         if 'yelp_dining_expert' not in self.active_agents:
             return None
@@ -965,7 +1269,7 @@ Research the typical weather for {destination} during your travel dates ({start_
         if not task_config:
             return None
             
-        expert = self.yelp_dining_expert()
+        expert = self._agent('yelp_dining_expert')
         if not expert:
             return None
         
@@ -974,12 +1278,7 @@ Research the typical weather for {destination} during your travel dates ({start_
         budget = self.kickoff_inputs.get('budget', 'Moderate')
         
         # Map budget preference to Yelp price tiers (1=$, 2=$$, 3=$$$, 4=$$$$)
-        price_map = {
-            'Budget': '1,2',
-            'Moderate': '2,3',
-            'Luxury': '3,4'
-        }
-        price_tier = price_map.get(budget, '1,2,3,4')
+        price_tier = ",".join(str(t) for t in BUDGET_PRICE_TIERS.get(str(budget).lower(), (1, 2, 3, 4)))
         
         # Include these parameters in the task description
         enhanced_description = task_config.get('description', 'Get dining recommendations.') + f"""
@@ -995,14 +1294,14 @@ Additional Yelp Search Parameters:
         expected_output = task_config.get('expected_output', 'A well-structured dining section.')
         
         return Task(
+            name='get_dining_recommendations_task',
             description=enhanced_description,
             expected_output=expected_output,
             agent=expert,
-            callback=lambda output, _t=expert.role: _dump_raw(_t, output.raw)
+            callback=lambda output, _t=expert.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
 
-    @task
-    def get_weather_and_packing_advice_task(self):
+    def _build_get_weather_and_packing_advice_task(self):
         """Defines the enhanced task for getting weather and packing advice."""
         if 'packing_and_weather_advisor' not in self.active_agents:
             return None
@@ -1011,7 +1310,7 @@ Additional Yelp Search Parameters:
         if not task_config:
             return None
             
-        advisor = self.packing_and_weather_advisor()
+        advisor = self._agent('packing_and_weather_advisor')
         if not advisor:
             return None
             
@@ -1019,14 +1318,14 @@ Additional Yelp Search Parameters:
         expected_output = task_config.get('expected_output', 'A detailed weather and packing section.')
         
         return Task(
+            name='get_weather_and_packing_advice_task',
             description=description,
             expected_output=expected_output,
             agent=advisor,
-            callback=lambda output, _t=advisor.role: _dump_raw(_t, output.raw)
+            callback=lambda output, _t=advisor.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
 
-    @task
-    def compile_travel_report_task(self):
+    def _build_compile_travel_report_task(self):
         """Defines the final task for compiling the comprehensive report."""
         if 'report_compiler' not in self.active_agents:
             return None
@@ -1035,86 +1334,125 @@ Additional Yelp Search Parameters:
         if not task_config:
             return None
             
-        compiler = self.report_compiler()
+        compiler = self._agent('report_compiler')
         if not compiler:
             return None
 
-        # Create context from all prerequisite tasks
+        # Context is the specialist tasks already built for this kickoff
         tasks = []
+        for task_name, agent_name in SPECIALIST_TASKS.items():
+            if agent_name in self.active_agents:
+                task = self._task(task_name)
+                if task: tasks.append(task)
         
-        # Only include tasks for active agents
-        if 'transport_planner' in self.active_agents:
-            task = self.find_transportation_task()
-            if task: tasks.append(task)
-            
-        if 'accommodation_finder' in self.active_agents:
-            task = self.find_accommodation_task()
-            if task: tasks.append(task)
-            
-        if 'local_guide' in self.active_agents:
-            task = self.get_local_context_task()
-            if task: tasks.append(task)
-            
-        if 'yelp_dining_expert' in self.active_agents:
-            task = self.get_dining_recommendations_task()
-            if task: tasks.append(task)
-            
-        if 'packing_and_weather_advisor' in self.active_agents:
-            task = self.get_weather_and_packing_advice_task()
-            if task: tasks.append(task)
-        
-        description = task_config.get('description', 'Compile travel report.') + f"\n\n[Input Data]: {self.kickoff_inputs}"
+        description = task_config.get('description', 'Compile travel report.') + f"\n\n[Input Data]: {format_inputs(self.kickoff_inputs)}"
         expected_output = task_config.get('expected_output', 'A well-structured travel report document.')
         
         return Task(
+            name='compile_travel_report_task',
             description=description,
             expected_output=expected_output,
             agent=compiler,
             context=tasks,
             output_file="temp_report.md",
             action=self.aggregate_results,
-            callback=lambda output, _t=compiler.role: _dump_raw(_t, output.raw)
+            callback=lambda output, _t=compiler.role: _dump_raw(_t, output.raw, self.raw_dir)
         )
     
-    def crew(self):
-        """Creates and returns the assembled Travel Agent Crew with specialized agents."""
-        # Create all tasks for active agents
+    def _graph_member(self, name):
+        """Return the agent or task `name` for this kickoff, building it on first use."""
+        if name not in self._graph:
+            self._graph[name] = getattr(self, f"_build_{name}")()
+        return self._graph[name]
+
+    def _agent(self, name):
+        return self._graph_member(name)
+
+    def _task(self, name):
+        return self._graph_member(name)
+
+    def build_tasks(self):
+        """
+        Builds the task graph for the current kickoff inputs.
+        Every agent and task is created exactly once, and context lists reference
+        the same Task instances that are returned, in dependency order.
+        """
+        self._graph = {}
         tasks = []
+        for task_name, agent_name in {**SPECIALIST_TASKS, **REPORT_TASKS}.items():
+            if agent_name in self.active_agents:
+                task = self._task(task_name)
+                if task: tasks.append(task)
         
-        # Only include tasks for active agents
-        if 'transport_planner' in self.active_agents:
-            task = self.find_transportation_task()
-            if task: tasks.append(task)
-            
-        if 'accommodation_finder' in self.active_agents:
-            task = self.find_accommodation_task()
-            if task: tasks.append(task)
-            
-        if 'local_guide' in self.active_agents:
-            task = self.get_local_context_task()
-            if task: tasks.append(task)
-            
-        if 'yelp_dining_expert' in self.active_agents:
-            task = self.get_dining_recommendations_task()
-            if task: tasks.append(task)
-            
-        if 'packing_and_weather_advisor' in self.active_agents:
-            task = self.get_weather_and_packing_advice_task()
-            if task: tasks.append(task)
-            
-        if 'report_compiler' in self.active_agents:
-            task = self.compile_travel_report_task()
-            if task: tasks.append(task)
-
-        if 'report_evaluator' in self.active_agents:
-            task = self.evaluate_report_task()
-            if task: tasks.append(task)
-        # Filter out None tasks
-        valid_tasks = [t for t in tasks if t is not None]
-        
-        if not valid_tasks:
+        if not tasks:
             raise ValueError("No valid tasks could be created. Check active_agents and API keys.")
         
+        return tasks
+
+    # crewAI project hooks; these return the instances of the last built graph
+    @agent
+    def transport_planner(self):
+        return self._agent('transport_planner')
+
+    @agent
+    def accommodation_finder(self):
+        return self._agent('accommodation_finder')
+
+    @agent
+    def local_guide(self):
+        return self._agent('local_guide')
+
+    @agent
+    def yelp_dining_expert(self):
+        return self._agent('yelp_dining_expert')
+
+    @agent
+    def packing_and_weather_advisor(self):
+        return self._agent('packing_and_weather_advisor')
+
+    @agent
+    def report_compiler(self):
+        return self._agent('report_compiler')
+
+    @agent
+    def report_evaluator(self):
+        return self._agent('report_evaluator')
+
+    @task
+    def find_transportation_task(self):
+        return self._task('find_transportation_task')
+
+    @task
+    def find_accommodation_task(self):
+        return self._task('find_accommodation_task')
+
+    @task
+    def get_local_context_task(self):
+        return self._task('get_local_context_task')
+
+    @task
+    def get_dining_recommendations_task(self):
+        return self._task('get_dining_recommendations_task')
+
+    @task
+    def get_weather_and_packing_advice_task(self):
+        return self._task('get_weather_and_packing_advice_task')
+
+    @task
+    def compile_travel_report_task(self):
+        return self._task('compile_travel_report_task')
+
+    @task
+    def evaluate_report_task(self):
+        return self._task('evaluate_report_task')
+
+    def crew(self):
+        """
+        Creates and returns the assembled Travel Agent Crew with specialized agents.
+        Used by train/replay/test; kickoff() runs the same tasks through TaskGraphScheduler.
+        """
+        valid_tasks = self.build_tasks()
+        
         # Get all agents used in valid tasks
         agents = set()
         for task in valid_tasks:
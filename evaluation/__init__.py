@@ -1,2 +1,10 @@
 # evaluation/__init__.py
-from .runner import evaluate_now
+from .background import submit_evaluation, wait_for_evaluations, EvaluationHandle
+
+
+def __getattr__(name):
+    # evaluate_now pulls in NLTK and ROUGE; only import it when asked for
+    if name == 'evaluate_now':
+        from .runner import evaluate_now
+        return evaluate_now
+    raise AttributeError(f"module 'evaluation' has no attribute '{name}'")
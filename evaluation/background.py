@@ -0,0 +1,89 @@
+"""
+Background scoring of generated reports.
+submit_evaluation() returns immediately with an EvaluationHandle; the
+_eval.json / _eval.md files appear next to the report once the worker pool
+has scored it.
+"""
+import os
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+EVAL_WORKERS = int(os.getenv("TRAVEL_AGENT_EVAL_WORKERS", "2"))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pending: "set[Future]" = set()
+_lock = threading.Lock()
+_import_lock = threading.Lock()
+
+
+class EvaluationHandle:
+    """A scheduled evaluation; poll with done(), block with result() or `await` it."""
+
+    def __init__(self, summary_path: Path, future: Future):
+        self.summary_path = summary_path
+        self.future = future
+
+    @property
+    def eval_path(self) -> Path:
+        """Where the JSON scores will be written."""
+        return self.summary_path.with_name(self.summary_path.stem + "_eval.json")
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Path:
+        """Path of the JSON scores, waiting up to timeout seconds; re-raises a scoring error."""
+        return self.future.result(timeout)
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, EVAL_WORKERS), thread_name_prefix="travel-eval")
+        return _pool
+
+
+def _snapshot_refs(ref_dir: Path) -> List[str]:
+    # Read now: the raw agent dumps are overwritten by the next plan before the job runs
+    return [p.read_text(encoding="utf-8").strip() for p in sorted(ref_dir.glob("*.txt"))]
+
+
+def _evaluate(summary_path: Path, ref_dir: Path, refs: List[str], meta: Dict[str, Any]) -> Path:
+    # NLTK/ROUGE are heavy to import; load them once, off the request path
+    with _import_lock:
+        from .runner import evaluate_now
+    eval_json = evaluate_now(summary_path=summary_path, ref_dir=ref_dir, meta=meta, refs=refs)
+    print(f"✓ Evaluation written to {eval_json}")
+    return eval_json
+
+
+def submit_evaluation(summary_path, ref_dir, meta: Optional[Dict[str, Any]] = None) -> EvaluationHandle:
+    """Schedule evaluate_now for a report on the shared worker pool."""
+    summary_path, ref_dir = Path(summary_path), Path(ref_dir)
+    future = _executor().submit(_evaluate, summary_path, ref_dir, _snapshot_refs(ref_dir), dict(meta or {}))
+    with _lock:
+        _pending.add(future)
+    future.add_done_callback(_finished)
+    return EvaluationHandle(summary_path, future)
+
+
+def _finished(future: Future) -> None:
+    with _lock:
+        _pending.discard(future)
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Evaluation skipped due to an error: {future.exception()}")
+
+
+def wait_for_evaluations(timeout: Optional[float] = None) -> bool:
+    """Block until every submitted evaluation has finished; False if the timeout expired first."""
+    with _lock:
+        pending = list(_pending)
+    _, not_done = wait(pending, timeout=timeout)
+    return not not_done
@@ -1,16 +1,18 @@
 import json, time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .metrics import load_refs, rouge, bleu, ragus
 from .templates import MARKDOWN_HEADER
 
 def evaluate_now(summary_path: str | Path,
                  ref_dir: str | Path,
-                 meta: Dict[str, Any] | None = None) -> Path:
+                 meta: Dict[str, Any] | None = None,
+                 refs: List[str] | None = None) -> Path:
     summary_path = Path(summary_path)
     ref_dir = Path(ref_dir)
-    refs = load_refs(ref_dir)
+    if refs is None:
+        refs = load_refs(ref_dir)
     concat_refs = "\n".join(refs)
 
     # Run metrics
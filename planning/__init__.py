@@ -0,0 +1,8 @@
+# planning/__init__.py
+from .scheduler import TaskGraphScheduler, GraphRunResult, CompactContextCrew, DEFAULT_MAX_CONCURRENCY
+from .batch import SharedTaskOutputs
+from .inputs import normalize_value, task_input_key, changed_fields
+from .events import TaskCompletedEvent, PlanCompletedEvent
+from .output_cache import TaskOutputCache
+from .llm_pool import LLMKeyPool, PooledLLM
+from .context import ContextCompactor, format_inputs
@@ -0,0 +1,66 @@
+"""
+Helpers for planning many trips with one TravelAgentCrew.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from tools.deadline import check_deadline
+
+
+class SharedTaskOutputs:
+    """
+    Single-flight registry of specialist task outputs shared across trips.
+    The first trip asking for a key runs the task; concurrent and later trips
+    with the same key wait for and reuse that output. Failures are not shared:
+    a failed run is dropped, so the next trip asking for the key runs the task
+    again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, Future] = {}
+        self.computed = 0
+        self.reused = 0
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """(future of key's output, whether this trip has to compute it)."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = Future()
+                self.computed += 1
+                return future, True
+            return future, False
+
+    def _compute(self, key: Hashable, future: Future, compute: Callable[[], Any]) -> None:
+        try:
+            future.set_result(compute())
+        except Exception as e:
+            # One transient LLM or tool error must not fail every later trip
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+            future.set_exception(e)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return (output, reused) for key, running compute only if no trip has claimed it yet.
+        A trip waiting on a run that failed (perhaps on the other trip's deadline)
+        runs the task once more itself if its own deadline allows.
+        """
+        for attempt in range(2):
+            future, owner = self._claim(key)
+            if owner:
+                self._compute(key, future, compute)
+                return future.result(), False
+            try:
+                output = future.result()
+            except Exception:
+                if attempt:
+                    raise
+                check_deadline("Shared task")
+                continue
+            with self._lock:
+                self.reused += 1
+            return output, True
@@ -0,0 +1,150 @@
+"""
+Token-budgeted compaction of the upstream context handed to the report tasks.
+Specialist outputs are cleaned of boilerplate, places already described by an
+earlier section are dropped, and if the result is still over budget each
+output is trimmed extractively: headings and the opening lines of every
+section are kept first, later lines only while the output's share of the
+budget allows.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .llm_pool import estimate_tokens
+
+DEFAULT_CONTEXT_BUDGET = int(os.getenv("TRAVEL_AGENT_CONTEXT_BUDGET", "6000"))
+
+# Same separator crewAI puts between context outputs
+DIVIDER = "\n\n----------\n\n"
+
+# Text that carries no trip information (tool fallbacks, LLM sign-offs)
+BOILERPLATE_PATTERNS = [
+    # PublicTransportSearchTool._get_fallback_message
+    re.compile(r"(\*\*Important Note:\*\* )?Unable to retrieve public transportation data.*?"
+               r"I apologize for not being able to provide specific route details at this time\.", re.S),
+    re.compile(r"^.*\b(I hope this (helps|information is helpful)|Let me know if you (need|have|would like))\b.*$",
+               re.I | re.M),
+    re.compile(r"^\s*```(markdown)?\s*$", re.M),
+]
+
+_HEADING = re.compile(r"^\s*(#{1,6}\s+.+|\*\*[^*]+\*\*:?)\s*$")
+_ENTITY = re.compile(r"\*\*([^*]{3,80}?)\*\*")
+_LABEL = re.compile(r"\*\*[^*]+:\*\*")
+_LIST_ITEM = re.compile(r"^\s*([-*+]|\d+[.)])\s")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def _entity(line: str) -> Optional[str]:
+    """Name of the place a list line is about (its first bold span that isn't a `**Label:**`)."""
+    for match in _ENTITY.finditer(_LABEL.sub("", line)):
+        name = _normalize(match.group(1))
+        if name:
+            return name
+    return None
+
+
+def strip_boilerplate(text: str) -> str:
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub("", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+class ContextCompactor:
+    """Shrinks upstream task outputs to fit `budget` tokens (0 disables trimming, not cleaning)."""
+
+    def __init__(self, budget: int = DEFAULT_CONTEXT_BUDGET):
+        self.budget = budget
+
+    def _dedupe(self, texts: Sequence[str]) -> List[List[str]]:
+        """Lines of every output, without lines repeated or places already covered by an earlier output."""
+        seen_lines = set()
+        seen_entities: Dict[str, int] = {}
+        deduped = []
+        for index, text in enumerate(texts):
+            lines = []
+            for line in text.splitlines():
+                key = _normalize(line)
+                if key and not _HEADING.match(line):
+                    if key in seen_lines:
+                        continue
+                    entity = _entity(line) if _LIST_ITEM.match(line) else None
+                    if entity and seen_entities.get(entity, index) != index:
+                        continue
+                    seen_lines.add(key)
+                    if entity:
+                        seen_entities.setdefault(entity, index)
+                lines.append(line)
+            deduped.append(lines)
+        return deduped
+
+    @staticmethod
+    def _trim(lines: List[str], budget: int) -> List[str]:
+        """Keep headings, then lines in order of their position within their section, up to budget tokens."""
+        if estimate_tokens("\n".join(lines)) <= budget:
+            return lines
+        ranked = []
+        position = 0
+        for index, line in enumerate(lines):
+            if _HEADING.match(line):
+                position = 0
+                ranked.append((-1, index))
+            elif line.strip():
+                ranked.append((position, index))
+                position += 1
+        ranked.sort()
+
+        kept, used = [], 0
+        for _, index in ranked:
+            cost = estimate_tokens(lines[index] + "\n")
+            if used + cost <= budget:
+                kept.append(index)
+                used += cost
+
+        def render(indexes):
+            trimmed = [line for i, line in enumerate(lines) if i in indexes or not line.strip()]
+            return re.sub(r"\n{3,}", "\n\n", "\n".join(trimmed)).strip()
+
+        # Blank lines between kept lines also cost tokens; shed the lowest-ranked lines until it fits
+        while kept and estimate_tokens(render(set(kept))) > budget:
+            kept.pop()
+        return render(set(kept)).splitlines()
+
+    def _shares(self, sizes: List[int]) -> List[int]:
+        """Split the budget evenly, handing what small outputs don't need to the larger ones."""
+        shares = [0] * len(sizes)
+        remaining = self.budget - estimate_tokens(DIVIDER) * (len(sizes) - 1)
+        open_ = sorted(range(len(sizes)), key=lambda i: sizes[i])
+        while open_:
+            share = remaining // len(open_)
+            index = open_.pop(0)
+            shares[index] = min(sizes[index], share)
+            remaining -= shares[index]
+        return shares
+
+    def compact(self, outputs: Sequence[Any]) -> Tuple[str, int, int]:
+        """(context text, tokens before, tokens after) for a list of TaskOutputs."""
+        raws = [getattr(output, 'raw', '') or '' for output in outputs]
+        before = estimate_tokens(DIVIDER.join(raws))
+
+        sections = self._dedupe([strip_boilerplate(raw) for raw in raws])
+        if self.budget and sum(estimate_tokens("\n".join(lines)) for lines in sections) > self.budget:
+            shares = self._shares([estimate_tokens("\n".join(lines)) for lines in sections])
+            sections = [self._trim(lines, share) for lines, share in zip(sections, shares)]
+
+        text = DIVIDER.join("\n".join(lines).strip() for lines in sections if "".join(lines).strip())
+        return text, before, estimate_tokens(text)
+
+
+def format_inputs(inputs: Optional[Dict[str, Any]]) -> str:
+    """One-line `field: value` rendering of the kickoff inputs, skipping empty fields."""
+    parts = []
+    for field, value in (inputs or {}).items():
+        if value in (None, "", [], ()):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = ", ".join(str(v) for v in value)
+        parts.append(f"{field}: {value}")
+    return "; ".join(parts)
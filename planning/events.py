@@ -0,0 +1,25 @@
+"""
+Events emitted by TravelAgentCrew.kickoff_async while a plan is being built.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class TaskCompletedEvent:
+    """A task in the graph finished (or failed)."""
+    name: str
+    raw: str
+    duration: float
+    token_usage: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    source: str = 'run'  # 'run', 'shared' (another trip's run), 'cache', 'retained' or 'local'
+
+
+@dataclass
+class PlanCompletedEvent:
+    """All tasks settled and the report has been written."""
+    report_path: str
+    duration: float
+    errors: Dict[str, str] = field(default_factory=dict)
+    evaluation: Optional[Any] = None  # evaluation.EvaluationHandle, scored in the background
@@ -0,0 +1,60 @@
+"""
+Normalization of kickoff inputs into hashable keys.
+Specialist tasks only depend on a few trip fields; two trips that agree on
+those fields (ignoring case, whitespace and the formatting of the dates in
+DATE_FIELDS) can share the task's output.
+"""
+import datetime
+import hashlib
+from typing import Any, Dict, Hashable, Iterable, Set, Tuple
+
+# Date spellings accepted from the CLI, the Streamlit form and API callers
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d.%m.%Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y")
+# Input fields holding a date; other strings are never read as one
+DATE_FIELDS = ("start_date", "end_date")
+
+
+def canonical_date(value: str):
+    """ISO date for a date-like string, or None if it is not one."""
+    text = " ".join(value.split())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_value(value: Any, field: str = "") -> Hashable:
+    """Canonical, hashable form of a single input value; strings of DATE_FIELDS become ISO dates."""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted((normalize_value(v, field) for v in value), key=str))
+    if isinstance(value, str):
+        date = canonical_date(value) if field in DATE_FIELDS else None
+        return date or " ".join(value.split()).lower()
+    return value
+
+
+def task_input_key(task_name: str, fields: Iterable[str], inputs: Dict[str, Any]) -> Tuple:
+    """Key identifying a task run by its name and the normalized inputs it depends on."""
+    return (task_name,) + tuple((field, normalize_value(inputs.get(field), field)) for field in fields)
+
+
+def trip_key(inputs: Dict[str, Any]) -> str:
+    """Short stable hash of a trip's normalized inputs, e.g. to name its own files."""
+    items = sorted((str(field), repr(normalize_value(value, field))) for field, value in inputs.items())
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()[:12]
+
+
+def changed_fields(previous: Dict[str, Any], current: Dict[str, Any]) -> Set[str]:
+    """Fields whose normalized value differs between two sets of inputs."""
+    return {
+        field for field in set(previous) | set(current)
+        if normalize_value(previous.get(field), field) != normalize_value(current.get(field), field)
+    }
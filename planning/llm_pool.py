@@ -0,0 +1,262 @@
+"""
+Rate-limit-aware pool of LLM API keys.
+Every configured key gets a sliding one-minute window of requests and tokens.
+Each LLM call is routed to the least-loaded key that still has room for it, and
+waits for the window to roll over when every key is saturated instead of
+failing with a quota error.
+"""
+import os
+import time
+import threading
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from crewai.llms.base_llm import BaseLLM, call_stop_override
+from pydantic import PrivateAttr
+
+from tools.deadline import check_deadline, current_deadline
+
+# Free-tier quotas of gemini-2.0-flash, per key
+DEFAULT_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", "15"))
+DEFAULT_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+WINDOW_SECONDS = 60.0
+
+
+def estimate_tokens(messages: Any, max_tokens: Optional[int] = None) -> int:
+    """Rough token count of a prompt (~4 characters per token) plus the completion budget."""
+    if isinstance(messages, str):
+        text = messages
+    else:
+        text = " ".join(str(m.get('content', '')) if isinstance(m, dict) else str(m) for m in messages or [])
+    return len(text) // 4 + int(max_tokens or 0)
+
+
+class KeyWindow:
+    """Requests and tokens spent on one key during the last minute."""
+
+    def __init__(self, rpm_limit: int, tpm_limit: int):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.calls: Deque[List[float]] = deque()  # [timestamp, tokens]
+        self.tokens = 0
+        self.requests = 0
+
+    def expire(self, now: float) -> None:
+        while self.calls and self.calls[0][0] <= now - WINDOW_SECONDS:
+            _, tokens = self.calls.popleft()
+            self.tokens -= tokens
+
+    def load(self) -> float:
+        """Fraction of the tighter of the two quotas already used."""
+        return max(len(self.calls) / self.rpm_limit, self.tokens / self.tpm_limit)
+
+    def fits(self, tokens: int) -> bool:
+        # An oversized request is still let through on an idle key rather than queued forever
+        if not self.calls:
+            return True
+        return len(self.calls) < self.rpm_limit and self.tokens + tokens <= self.tpm_limit
+
+    def free_at(self) -> float:
+        """When the oldest call leaves the window."""
+        return self.calls[0][0] + WINDOW_SECONDS if self.calls else 0.0
+
+
+class LLMKeyPool:
+    """
+    Owns a set of API keys and hands out the least-loaded one per call.
+
+    acquire() reserves an estimated number of tokens on a key and returns a
+    ticket; release() replaces the estimate with the tokens actually used.
+    """
+
+    def __init__(self, keys: List[str], rpm_limit: int = DEFAULT_RPM_LIMIT, tpm_limit: int = DEFAULT_TPM_LIMIT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.keys = [k for k in dict.fromkeys(keys) if k]
+        if not self.keys:
+            raise ValueError("LLMKeyPool needs at least one API key.")
+        self.windows = [KeyWindow(rpm_limit, tpm_limit) for _ in self.keys]
+        self.clock = clock
+        self.waits = 0
+        self._cond = threading.Condition()
+
+    def _try_acquire(self, tokens: int) -> Tuple[Optional[Tuple[int, List[float]]], float]:
+        """(ticket, 0) if a key has room, else (None, seconds until one frees up)."""
+        now = self.clock()
+        for window in self.windows:
+            window.expire(now)
+        candidates = [i for i, w in enumerate(self.windows) if w.fits(tokens)]
+        if not candidates:
+            # Re-check at least every second; release() also wakes waiters early
+            return None, min(1.0, max(0.01, min(w.free_at() for w in self.windows) - now))
+
+        index = min(candidates, key=lambda i: self.windows[i].load())
+        window = self.windows[index]
+        call = [now, tokens]
+        window.calls.append(call)
+        window.tokens += tokens
+        window.requests += 1
+        return (index, call), 0.0
+
+    def acquire(self, tokens: int) -> Tuple[int, List[float]]:
+        """Reserve capacity for a call, blocking while every key is saturated (at most until the kickoff deadline)."""
+        check_deadline("LLM call")
+        deadline = current_deadline()
+        with self._cond:
+            ticket, delay = self._try_acquire(tokens)
+            while ticket is None:
+                if deadline is not None:
+                    deadline.check("LLM call")
+                    delay = min(delay, deadline.remaining())
+                self.waits += 1
+                self._cond.wait(timeout=delay)
+                ticket, delay = self._try_acquire(tokens)
+            return ticket
+
+    async def acquire_async(self, tokens: int) -> Tuple[int, List[float]]:
+        """acquire() for the event loop: sleeps instead of blocking the thread."""
+        check_deadline("LLM call")
+        deadline = current_deadline()
+        while True:
+            with self._cond:
+                ticket, delay = self._try_acquire(tokens)
+                if ticket is not None:
+                    return ticket
+                self.waits += 1
+            if deadline is not None:
+                deadline.check("LLM call")
+                delay = min(delay, deadline.remaining())
+            await asyncio.sleep(delay)
+
+    def release(self, ticket: Tuple[int, List[float]], tokens: Optional[int] = None) -> None:
+        """Record the tokens a call really used (keeps the estimate if unknown)."""
+        index, call = ticket
+        with self._cond:
+            if tokens is not None:
+                window = self.windows[index]
+                if any(c is call for c in window.calls):
+                    window.tokens += tokens - call[1]
+                call[1] = tokens
+            self._cond.notify_all()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Current one-minute usage of every key (keys themselves are not exposed)."""
+        with self._cond:
+            now = self.clock()
+            usage = []
+            for index, window in enumerate(self.windows):
+                window.expire(now)
+                usage.append({
+                    'key': index,
+                    'requests_last_minute': len(window.calls),
+                    'tokens_last_minute': window.tokens,
+                    'total_requests': window.requests,
+                })
+            return usage
+
+
+class PooledLLM(BaseLLM):
+    """
+    LLM whose calls are spread over the keys of an LLMKeyPool.
+    Each instance keeps its own client per key (built by `factory(api_key)`).
+    Every call runs on a copy of that client with fresh token counters, so its
+    usage is exact even when agents share the instance, and is added both to
+    the instance's counters and to those of the calling task (task_usage()).
+    No call is started once the kickoff's deadline (tools.deadline) has passed,
+    and a client with a `timeout` setting (litellm and most native providers)
+    gets the time left as its timeout for the call, so a slow model call does
+    not outlive the kickoff that is no longer waiting for it.
+    """
+
+    llm_type: str = "pooled"
+    _pool: LLMKeyPool = PrivateAttr()
+    _factory: Callable[[str], BaseLLM] = PrivateAttr()
+    _clients: Dict[int, BaseLLM] = PrivateAttr(default_factory=dict)
+    _task_usage: Dict[int, Dict[str, int]] = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, pool: LLMKeyPool, factory: Callable[[str], BaseLLM], **kwargs: Any):
+        super().__init__(**kwargs)
+        self._pool = pool
+        self._factory = factory
+        # Build one client up front so configuration errors surface here, not mid-plan
+        self._client(0)
+
+    def _client(self, index: int) -> BaseLLM:
+        with self._lock:
+            if index not in self._clients:
+                self._clients[index] = self._factory(self._pool.keys[index])
+            return self._clients[index]
+
+    def _call_client(self, index: int) -> BaseLLM:
+        """A per-call copy of the key's client with zeroed token counters and its timeout cut to the budget left."""
+        client = self._client(index)
+        update = {}
+        deadline = current_deadline()
+        if deadline is not None and 'timeout' in type(client).model_fields:
+            timeout = deadline.timeout(client.timeout)
+            if client.timeout is None or timeout < client.timeout:
+                update['timeout'] = timeout
+        # Shallow, so the SDK connection is shared; the counters are not, since concurrent calls share the client
+        call_client = client.model_copy(update=update)
+        call_client._token_usage = dict.fromkeys(client._token_usage, 0)
+        return call_client
+
+    def _usage(self, client: BaseLLM) -> Dict[str, int]:
+        try:
+            return client.get_token_usage_summary().model_dump()
+        except Exception:
+            return {}
+
+    def _record(self, client: BaseLLM, task: Any) -> Optional[int]:
+        """Add a call client's usage to our own and the task's counters and return its total tokens."""
+        usage = {k: v for k, v in self._usage(client).items() if isinstance(v, int)}
+        with self._lock:
+            for name, value in usage.items():
+                if name in self._token_usage:
+                    self._token_usage[name] += value
+            if task is not None:
+                counters = self._task_usage.setdefault(id(task), {})
+                for name, value in usage.items():
+                    counters[name] = counters.get(name, 0) + value
+        return usage.get('total_tokens', 0) or None
+
+    def task_usage(self, task: Any) -> Dict[str, int]:
+        """Cumulative token counters of the calls made for task (their from_task)."""
+        with self._lock:
+            return dict(self._task_usage.get(id(task), {}))
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        ticket = self._pool.acquire(estimate_tokens(messages, self.max_tokens))
+        client = self._call_client(ticket[0])
+        try:
+            with call_stop_override(client, self.stop_sequences):
+                return client.call(messages, tools=tools, callbacks=callbacks,
+                                   available_functions=available_functions, from_task=from_task,
+                                   from_agent=from_agent, response_model=response_model)
+        finally:
+            self._pool.release(ticket, self._record(client, from_task))
+
+    async def acall(self, messages, tools=None, callbacks=None, available_functions=None,
+                    from_task=None, from_agent=None, response_model=None):
+        ticket = await self._pool.acquire_async(estimate_tokens(messages, self.max_tokens))
+        client = self._call_client(ticket[0])
+        try:
+            with call_stop_override(client, self.stop_sequences):
+                return await client.acall(messages, tools=tools, callbacks=callbacks,
+                                          available_functions=available_functions, from_task=from_task,
+                                          from_agent=from_agent, response_model=response_model)
+        finally:
+            self._pool.release(ticket, self._record(client, from_task))
+
+    # Capabilities are those of the underlying model, whichever key serves the call
+    def supports_function_calling(self) -> bool:
+        check = getattr(self._client(0), 'supports_function_calling', None)
+        return bool(check()) if callable(check) else False
+
+    def supports_stop_words(self) -> bool:
+        return self._client(0).supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self._client(0).get_context_window_size()
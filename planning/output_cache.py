@@ -0,0 +1,116 @@
+"""
+Disk-backed cache of specialist task outputs.
+Entries are keyed on the task's normalized input key (see planning.inputs),
+expire after a per-task TTL and are evicted least-recently-used first once
+the cache holds more than `max_entries` outputs.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Optional
+
+from crewai.tasks.task_output import TaskOutput
+
+DEFAULT_CACHE_DIR = os.getenv("TRAVEL_AGENT_CACHE_DIR", ".cache")
+DEFAULT_MAX_ENTRIES = int(os.getenv("TRAVEL_AGENT_CACHE_MAX_ENTRIES", "2000"))
+DEFAULT_TTL = 24 * 3600
+
+
+class TaskOutputCache:
+    """SQLite store of TaskOutputs with per-task TTLs, LRU eviction and hit/miss counters."""
+
+    def __init__(self, path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "task_outputs.sqlite")
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_outputs ("
+                " key TEXT PRIMARY KEY, task TEXT, payload TEXT,"
+                " expires_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON task_outputs(last_access)")
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    def get(self, key: Hashable) -> Optional[TaskOutput]:
+        """Cached output for key, or None if missing or expired."""
+        task_name = key[0]
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM task_outputs WHERE key = ?", (self._key(key),)
+            ).fetchone()
+            if row and row[1] < now:
+                self._conn.execute("DELETE FROM task_outputs WHERE key = ?", (self._key(key),))
+                row = None
+            if not row:
+                self.misses[task_name] += 1
+                return None
+            self._conn.execute("UPDATE task_outputs SET last_access = ? WHERE key = ?", (now, self._key(key)))
+            self.hits[task_name] += 1
+
+        return TaskOutput(**json.loads(row[0]))
+
+    def put(self, key: Hashable, output: Any):
+        """Store a task output under key with its task's TTL, evicting the least recently used."""
+        task_name = key[0]
+        ttl = self.ttls.get(task_name, self.default_ttl)
+        if ttl <= 0 or not getattr(output, 'raw', None):
+            return
+        payload = json.dumps({
+            'description': output.description,
+            'name': output.name,
+            'expected_output': output.expected_output,
+            'summary': output.summary,
+            'raw': output.raw,
+            'agent': output.agent,
+        })
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO task_outputs (key, task, payload, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (self._key(key), task_name, payload, now + ttl, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM task_outputs").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM task_outputs WHERE key IN"
+                    " (SELECT key FROM task_outputs ORDER BY last_access LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM task_outputs")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per task plus totals."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM task_outputs").fetchone()[0]
+        return {
+            'hits': sum(self.hits.values()),
+            'misses': sum(self.misses.values()),
+            'evictions': self.evictions,
+            'entries': entries,
+            'per_task': {
+                name: {'hits': self.hits[name], 'misses': self.misses[name]}
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
@@ -0,0 +1,430 @@
+"""
+Dependency-aware scheduler for the travel agent task graph.
+Runs every task whose context dependencies are satisfied in parallel,
+bounded by a configurable concurrency cap, and fans in to dependent tasks
+(e.g. the report compiler) once their upstream tasks have settled.
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from crewai import Crew, Process, Task
+
+from tools.deadline import Deadline, DeadlineExceeded, deadline_scope
+from tools.ranking import trip_scope
+
+from .batch import SharedTaskOutputs
+from .events import TaskCompletedEvent
+from .output_cache import TaskOutputCache
+from .context import ContextCompactor
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("TRAVEL_AGENT_MAX_CONCURRENCY", "5"))
+
+
+def _usage_snapshot(llm: Any) -> Dict[str, int]:
+    """Cumulative token counters of an LLM client, if it reports any."""
+    summary = getattr(llm, 'get_token_usage_summary', None)
+    if not callable(summary):
+        return {}
+    try:
+        usage = summary()
+    except Exception:
+        return {}
+    usage = usage.model_dump() if hasattr(usage, 'model_dump') else dict(usage)
+    return {k: v for k, v in usage.items() if isinstance(v, int)}
+
+
+def _usage_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {k: v - before.get(k, 0) for k, v in after.items()}
+
+
+class TaskUsageMeter:
+    """
+    Token usage of single task runs, read from the task agent's LLM.
+    An LLM with task_usage() (PooledLLM) counts the calls made for each task.
+    Any other client only has cumulative counters, shared by every agent using
+    it, so the difference is reported only for a run that no other run on the
+    same client overlapped. Overlapping runs get no per-task usage; their tokens
+    are still in the client's own totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[int, List[int]] = {}  # id(llm) -> [runs in progress, runs started]
+
+    def start(self, task: Task) -> Tuple[Any, Optional[int], Dict[str, int]]:
+        """(llm, sequence number of a run alone on its client or 0, counters before the run)."""
+        llm = getattr(task.agent, 'llm', None)
+        if callable(getattr(llm, 'task_usage', None)):
+            return llm, None, llm.task_usage(task)
+        with self._lock:
+            runs = self._runs.setdefault(id(llm), [0, 0])
+            runs[0] += 1
+            runs[1] += 1
+            sequence = runs[1] if runs[0] == 1 else 0
+        return llm, sequence, _usage_snapshot(llm)
+
+    def stop(self, task: Task, run: Tuple[Any, Optional[int], Dict[str, int]]) -> Dict[str, int]:
+        """The task's token usage since start(), or {} if it cannot be told apart from other runs."""
+        llm, sequence, before = run
+        if sequence is None:
+            return _usage_delta(before, llm.task_usage(task))
+        after = _usage_snapshot(llm)
+        with self._lock:
+            runs = self._runs[id(llm)]
+            runs[0] -= 1
+            alone = sequence != 0 and runs[1] == sequence
+        return _usage_delta(before, after) if alone else {}
+
+
+class GraphRunResult:
+    """Outcome of a scheduled run, shaped like a CrewOutput for aggregate_results."""
+
+    def __init__(self):
+        self.tasks_output: List[Any] = []
+        self.errors: Dict[str, Exception] = {}
+        self.durations: Dict[str, float] = {}
+        self.token_usage: Dict[str, Dict[str, int]] = {}
+        self.outputs: Dict[str, Any] = {}
+        self.inputs: Dict[str, Any] = {}
+        self.reused: List[str] = []
+        self.cached: List[str] = []
+        self.retained: List[str] = []
+        self.context_tokens: Dict[str, Dict[str, int]] = {}
+        self.deadline: Optional[Deadline] = None
+        self.timed_out: List[str] = []
+
+    @property
+    def raw(self) -> str:
+        """Raw output of the last task that produced one."""
+        for task_output in reversed(self.tasks_output):
+            if task_output.raw:
+                return task_output.raw
+        return ""
+
+    @property
+    def context_tokens_saved(self) -> int:
+        """Prompt tokens removed from upstream context by compaction in this run."""
+        return sum(t['before'] - t['after'] for t in self.context_tokens.values())
+
+
+class CompactContextCrew(Crew):
+    """One-task Crew that hands its task a precomputed context instead of the raw upstream outputs."""
+    compacted_context: str = ""
+
+    def _get_context(self, task: Task, task_outputs: List[Any]) -> str:
+        return self.compacted_context
+
+
+class TaskGraphScheduler:
+    """
+    Executes crewAI tasks as a DAG derived from each task's `context` list.
+    Tasks are matched by identity, so the context lists must reference the
+    same Task instances that are handed to the scheduler.
+
+    Tasks listed in `share_keys` (task name -> input key) are looked up in
+    `cache` before running and stored there afterwards. When `shared` is given
+    they also run at most once per key across every scheduler using that registry.
+    Tasks named in `retained` are not run at all; the given output (usually
+    from a previous run of the same plan) is attached instead. Tasks named in
+    `local_tasks` are completed by calling the given function with the task
+    once its dependencies have settled, without an LLM run. With a `compactor`,
+    tasks that consume upstream context get a compacted version of it.
+
+    With a `deadline`, every task runs inside its scope (tools.deadline), tasks
+    that would start after it are failed with DeadlineExceeded, and tasks still
+    running when it passes are abandoned so dependents settle with what finished.
+    """
+
+    def __init__(self, tasks: List[Task], max_concurrency: Optional[int] = None, verbose: bool = True,
+                 shared: Optional[SharedTaskOutputs] = None, share_keys: Optional[Dict[str, Hashable]] = None,
+                 cache: Optional[TaskOutputCache] = None, retained: Optional[Dict[str, Any]] = None,
+                 local_tasks: Optional[Dict[str, Callable[[Task], Any]]] = None,
+                 compactor: Optional[ContextCompactor] = None, deadline: Optional[Deadline] = None):
+        self.tasks = [t for t in tasks if t is not None]
+        self.max_concurrency = max(1, max_concurrency or DEFAULT_MAX_CONCURRENCY)
+        self.verbose = verbose
+        self.shared = shared
+        self.share_keys = share_keys or {}
+        self.cache = cache
+        self.retained = retained or {}
+        self.local_tasks = local_tasks or {}
+        self.compactor = compactor
+        self.deadline = deadline
+        self._context_tokens: Dict[str, Dict[str, int]] = {}
+        self._usage = TaskUsageMeter()
+        self.result: Optional[GraphRunResult] = None
+
+        # Dependencies limited to tasks that are part of this graph
+        in_graph = {id(t) for t in self.tasks}
+        self.dependencies: Dict[int, List[int]] = {}
+        for t in self.tasks:
+            context = t.context if isinstance(t.context, list) else []
+            self.dependencies[id(t)] = [id(c) for c in context if id(c) in in_graph]
+
+    def _task_name(self, task: Task) -> str:
+        return task.name or task.description[:40]
+
+    def _compacted_context(self, task: Task) -> Optional[str]:
+        """Compacted upstream context for the task, or None to let crewAI pass it through unchanged."""
+        context = task.context if isinstance(task.context, list) else []
+        outputs = [c.output for c in context if getattr(c, 'output', None) is not None]
+        if self.compactor is None or not outputs:
+            return None
+        text, before, after = self.compactor.compact(outputs)
+        self._context_tokens[self._task_name(task)] = {'before': before, 'after': after}
+        return text
+
+    def _single_task_crew(self, task: Task) -> Crew:
+        """A one-task Crew, so inputs and tools are prepared exactly as in a normal kickoff."""
+        settings = dict(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=self.verbose)
+        context = self._compacted_context(task)
+        if context is None:
+            return Crew(**settings)
+        return CompactContextCrew(compacted_context=context, **settings)
+
+    def _kickoff_task(self, task: Task, inputs: Dict[str, Any]):
+        return self._single_task_crew(task).kickoff(inputs=inputs).tasks_output[0]
+
+    async def _kickoff_task_async(self, task: Task, inputs: Dict[str, Any]):
+        crew = self._single_task_crew(task)
+        # Prefer crewAI's native async kickoff; older releases only offer the threaded one
+        run = getattr(crew, 'akickoff', None) or crew.kickoff_async
+        output = await run(inputs=inputs)
+        return output.tasks_output[0]
+
+    def _reuse(self, task: Task, output) -> None:
+        """Attach an output produced elsewhere, since downstream context is read from task.output."""
+        task.output = output
+        if task.callback:
+            try:
+                task.callback(output)
+            except Exception as e:
+                print(f"Callback for {self._task_name(task)} failed: {str(e)}")
+
+    def _preloaded(self, task: Task, key: Optional[Hashable]):
+        """(output, source) for a retained, local or cached output, or None if the task has to run."""
+        if task.name in self.retained:
+            output = self.retained[task.name]
+            self._reuse(task, output)
+            return output, 'retained'
+        if task.name in self.local_tasks:
+            output = self.local_tasks[task.name](task)
+            self._reuse(task, output)
+            return output, 'local'
+        if self.cache is None or key is None:
+            return None
+        output = self.cache.get(key)
+        if output is None:
+            return None
+        self._reuse(task, output)
+        return output, 'cache'
+
+    def _store(self, key: Optional[Hashable], output) -> None:
+        if self.cache is not None and key is not None:
+            self.cache.put(key, output)
+
+    def _check_deadline(self, task: Task) -> None:
+        if self.deadline is not None:
+            self.deadline.check(f"Task {self._task_name(task)}")
+
+    def _execute(self, task: Task, inputs: Dict[str, Any]):
+        """Run, share or load a task's output, returning (output, seconds, token usage, source)."""
+        with deadline_scope(self.deadline), trip_scope(inputs):
+            return self._execute_in_scope(task, inputs)
+
+    def _execute_in_scope(self, task: Task, inputs: Dict[str, Any]):
+        started = time.perf_counter()
+        key = self.share_keys.get(task.name)
+        found = self._preloaded(task, key)
+        if found is not None:
+            return found[0], time.perf_counter() - started, {}, found[1]
+
+        self._check_deadline(task)
+
+        run = self._usage.start(task)
+        try:
+            if self.shared is not None and key is not None:
+                def compute():
+                    computed = self._kickoff_task(task, inputs)
+                    self._store(key, computed)
+                    return computed
+                output, reused = self.shared.get_or_compute(key, compute)
+                if reused:
+                    self._reuse(task, output)
+                    return output, time.perf_counter() - started, {}, 'shared'
+            else:
+                output = self._kickoff_task(task, inputs)
+                self._store(key, output)
+        finally:
+            usage = self._usage.stop(task, run)
+        return output, time.perf_counter() - started, usage, 'run'
+
+    async def _execute_async(self, task: Task, inputs: Dict[str, Any]):
+        # Each asyncio task has its own context, so the scope stays with this task
+        with deadline_scope(self.deadline), trip_scope(inputs):
+            return await self._execute_async_in_scope(task, inputs)
+
+    async def _execute_async_in_scope(self, task: Task, inputs: Dict[str, Any]):
+        started = time.perf_counter()
+        key = self.share_keys.get(task.name)
+        found = self._preloaded(task, key)
+        if found is not None:
+            return found[0], time.perf_counter() - started, {}, found[1]
+
+        self._check_deadline(task)
+
+        run = self._usage.start(task)
+        try:
+            output = await self._kickoff_task_async(task, inputs)
+            self._store(key, output)
+        finally:
+            usage = self._usage.stop(task, run)
+        return output, time.perf_counter() - started, usage, 'run'
+
+    def _ready(self, pending: Dict[int, Task], settled: set, running: int) -> List[Task]:
+        """Pending tasks whose dependencies have all settled, up to the free concurrency slots."""
+        ready = [t for tid, t in pending.items() if all(d in settled for d in self.dependencies[tid])]
+        ready = ready[:max(0, self.max_concurrency - running)]
+        for t in ready:
+            del pending[id(t)]
+        return ready
+
+    def _settle(self, result: GraphRunResult, outputs: Dict[int, Any], task: Task, outcome) -> TaskCompletedEvent:
+        """Record a finished task (outcome is a completed future) and describe it as an event."""
+        name = self._task_name(task)
+        try:
+            output, duration, usage, source = outcome.result()
+        except Exception as e:
+            # Downstream tasks still run with whatever context is available
+            print(f"Task {name} failed: {str(e)}")
+            result.errors[name] = e
+            if isinstance(e, DeadlineExceeded):
+                result.timed_out.append(name)
+            return TaskCompletedEvent(name=name, raw="", duration=0.0, error=str(e))
+
+        outputs[id(task)] = output
+        result.outputs[name] = output
+        if name in self._context_tokens:
+            result.context_tokens[name] = self._context_tokens.pop(name)
+        result.durations[name] = duration
+        result.token_usage[name] = usage
+        if source == 'shared':
+            result.reused.append(name)
+        elif source == 'cache':
+            result.cached.append(name)
+        elif source == 'retained':
+            result.retained.append(name)
+        return TaskCompletedEvent(name=name, raw=output.raw, duration=duration, token_usage=usage, source=source)
+
+    def _started(self, future, late: set) -> None:
+        # Tasks started after the deadline fail fast or complete locally, so they are waited for
+        if self.deadline is not None and self.deadline.expired:
+            late.add(future)
+
+    def _wait_timeout(self, running: Dict[Any, Task], late: set) -> Optional[float]:
+        if self.deadline is None or all(f in late for f in running):
+            return None
+        return self.deadline.remaining()
+
+    def _abandon(self, result: GraphRunResult, task: Task) -> TaskCompletedEvent:
+        """Give up on a task still running at the deadline; its dependents run without it."""
+        name = self._task_name(task)
+        error = DeadlineExceeded(f"Task {name} did not finish within the {self.deadline.seconds:g}s planning budget")
+        print(str(error))
+        result.errors[name] = error
+        result.timed_out.append(name)
+        return TaskCompletedEvent(name=name, raw="", duration=0.0, error=str(error))
+
+    def run(self, inputs: Dict[str, Any]) -> GraphRunResult:
+        """Run the whole graph and return the collected task outputs in declaration order."""
+        result = self.result = GraphRunResult()
+        result.inputs = dict(inputs)
+        result.deadline = self.deadline
+        settled = set()
+        outputs: Dict[int, Any] = {}
+        pending = {id(t): t for t in self.tasks}
+
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="travel-task")
+        abandoned = False
+        try:
+            running, late = {}, set()
+            while pending or running:
+                for t in self._ready(pending, settled, len(running)):
+                    future = pool.submit(self._execute, t, inputs)
+                    running[future] = t
+                    self._started(future, late)
+
+                if not running:
+                    raise ValueError("Task graph contains a dependency cycle.")
+
+                done, _ = wait(running, timeout=self._wait_timeout(running, late), return_when=FIRST_COMPLETED)
+                if not done:
+                    # Deadline passed: settle the stragglers as failed and move on without them
+                    abandoned = True
+                    for future, t in list(running.items()):
+                        if future not in late:
+                            del running[future]
+                            self._abandon(result, t)
+                            settled.add(id(t))
+                for future in done:
+                    t = running.pop(future)
+                    self._settle(result, outputs, t, future)
+                    settled.add(id(t))
+        finally:
+            # Abandoned tasks can't be interrupted; let them finish in the background
+            pool.shutdown(wait=not abandoned)
+
+        result.tasks_output = [outputs[id(t)] for t in self.tasks if id(t) in outputs]
+        if result.context_tokens:
+            print(f"Context compaction saved {result.context_tokens_saved} prompt tokens")
+        return result
+
+    async def run_async(self, inputs: Dict[str, Any]) -> AsyncIterator[TaskCompletedEvent]:
+        """
+        Run the whole graph on the current event loop, yielding an event as each task settles.
+        The collected outputs are available on `self.result` once iteration finishes.
+        """
+        result = self.result = GraphRunResult()
+        result.inputs = dict(inputs)
+        result.deadline = self.deadline
+        settled = set()
+        outputs: Dict[int, Any] = {}
+        pending = {id(t): t for t in self.tasks}
+        running, late = {}, set()
+
+        try:
+            while pending or running:
+                for t in self._ready(pending, settled, len(running)):
+                    future = asyncio.ensure_future(self._execute_async(t, inputs))
+                    running[future] = t
+                    self._started(future, late)
+
+                if not running:
+                    raise ValueError("Task graph contains a dependency cycle.")
+
+                done, _ = await asyncio.wait(running, timeout=self._wait_timeout(running, late),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    for future, t in list(running.items()):
+                        if future not in late:
+                            del running[future]
+                            future.cancel()
+                            settled.add(id(t))
+                            yield self._abandon(result, t)
+                for future in done:
+                    t = running.pop(future)
+                    event = self._settle(result, outputs, t, future)
+                    settled.add(id(t))
+                    yield event
+        finally:
+            # The consumer stopped early; don't leave tasks running in the background
+            for future in running:
+                future.cancel()
+
+        result.tasks_output = [outputs[id(t)] for t in self.tasks if id(t) in outputs]
+        if result.context_tokens:
+            print(f"Context compaction saved {result.context_tokens_saved} prompt tokens")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Tests for background report scoring (evaluation.background).
+A stub evaluation.runner stands in for the NLTK/ROUGE scorer and waits
+until the test releases it.
+"""
+import asyncio
+import json
+import sys
+import threading
+import types
+
+import pytest
+
+from evaluation import submit_evaluation, wait_for_evaluations
+
+
+class StubRunner:
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def evaluate_now(self, summary_path, ref_dir, meta, refs):
+        self.release.wait(5)
+        self.calls.append({'refs': refs, 'meta': meta})
+        if meta.get('fail'):
+            raise RuntimeError("scorer broke")
+        eval_json = summary_path.with_name(summary_path.stem + "_eval.json")
+        eval_json.write_text(json.dumps({'refs': len(refs)}), encoding="utf-8")
+        return eval_json
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    stub = StubRunner()
+    module = types.ModuleType('evaluation.runner')
+    module.evaluate_now = stub.evaluate_now
+    monkeypatch.setitem(sys.modules, 'evaluation.runner', module)
+    yield stub
+    stub.release.set()
+    wait_for_evaluations(5)
+
+
+@pytest.fixture
+def report(tmp_path):
+    refs = tmp_path / 'raw'
+    refs.mkdir()
+    (refs / 'weather.txt').write_text("Sunny in Paris", encoding="utf-8")
+    (refs / 'dining.txt').write_text("Bistros", encoding="utf-8")
+    summary = tmp_path / 'paris.md'
+    summary.write_text("# Paris", encoding="utf-8")
+    return summary, refs
+
+
+def test_submit_returns_before_scoring_and_keeps_the_refs_it_was_given(runner, report):
+    summary, refs = report
+    handle = submit_evaluation(summary, refs, meta={'destination': 'Paris'})
+    # The next plan overwrites the raw dumps before the job runs
+    (refs / 'weather.txt').write_text("Rain in Rome", encoding="utf-8")
+
+    assert not handle.done()
+    assert wait_for_evaluations(timeout=0.05) is False
+    runner.release.set()
+
+    assert handle.result(5) == handle.eval_path == summary.with_name("paris_eval.json")
+    assert wait_for_evaluations(timeout=5) is True
+    assert runner.calls == [{'refs': ["Bistros", "Sunny in Paris"], 'meta': {'destination': 'Paris'}}]
+
+
+def test_wait_for_evaluations_covers_every_pending_report(runner, report, tmp_path):
+    summary, refs = report
+    handles = [submit_evaluation(summary.with_name(f"trip{i}.md"), refs) for i in range(3)]
+
+    runner.release.set()
+
+    assert wait_for_evaluations(timeout=5) is True
+    assert all(h.done() for h in handles)
+    assert sorted(p.name for p in tmp_path.glob("*_eval.json")) == ["trip0_eval.json", "trip1_eval.json",
+                                                                     "trip2_eval.json"]
+
+
+def test_a_scoring_error_is_reported_on_the_handle(runner, report, capsys):
+    summary, refs = report
+    handle = submit_evaluation(summary, refs, meta={'fail': True})
+    runner.release.set()
+
+    with pytest.raises(RuntimeError, match="scorer broke"):
+        handle.result(5)
+    assert wait_for_evaluations(timeout=5) is True
+    assert "Evaluation skipped due to an error: scorer broke" in capsys.readouterr().out
+
+
+def test_a_handle_can_be_awaited(runner, report):
+    summary, refs = report
+    runner.release.set()
+
+    async def score():
+        return await submit_evaluation(summary, refs)
+
+    assert asyncio.run(score()) == summary.with_name("paris_eval.json")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Tests for the local Yelp business store (tools.business_store), driven through
+the Yelp tools against the local API stand-ins.
+"""
+import pytest
+
+from tools.business_store import BusinessStore, category_of, set_business_store
+from tools.mock_apis import MockAPIServer
+from tools.response_cache import set_response_cache
+from tools.yelp_tools import LocalFoodSpecialtiesTool, YelpRestaurantSearchTool
+
+NO_LATENCY = {'latency': {'dist': 'fixed', 'value': 0}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TRAVEL_AGENT_RESPONSE_CACHE', 'off')
+    set_response_cache(None)
+    store = BusinessStore(":memory:", clock=FakeClock())
+    set_business_store(store)
+    yield store
+    set_business_store(None)
+
+
+def test_repeat_and_longer_searches_reuse_stored_businesses(store):
+    with MockAPIServer(defaults=NO_LATENCY) as server:
+        yelp = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)
+        first = yelp._run("limit 3 tapas restaurants in Madrid")
+        again = yelp._run("limit 3 tapas restaurants in Madrid")
+        more = yelp._run("limit 5 tapas restaurants in Madrid")
+
+        assert again == first
+        assert more.count("Rating:") == 5 and more.split("\n", 1)[1].startswith(first.split("\n", 1)[1].rstrip())
+        # The repeat never left the process; the longer search only fetched the 2 missing businesses
+        assert server.stats() == {'yelp': {200: 2}}
+        assert store.stats() == {'businesses': 5, 'misses': 1, 'hits': 1, 'partial_hits': 1}
+
+
+def test_bare_category_search_is_answered_from_the_category_index(store):
+    with MockAPIServer(defaults=NO_LATENCY) as server:
+        LocalFoodSpecialtiesTool(api_key='test', base_url=server.base_url)._run("local food in Tokyo")
+        calls = server.stats()['yelp'][200]
+        held = store.by_category("tokyo", "ramen", 50)
+
+        result = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)._run(
+            f"limit {len(held)} ramen restaurants in Tokyo")
+
+        assert held and all("Ramen" in b.categories for b in held)
+        assert [b.rating for b in held] == sorted((b.rating for b in held), reverse=True)
+        assert server.stats()['yelp'][200] == calls
+        assert store.stats()['category_hits'] == 1
+        assert result.count("Rating:") == len(held)
+
+
+def test_stale_businesses_are_fetched_again(store):
+    assert category_of("Italian restaurants in Paris", "paris") == "italian"
+    with MockAPIServer(defaults=NO_LATENCY) as server:
+        yelp = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)
+        yelp._run("limit 2 sushi in Paris")
+        store.clock.now += store.ttl + 1
+        yelp._run("limit 2 sushi in Paris")
+
+        assert server.stats() == {'yelp': {200: 2}}
+        assert store.stats()['misses'] == 2
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Tests for recording and replaying the tools' upstream traffic (tools.cassette).
+"""
+import gzip
+
+import pytest
+
+from tools.cassette import Cassette, CassetteMiss, set_cassette
+from tools.http_client import http_get_json
+from tools.mock_apis import MockAPIServer
+from tools.response_cache import cached_call
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    yield str(tmp_path / 'tools.jsonl.gz')
+    set_cassette(None)
+
+
+def test_recorded_responses_replay_offline(cassette_path):
+    set_cassette(Cassette(cassette_path, 'record'))
+    cached_call('yelp', {'term': 'Tapas', 'location': 'Madrid', 'apiKey': 'secret'}, lambda: {'businesses': [1]})
+    cached_call('yelp', {'term': 'tapas', 'location': 'madrid'}, lambda: {'businesses': [1, 2]})
+    cached_call('openweathermap', {'location': 'Madrid'}, lambda: "Sunny, 25°C")
+
+    with open(cassette_path, 'rb') as file:
+        assert b'secret' not in file.read()
+
+    def offline():
+        raise AssertionError("replay must not reach the upstream")
+
+    sleeps = []
+    set_cassette(Cassette(cassette_path, 'replay', latency=0.25, sleep=sleeps.append))
+    assert cached_call('yelp', {'location': 'Madrid', 'term': 'tapas'}, offline) == {'businesses': [1]}
+    assert cached_call('yelp', {'location': 'Madrid', 'term': 'tapas'}, offline) == {'businesses': [1, 2]}
+    assert cached_call('yelp', {'location': 'Madrid', 'term': 'tapas'}, offline) == {'businesses': [1, 2]}
+    assert cached_call('openweathermap', {'location': 'madrid'}, offline) == "Sunny, 25°C"
+    assert sleeps == [0.25] * 4
+
+    with pytest.raises(CassetteMiss):
+        cached_call('geoapify', {'lat': 40.4}, offline)
+
+
+def test_recorded_weather_requests_hold_no_api_key(cassette_path):
+    set_cassette(Cassette(cassette_path, 'record'))
+    with MockAPIServer(defaults={'latency': {'dist': 'fixed', 'value': 0}}) as server:
+        # The parameters WeatherForecastTool sends on its REST path
+        http_get_json(f"{server.base_url}/data/2.5/weather",
+                      params={'q': 'Paris', 'appid': 'OWM-Secret-Key', 'units': 'metric'}, provider="openweathermap")
+
+    with gzip.open(cassette_path, 'rt', encoding='utf-8') as file:
+        recorded = file.read()
+    assert '"paris"' in recorded
+    assert 'owm-secret-key' not in recorded.lower() and 'appid' not in recorded
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Tests for the per-provider circuit breakers (tools.circuit_breaker).
+A fake clock decides when the open period is over; upstreams raise HTTP-like errors.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from tools.circuit_breaker import CircuitBreaker, CircuitOpenError
+from tools.rate_limit import RateLimiter
+from tools.response_cache import MemoryResponseStore, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status, headers={})
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+        self.status = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.status:
+            raise ApiError(self.status)
+        return {'version': self.calls}
+
+
+def make_breaker(clock):
+    return CircuitBreaker('yelp', failure_rate=0.5, min_calls=4, window=10, open_seconds=30, clock=clock)
+
+
+def test_opens_on_failure_rate_and_fails_fast():
+    breaker, upstream = make_breaker(FakeClock()), Upstream()
+    breaker.call(upstream)
+    breaker.call(upstream)
+
+    upstream.status = 404
+    with pytest.raises(ApiError):
+        breaker.call(upstream)
+    assert breaker.stats()['state'] == 'closed'
+
+    upstream.status = 503
+    for _ in range(2):
+        with pytest.raises(ApiError):
+            breaker.call(upstream)
+    assert breaker.stats()['state'] == 'open'
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(upstream)
+    assert upstream.calls == 5
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_half_open_probe_runs_in_the_background():
+    clock, upstream = FakeClock(), Upstream()
+    breaker = make_breaker(clock)
+    upstream.status = 500
+    for _ in range(4):
+        with pytest.raises(ApiError):
+            breaker.call(upstream)
+
+    clock.now += 31
+    with pytest.raises(CircuitOpenError):
+        breaker.call(upstream)
+    breaker.wait_for_probe()
+    assert breaker.stats()['state'] == 'open' and breaker.stats()['times_opened'] == 2
+
+    upstream.status = None
+    clock.now += 31
+    with pytest.raises(CircuitOpenError):
+        breaker.call(upstream)
+    breaker.wait_for_probe()
+    assert breaker.stats()['state'] == 'closed'
+    assert breaker.call(upstream) == {'version': upstream.calls}
+
+
+def test_expired_cache_entry_answers_while_open():
+    clock, upstream = FakeClock(), Upstream()
+    breaker = make_breaker(clock)
+    cache = ResponseCache(MemoryResponseStore(), ttls={'yelp': 60}, stale_ttls={'yelp': 0}, clock=clock)
+
+    def load():
+        return breaker.call(upstream)
+
+    assert cache.fetch('yelp', {'term': 'ramen'}, load) == {'version': 1}
+    upstream.status = 503
+    for _ in range(3):
+        with pytest.raises(ApiError):
+            breaker.call(upstream)
+    assert breaker.stats()['state'] == 'open'
+
+    clock.now += 120
+    assert cache.fetch('yelp', {'term': 'ramen'}, load) == {'version': 1}
+    assert cache.stats()['per_provider']['yelp']['breaker_fallbacks'] == 1
+    with pytest.raises(CircuitOpenError):
+        cache.fetch('yelp', {'term': 'sushi'}, load)
+
+
+def test_opens_after_min_calls_attempts_not_min_calls_retried_calls(tmp_path):
+    clock, upstream = FakeClock(), Upstream()
+    breaker = make_breaker(clock)
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    quotas = {'defaults': {'rate': 0, 'burst': 1, 'max_attempts': 3, 'max_wait': 2}, 'providers': {}}
+    limiter = RateLimiter(quotas, path=str(tmp_path / 'rate_limits.sqlite'), clock=clock, sleep=sleep)
+    upstream.status = 503
+    started, outcomes = clock.now, []
+    while breaker.stats()['state'] == 'closed':
+        with pytest.raises((ApiError, CircuitOpenError)) as failure:
+            limiter.call('yelp', upstream, guard=breaker.call)
+        outcomes.append(failure.type.__name__)
+
+    # Open after min_calls=4 failed attempts: the second call's next retry fails fast
+    assert upstream.calls == 4 and outcomes == ['ApiError', 'CircuitOpenError']
+    assert clock.now - started <= 3 * 2
+    with pytest.raises(CircuitOpenError):
+        limiter.call('yelp', upstream, guard=breaker.call)
+    assert upstream.calls == 4
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Tests for the context compaction applied to the report tasks (planning.context).
+"""
+from types import SimpleNamespace
+
+from planning.context import ContextCompactor, format_inputs
+from planning.llm_pool import estimate_tokens
+
+TRANSPORT = """## Getting There
+**Important Note:** Unable to retrieve public transportation data for Paris (48.85, 2.35). This could be due to API limitations.
+
+- Local transit authority websites
+
+I apologize for not being able to provide specific route details at this time.
+- **Direct flights** from JFK take about 7 hours."""
+
+LOCAL = """## Attractions
+- **Louvre Museum**: The world's largest art museum.
+- **Eiffel Tower**: Iconic iron tower."""
+
+DINING = """## Where to Eat
+- **Louvre Museum**: Café Marly overlooks the pyramid.
+- **Le Comptoir du Relais**: Classic bistro."""
+
+
+def outputs(*raws):
+    return [SimpleNamespace(raw=raw) for raw in raws]
+
+
+def test_boilerplate_and_repeated_places_are_dropped():
+    text, before, after = ContextCompactor(budget=0).compact(outputs(TRANSPORT, LOCAL, DINING))
+
+    assert "Unable to retrieve" not in text and "I apologize" not in text
+    assert "Direct flights" in text
+    assert text.count("Louvre Museum") == 1
+    assert "Le Comptoir du Relais" in text
+    assert after < before
+
+
+def test_trimming_keeps_headings_and_section_openings_within_budget():
+    long_section = "## Day by Day\n" + "\n".join(f"- Day {i}: " + "museum visit and a long walk " * 5 for i in range(40))
+    text, _, after = ContextCompactor(budget=300).compact(outputs(long_section, LOCAL))
+
+    assert after <= 300
+    assert "## Day by Day" in text and "- Day 0:" in text and "- Day 39:" not in text
+    assert "**Eiffel Tower**" in text
+
+
+def test_format_inputs_skips_empty_fields():
+    rendered = format_inputs({'destination': 'Paris', 'interests': ['Art', 'Food'], 'budget': ''})
+
+    assert rendered == "destination: Paris; interests: Art, Food"
+    assert estimate_tokens(rendered) < estimate_tokens(str({'destination': 'Paris', 'interests': ['Art', 'Food']}))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Tests for the Geoapify geohash tile cache (tools.geo_tiles).
+"""
+import random
+import re
+
+import pytest
+
+from tools import geo_tiles
+from tools.geo_tiles import TileCache, covering_tiles, geohash, haversine, set_tile_cache, tile_box
+from tools.geoapify_tools import GeoapifyPOITool
+from tools.mock_apis import MockAPIServer
+from tools.records import POI
+from tools.response_cache import set_response_cache
+
+PARIS = (48.8566, 2.3522)
+
+
+def test_tiles_cover_the_circle():
+    assert geohash(*PARIS, 6) == "u09tvw"
+    south, west, north, east = tile_box("u09tvw")
+    assert south <= PARIS[0] <= north and west <= PARIS[1] <= east
+
+    rng = random.Random(25)
+    for radius in (300, 1000, 5000, 20000):
+        tiles = covering_tiles(*PARIS, radius)
+        assert 1 <= len(tiles) <= 30 and len({len(t) for t in tiles}) == 1
+        for _ in range(200):
+            lat = PARIS[0] + rng.uniform(-1, 1) * radius / 111320
+            lon = PARIS[1] + rng.uniform(-1, 1) * radius / 73000
+            if haversine(*PARIS, lat, lon) <= radius:
+                assert geohash(lat, lon, len(tiles[0])) in tiles
+
+
+def poi(i, lat, lon):
+    return POI(place_id=f"p{i}", name=f"Place {i}", address="", distance=None, categories=(),
+               latitude=lat, longitude=lon)
+
+
+def test_tiles_expire_and_the_least_recently_used_is_dropped():
+    now = [0.0]
+    cache = TileCache(max_tiles=2, ttl=60, clock=lambda: now[0])
+    cache.put("tourism", "a", [poi(1, 0, 0)])
+    cache.put("tourism", "b", [])
+    cache.get("tourism", "a")
+    cache.put("tourism", "c", [])
+
+    assert cache.get("tourism", "b") is None
+    assert cache.get("tourism", "a") == (poi(1, 0, 0),)
+    now[0] = 61
+    assert cache.get("tourism", "a") is None
+
+
+@pytest.fixture
+def tiles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TRAVEL_AGENT_RESPONSE_CACHE', 'off')
+    monkeypatch.setenv('GEOAPIFY_API_KEY', 'test')
+    set_response_cache(None)
+    cache = TileCache()
+    set_tile_cache(cache)
+    yield cache
+    set_tile_cache(None)
+
+
+def places(text):
+    """(distance, name) of each place in a tool result."""
+    return sorted((int(d), name) for name, d in re.findall(r"Name: (.+)\n.*\n   Distance: ~(\d+)m", text))
+
+
+def circle_answer(server, tiles, *args, **kwargs):
+    """The tool's answer with plain circle queries."""
+    set_tile_cache(None)
+    try:
+        return GeoapifyPOITool(base_url=server.base_url)._run(*args, **kwargs)
+    finally:
+        set_tile_cache(tiles)
+
+
+def test_nearby_searches_are_answered_from_cached_tiles(tiles):
+    with MockAPIServer(defaults={'latency': {'dist': 'fixed', 'value': 0}}) as server:
+        geoapify = GeoapifyPOITool(base_url=server.base_url)
+        first = geoapify._run(['tourism.sights'], *PARIS, radius=2000, limit=10)
+        requests = server.stats()['geoapify'][200]
+        # 300 m away and inside the first circle: no new requests
+        second = geoapify._run(['tourism.sights'], PARIS[0] + 0.0027, PARIS[1], radius=1000, limit=10)
+
+        assert server.stats() == {'geoapify': {200: requests}}
+        # Tiles hold more than TILE_LIMIT places each, so they were paged
+        assert requests > tiles.stats()['tiles_fetched'] and tiles.stats()['tiles_held'] >= 1
+        # The same places as a plain circle query
+        assert len(places(first)) == 10
+        nearby = (PARIS[0] + 0.0027, PARIS[1])
+        assert places(first) == places(circle_answer(server, tiles, ['tourism.sights'], *PARIS, radius=2000, limit=10))
+        assert places(second) == places(circle_answer(server, tiles, ['tourism.sights'], *nearby, radius=1000, limit=10))
+        # Other categories have tiles of their own
+        before = server.stats()['geoapify'][200]
+        geoapify._run(['catering.restaurant'], *PARIS, radius=2000, limit=10)
+        assert server.stats()['geoapify'][200] > before
+
+
+def test_tiles_too_dense_to_load_fall_back_to_the_circle(tiles, monkeypatch):
+    monkeypatch.setattr(geo_tiles, 'GEOAPIFY_TILE_PAGES', 1)
+    with MockAPIServer(defaults={'latency': {'dist': 'fixed', 'value': 0}}) as server:
+        answer = GeoapifyPOITool(base_url=server.base_url)._run(['tourism.sights'], *PARIS, radius=2000, limit=10)
+
+        assert places(answer) == places(circle_answer(server, tiles, ['tourism.sights'], *PARIS, radius=2000, limit=10))
+        stats = tiles.stats()
+        assert stats['fallbacks'] == 1 and stats['dense_tiles'] >= 1
+        # The dense tiles are remembered: the same search again goes straight to the circle
+        requests = server.stats()['geoapify'][200]
+        assert GeoapifyPOITool(base_url=server.base_url)._run(['tourism.sights'], *PARIS, radius=2000, limit=10) == answer
+        assert server.stats()['geoapify'][200] == requests + 1
+        assert tiles.stats()['dense_tiles_held'] == 1 and tiles.stats()['tiles_fetched'] == stats['tiles_fetched']
+
+
+def test_the_first_dense_tile_stops_the_others_and_is_remembered_until_its_ttl(monkeypatch):
+    monkeypatch.setattr(geo_tiles, 'TILE_CONCURRENCY', 1)
+    now, calls = [0.0], []
+    cache = TileCache(ttl=60, clock=lambda: now[0])
+
+    def fetch(box, offset):
+        calls.append(box)
+        return [poi(len(calls) * 1000 + i, box[0], box[1]) for i in range(geo_tiles.TILE_LIMIT)]
+
+    assert len(covering_tiles(*PARIS, 5000)) > 10
+    assert cache.search(['tourism'], *PARIS, 5000, 10, fetch) is None
+    # The tile that came back full, and at most the one started meanwhile
+    assert 1 <= len(calls) <= 2 * geo_tiles.GEOAPIFY_TILE_PAGES
+    first = len(calls)
+    assert cache.search(['tourism'], *PARIS, 5000, 10, fetch) is None
+    assert len(calls) == first
+    now[0] = 61
+    assert cache.search(['tourism'], *PARIS, 5000, 10, fetch) is None
+    assert len(calls) > first
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Tests for the shared HTTP client (tools.http_client): connection reuse against
+the local API stand-in, per-host timeouts, and http_get() shortening timeouts
+to the kickoff's remaining budget.
+"""
+from types import SimpleNamespace
+
+import pytest
+import requests
+from urllib3.connectionpool import HTTPConnectionPool
+
+from tools import http_client
+from tools.deadline import Deadline, DeadlineExceeded, deadline_scope
+from tools.http_client import HttpClient, http_get
+from tools.mock_apis import MockAPIServer
+
+NO_LATENCY = {'latency': {'dist': 'fixed', 'value': 0}}
+YELP = {'headers': {'Authorization': 'Bearer test'}, 'params': {'location': 'Paris', 'limit': 3}}
+
+
+def test_requests_reuse_one_kept_alive_connection(monkeypatch):
+    opened = []
+    new_conn = HTTPConnectionPool._new_conn
+    monkeypatch.setattr(HTTPConnectionPool, '_new_conn', lambda pool: opened.append(pool.port) or new_conn(pool))
+    client = HttpClient(http2=False)
+    with MockAPIServer(defaults=NO_LATENCY) as server:
+        url = f"{server.base_url}/v3/businesses/search"
+        responses = [client.get(url, **YELP) for _ in range(5)]
+
+        assert all(r.status_code == 200 for r in responses)
+        assert len(opened) == 1
+        assert server.stats() == {'yelp': {200: 5}}
+    client.close()
+
+
+def test_none_params_are_not_sent():
+    client = HttpClient(http2=False)
+    with MockAPIServer(defaults=NO_LATENCY) as server:
+        response = client.get(f"{server.base_url}/v3/businesses/search",
+                              headers=YELP['headers'], params={'location': 'Paris', 'price': None})
+
+        assert 'price' not in response.url
+    client.close()
+
+
+def test_each_host_gets_its_own_default_timeout():
+    client = HttpClient(http2=False, timeouts={'127.0.0.1': 3}, default_timeout=7)
+
+    assert client.timeout_for("https://api.yelp.com/v3/businesses/search") == 10
+    assert client.timeout_for("http://127.0.0.1:8080/anything") == 3
+    assert client.timeout_for("https://example.org/") == 7
+    client.close()
+
+
+class RecordingClient:
+    """Stands in for the shared client and records the timeout of each GET."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.timeouts = []
+
+    def timeout_for(self, url):
+        return 10.0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.timeouts.append(timeout)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(status_code=200)
+
+
+@pytest.fixture
+def recording(monkeypatch):
+    def install(error=None):
+        client = RecordingClient(error)
+        monkeypatch.setattr(http_client, '_client', client)
+        return client
+    return install
+
+
+def test_timeouts_are_clipped_to_the_remaining_budget(recording):
+    client = recording()
+    http_get("https://api.yelp.com/v3/businesses/search")
+    with deadline_scope(Deadline(2)):
+        http_get("https://api.yelp.com/v3/businesses/search")
+    with deadline_scope(Deadline(60)):
+        http_get("https://api.yelp.com/v3/businesses/search")
+        http_get("https://api.yelp.com/v3/businesses/search", timeout=5)
+
+    unbounded, clipped, default, explicit = client.timeouts
+    assert unbounded is None
+    assert 1.5 < clipped <= 2
+    assert (default, explicit) == (10.0, 5)
+
+
+def test_a_timeout_cut_short_by_the_budget_is_a_deadline_error(recording):
+    recording(requests.exceptions.ReadTimeout("read timed out"))
+    with deadline_scope(Deadline(2)):
+        with pytest.raises(DeadlineExceeded, match="planning budget"):
+            http_get("https://api.yelp.com/v3/businesses/search")
+    # With time to spare, a slow provider is still the provider's timeout
+    with deadline_scope(Deadline(60)):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            http_get("https://api.yelp.com/v3/businesses/search")
+
+
+def test_no_request_goes_out_once_the_budget_is_spent(recording):
+    client = recording()
+    with deadline_scope(Deadline(0)):
+        with pytest.raises(DeadlineExceeded):
+            http_get("https://api.yelp.com/v3/businesses/search")
+
+    assert client.timeouts == []
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Tests for the Gemini key pool (planning.llm_pool).
+A fake clock drives the one-minute windows and a stub LLM stands in for Gemini.
+"""
+import threading
+from types import SimpleNamespace
+from typing import Optional
+
+from crewai.llms.base_llm import BaseLLM
+
+from planning.llm_pool import LLMKeyPool, PooledLLM
+from tools.deadline import Deadline, deadline_scope
+
+
+class StubLLM(BaseLLM):
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        self._token_usage['total_tokens'] += 100
+        return self.api_key
+
+
+class TimedStubLLM(StubLLM):
+    """Answers with the request timeout it was called with, like LLM(timeout=...) passes it on."""
+    timeout: Optional[float] = None
+
+    def call(self, messages, **kwargs):
+        super().call(messages, **kwargs)
+        return self.timeout
+
+
+class TaskStubLLM(StubLLM):
+    """Spends the calling task's tokens only once every task's call is in flight."""
+
+    def call(self, messages, from_task=None, **kwargs):
+        from_task.in_flight.wait(5)
+        self._token_usage['total_tokens'] += from_task.tokens
+        return from_task.name
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_llm(pool):
+    return PooledLLM(pool, lambda key: StubLLM(model='stub', api_key=key), model='stub', max_tokens=10)
+
+
+def test_calls_go_to_least_loaded_key():
+    pool = LLMKeyPool(['a', 'b', 'c'], rpm_limit=10, clock=FakeClock())
+    llm = make_llm(pool)
+
+    assert [llm.call("hello") for _ in range(6)] == ['a', 'b', 'c', 'a', 'b', 'c']
+    assert [k['requests_last_minute'] for k in pool.stats()] == [2, 2, 2]
+
+
+def test_estimates_are_replaced_by_actual_usage():
+    pool = LLMKeyPool(['a'], clock=FakeClock())
+    llm = make_llm(pool)
+    llm.call("x" * 4000)
+
+    assert pool.stats()[0]['tokens_last_minute'] == 100
+    assert llm.get_token_usage_summary().total_tokens == 100
+
+
+def test_saturated_pool_queues_until_window_rolls_over():
+    clock = FakeClock()
+    pool = LLMKeyPool(['a', 'b'], rpm_limit=1, clock=clock)
+    llm = make_llm(pool)
+    llm.call("one")
+    llm.call("two")
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(llm.call("three")))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive() and pool.waits >= 1
+
+    clock.now = 61
+    waiter.join(2)
+    assert results == ['a']
+
+
+def test_calls_get_the_remaining_budget_as_their_timeout():
+    pool = LLMKeyPool(['a'], clock=FakeClock())
+    llm = PooledLLM(pool, lambda key: TimedStubLLM(model='stub', api_key=key), model='stub')
+    patient = PooledLLM(pool, lambda key: TimedStubLLM(model='stub', api_key=key, timeout=2), model='stub')
+
+    assert llm.call("no kickoff deadline") is None
+    with deadline_scope(Deadline(30)):
+        assert 29 < llm.call("plenty of time") <= 30
+        # A client timeout already shorter than the budget is kept
+        assert patient.call("own timeout") == 2
+    # Only the call is bounded; the shared client keeps its setting
+    assert llm._client(0).timeout is None
+    assert llm.get_token_usage_summary().total_tokens == 200
+
+
+def test_concurrent_tasks_on_one_llm_are_charged_only_their_own_tokens():
+    pool = LLMKeyPool(['a'], clock=FakeClock())
+    llm = PooledLLM(pool, lambda key: TaskStubLLM(model='stub', api_key=key), model='stub')
+    in_flight = threading.Barrier(2)
+    tasks = [SimpleNamespace(name=name, tokens=tokens, in_flight=in_flight)
+             for name, tokens in (("weather", 30), ("dining", 500))]
+
+    threads = [threading.Thread(target=llm.call, args=("plan",), kwargs={'from_task': t}) for t in tasks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert [llm.task_usage(t)['total_tokens'] for t in tasks] == [30, 500]
+    assert llm.get_token_usage_summary().total_tokens == 530
+    assert llm.task_usage(SimpleNamespace()) == {}
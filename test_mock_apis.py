@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""
+Tests for the local API stand-ins (tools.mock_apis), driven through the real tools.
+"""
+import pytest
+
+from tools.mock_apis import MockAPIServer
+from tools.response_cache import MemoryResponseStore, ResponseCache, set_response_cache
+from tools.transport_tools import PublicTransportSearchTool
+from tools.yelp_tools import YelpRestaurantSearchTool
+
+NO_LATENCY = {'latency': {'dist': 'fixed', 'value': 0}}
+
+
+@pytest.fixture
+def memory_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    set_response_cache(ResponseCache(MemoryResponseStore()))
+    yield
+    set_response_cache(None)
+
+
+def test_tools_run_against_the_stand_in(memory_cache):
+    with MockAPIServer(defaults=NO_LATENCY) as server:
+        yelp = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)
+        first = yelp._run("tapas restaurants in Madrid limit 3")
+        again = YelpRestaurantSearchTool(api_key='other', base_url=server.base_url)._run(
+            "tapas restaurants in Madrid limit 3")
+        transport = PublicTransportSearchTool(base_url=server.base_url)._run(latitude=40.4, longitude=-3.7)
+
+        assert first.startswith("Top Restaurants in madrid") and first.count("Rating:") == 3
+        assert again == first
+        assert "Routes serving this area" in transport
+        assert server.stats() == {'transitland': {200: 1}, 'yelp': {200: 1}}
+
+
+def test_throttling_profile_answers_429_with_retry_after(memory_cache):
+    profiles = {'transitland': {'throttle_rate': 1.0, 'retry_after': 0}}
+    with MockAPIServer(profiles, defaults=NO_LATENCY) as server:
+        result = PublicTransportSearchTool(base_url=server.base_url)._run(latitude=1.0, longitude=2.0)
+
+        assert "Unable to retrieve public transportation data" in result
+        assert set(server.stats()['transitland']) == {429}
+        assert server.stats()['transitland'][429] > 1
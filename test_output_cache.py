@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Tests for the specialist task output cache (planning.output_cache) and the
+input normalization its keys are built from (planning.inputs).
+A fake clock drives the TTLs and last-access order.
+"""
+from types import SimpleNamespace
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+
+from planning import output_cache
+from planning.inputs import changed_fields, normalize_value, task_input_key
+from planning.output_cache import TaskOutputCache
+
+WEATHER = 'get_weather_and_packing_advice_task'
+FIELDS = ('destination', 'start_date', 'end_date')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(output_cache, 'time', SimpleNamespace(time=clock))
+    return clock
+
+
+def output(raw):
+    return TaskOutput(description="Weather", name=WEATHER, raw=raw, agent="Weather Advisor")
+
+
+def key(destination, start='2025-05-15', end='2025-05-22'):
+    return task_input_key(WEATHER, FIELDS, {'destination': destination, 'start_date': start, 'end_date': end})
+
+
+def test_entries_expire_after_their_task_ttl(tmp_path, clock):
+    cache = TaskOutputCache(str(tmp_path / 'outputs.sqlite'), ttls={WEATHER: 60})
+    cache.put(key('Paris'), output("Sunny"))
+
+    clock.now += 59
+    assert cache.get(key('Paris')).raw == "Sunny"
+    clock.now += 2
+    assert cache.get(key('Paris')) is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['per_task'] == {WEATHER: {'hits': 1, 'misses': 1}}
+
+
+def test_a_zero_ttl_or_empty_output_is_not_stored(tmp_path, clock):
+    uncached = TaskOutputCache(str(tmp_path / 'uncached.sqlite'), ttls={WEATHER: 0})
+    uncached.put(key('Paris'), output("Sunny"))
+    cache = TaskOutputCache(str(tmp_path / 'outputs.sqlite'))
+    cache.put(key('Paris'), output(""))
+
+    assert uncached.stats()['entries'] == cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+    cache = TaskOutputCache(str(tmp_path / 'outputs.sqlite'), max_entries=2)
+    cache.put(key('Paris'), output("Paris"))
+    clock.now += 1
+    cache.put(key('Rome'), output("Rome"))
+    clock.now += 1
+    assert cache.get(key('Paris')).raw == "Paris"  # Rome is now the least recently used
+    clock.now += 1
+    cache.put(key('Oslo'), output("Oslo"))
+
+    assert cache.get(key('Rome')) is None
+    assert [cache.get(key(city)).raw for city in ('Paris', 'Oslo')] == ["Paris", "Oslo"]
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_survive_a_new_cache_on_the_same_file(tmp_path, clock):
+    TaskOutputCache(str(tmp_path / 'outputs.sqlite')).put(key('Paris'), output("Sunny"))
+
+    assert TaskOutputCache(str(tmp_path / 'outputs.sqlite')).get(key('Paris')).raw == "Sunny"
+
+
+def test_keys_ignore_case_whitespace_and_date_spelling(tmp_path, clock):
+    cache = TaskOutputCache(str(tmp_path / 'outputs.sqlite'))
+    cache.put(key('Paris'), output("Sunny"))
+
+    assert cache.get(key('  paris ', start='May 15, 2025', end='22.05.2025')).raw == "Sunny"
+    assert cache.get(key('Paris', start='2025-05-16')) is None
+
+
+def test_only_date_fields_are_read_as_dates():
+    assert normalize_value("15 May 2025", 'start_date') == "2025-05-15"
+    assert normalize_value("15 May 2025", 'destination') == "15 may 2025"
+    assert normalize_value(["Museums", " local  Cuisine"], 'interests') == ("local cuisine", "museums")
+    assert changed_fields({'start_date': '2025-05-15', 'notes': 'May 15, 2025'},
+                          {'start_date': 'May 15, 2025', 'notes': '2025-05-15'}) == {'notes'}
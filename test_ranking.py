@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Tests for the dining candidate re-ranking (tools.ranking).
+"""
+import time
+
+import pytest
+
+from tools.business_store import set_business_store
+from tools.mock_apis import MockAPIServer
+from tools.ranking import DiningCandidates, DiningProfile, price_tier, rank_businesses, trip_scope
+from tools.records import Business
+from tools.response_cache import set_response_cache
+from tools.yelp_tools import YelpRestaurantSearchTool
+
+
+def business(i, rating=4.0, reviews=100, price="$$", categories=("Italian",), latitude=None, longitude=None):
+    return Business(id=f"b{i}", name=f"Place {i}", rating=rating, review_count=reviews, price=price,
+                    categories=categories, address="", phone="", latitude=latitude, longitude=longitude)
+
+
+def test_scores_follow_budget_interests_and_stay():
+    profile = DiningProfile.from_inputs({'budget': 'Luxury', 'interests': ['Nightlife'],
+                                         'stay_coordinates': (48.8566, 2.3522)})
+    cheap, fancy = business(1, price="$"), business(2, price="$$$$")
+    bar = business(3, categories=("Wine Bars",))
+    near = business(4, latitude=48.857, longitude=2.353)
+    far = business(5, latitude=48.95, longitude=2.55)
+
+    assert rank_businesses([cheap, fancy], profile, 1) == [fancy]
+    assert rank_businesses([business(6), bar], profile, 1) == [bar]
+    assert rank_businesses([far, near], profile, 1) == [near]
+    # The travel style changes the weights: hidden gems beat the most reviewed places
+    popular, gem = business(7, reviews=3000), business(8, reviews=20)
+    assert rank_businesses([popular, gem], DiningProfile.from_inputs({}), 1) == [popular]
+    assert rank_businesses([popular, gem], DiningProfile(travel_style='adventure & activities'), 1) == [gem]
+
+
+def test_price_tiers_read_any_currency_and_missing_prices_stay_neutral():
+    assert [price_tier(p) for p in ("$", "€€", "£££", "¥¥¥¥", "", None, "$$$$$", "10-20€")] == [1, 2, 3, 4, 0, 0, 0, 0]
+    assert Business.from_yelp({'id': "b", 'name': "No price"}).price == ""
+
+    luxury = DiningProfile.from_inputs({'budget': 'Luxury'})
+    assert rank_businesses([business(1, price="€"), business(2, price="€€€€")], luxury, 1)[0].id == "b2"
+    # An unknown price is neither the cheapest nor the priciest tier
+    budget = DiningProfile.from_inputs({'budget': 'Budget'})
+    unknown, cheap, fancy = business(3, price=""), business(4, price="€"), business(5, price="€€€€")
+    assert rank_businesses([fancy, unknown, cheap], budget, 3) == [cheap, unknown, fancy]
+
+
+def test_stay_coordinates_read_as_a_pair_or_a_string():
+    assert DiningProfile.from_inputs({'stay_coordinates': (48.85, 2.35)}).stay == (48.85, 2.35)
+    assert DiningProfile.from_inputs({'stay_coordinates': ["48.85", "2.35"]}).stay == (48.85, 2.35)
+    assert DiningProfile.from_inputs({'stay_coordinates': "48.85, 2.35"}).stay == (48.85, 2.35)
+    assert DiningProfile.from_inputs({'stay_coordinates': "near the Louvre"}).stay is None
+    assert DiningProfile.from_inputs({'stay_coordinates': ""}).stay is None
+
+
+def test_top_caps_each_primary_category():
+    candidates = [business(i, rating=5.0, categories=("Ramen", "Seafood")) for i in range(5)]
+    candidates += [business(10 + i, rating=3.5, categories=("Tapas Bars",)) for i in range(3)]
+
+    top = DiningCandidates(candidates).top(DiningProfile(), 5, max_per_category=2)
+
+    # The cap holds even when it leaves fewer than asked for
+    assert [b.id for b in top] == ["b0", "b1", "b10", "b11"]
+
+
+def test_ranking_thousands_of_candidates_takes_milliseconds():
+    candidates = DiningCandidates([
+        business(i, rating=3.0 + (i % 5) / 2, reviews=i % 997, price="$" * (1 + i % 4),
+                 categories=(f"Cuisine {i % 40}", f"Cuisine {(i * 7) % 40}"),
+                 latitude=48.8 + (i % 100) / 1000, longitude=2.3 + (i % 77) / 1000)
+        for i in range(5000)
+    ])
+    profile = DiningProfile.from_inputs({'budget': 'Moderate', 'interests': ['Local Cuisine'],
+                                         'travel_style': 'Food & Culinary', 'stay_coordinates': (48.85, 2.35)})
+
+    started = time.perf_counter()
+    top = candidates.top(profile, 10)
+    elapsed = time.perf_counter() - started
+
+    assert len(top) == 10
+    assert elapsed < 0.05
+
+
+@pytest.fixture
+def no_caches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TRAVEL_AGENT_RESPONSE_CACHE', 'off')
+    set_response_cache(None)
+    set_business_store(None)
+
+
+def test_restaurant_search_re_ranks_a_larger_pool_within_a_trip(no_caches):
+    with MockAPIServer(defaults={'latency': {'dist': 'fixed', 'value': 0}}) as server:
+        yelp = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)
+        plain = yelp._run("limit 5 restaurants in Paris")
+        with trip_scope({'budget': 'Luxury', 'travel_style': 'Food & Culinary'}):
+            ranked = yelp._run("limit 5 restaurants in Paris")
+
+        assert plain.count("Rating:") == ranked.count("Rating:") == 5
+        assert ranked != plain
+        # 50 candidates: one page on top of the plain search's
+        assert server.stats() == {'yelp': {200: 2}}
+        assert all(line.endswith(("$$$", "$$$$")) for line in ranked.splitlines() if line.startswith("🍽️"))
+
+        # An explicit order other than rating is kept as Yelp returned it
+        nearest = yelp._run("limit 5 restaurants in Paris sort:distance")
+        with trip_scope({'budget': 'Luxury', 'travel_style': 'Food & Culinary'}):
+            assert yelp._run("limit 5 restaurants in Paris sort:distance") == nearest
+        assert server.stats() == {'yelp': {200: 4}}
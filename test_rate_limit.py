@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Tests for the per-provider token buckets and retries (tools.rate_limit).
+A fake clock is advanced by the limiter's own sleeps, so nothing really waits.
+"""
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from tools.deadline import Deadline, DeadlineExceeded, deadline_scope
+from tools.rate_limit import RateLimiter, is_retryable, is_transient
+
+QUOTAS = {
+    'defaults': {'rate': 2, 'burst': 2, 'max_attempts': 3, 'max_wait': 10},
+    'providers': {'yelp': {'rate': 1, 'burst': 3}},
+}
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+class ApiError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+def make_limiter(tmp_path, fake):
+    return RateLimiter(QUOTAS, path=str(tmp_path / 'rate_limits.sqlite'), clock=fake.clock, sleep=fake.sleep)
+
+
+def test_bucket_is_shared_by_limiters_on_the_same_store(tmp_path):
+    fake = FakeTime()
+    first, second = make_limiter(tmp_path, fake), make_limiter(tmp_path, fake)
+
+    for limiter in (first, second, first):
+        limiter.acquire('yelp')
+    assert fake.sleeps == []
+
+    second.acquire('yelp')
+    first.acquire('yelp')
+    assert fake.sleeps == [1.0, 1.0] and fake.now == 2.0
+
+
+def test_429_waits_for_retry_after_and_pauses_the_provider(tmp_path):
+    fake = FakeTime()
+    limiter = make_limiter(tmp_path, fake)
+    responses = iter([ApiError(429, {'Retry-After': '7'}), {'ok': True}])
+
+    def call():
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert limiter.call('geoapify', call) == {'ok': True}
+    assert fake.sleeps == [7.0]
+    assert limiter.stats()['geoapify']['retries'] == 1
+
+
+def test_server_errors_are_retried_but_client_errors_are_not(tmp_path):
+    fake = FakeTime()
+    limiter = make_limiter(tmp_path, fake)
+    calls = []
+
+    def failing(status):
+        calls.append(status)
+        raise ApiError(status)
+
+    with pytest.raises(ApiError):
+        limiter.call('amadeus', lambda: failing(503))
+    assert calls == [503] * 3
+
+    with pytest.raises(ApiError):
+        limiter.call('amadeus', lambda: failing(404))
+    assert calls == [503] * 3 + [404]
+
+
+def test_retries_and_quota_waits_stay_within_the_deadline(tmp_path):
+    fake = FakeTime()
+    limiter = make_limiter(tmp_path, fake)
+    calls = []
+
+    def failing():
+        calls.append(fake.now)
+        raise ApiError(503, {'Retry-After': '5'})
+
+    with deadline_scope(Deadline(8, clock=fake.clock)):
+        with pytest.raises(ApiError):
+            limiter.call('amadeus', failing)
+        assert calls == [0.0, 5.0]
+
+        fake.now = 7.5
+        for _ in range(3):
+            limiter.acquire('yelp')
+        with pytest.raises(DeadlineExceeded):
+            limiter.acquire('yelp')
+
+
+def test_connection_errors_are_retried_but_timeouts_are_not(tmp_path):
+    fake = FakeTime()
+    limiter = make_limiter(tmp_path, fake)
+    calls = []
+
+    def failing(error):
+        calls.append(type(error).__name__)
+        raise error
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        limiter.call('amadeus', lambda: failing(requests.exceptions.ConnectionError("refused")))
+    assert calls == ['ConnectionError'] * 3
+
+    for timeout in (requests.exceptions.ReadTimeout("slow"), requests.exceptions.ConnectTimeout("slow"),
+                    TimeoutError("slow")):
+        calls.clear()
+        with pytest.raises(type(timeout)):
+            limiter.call('amadeus', lambda: failing(timeout))
+        assert len(calls) == 1
+        # Still an upstream failure as far as the circuit breaker is concerned
+        assert is_transient(timeout) and not is_retryable(timeout)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Tests for the typed tool records and their rendering (tools.records).
+API payloads come from the synthetic generators in tools.mock_apis.
+"""
+import random
+
+import pytest
+
+from tools.mock_apis import geoapify_places, yelp_search
+from tools.records import Business, POI, render, render_mode, unique
+
+
+def businesses(term, seed):
+    _, data = yelp_search({'term': term, 'location': 'paris', 'limit': '5'}, random.Random(seed))
+    return [Business.from_yelp(b) for b in data['businesses']]
+
+
+def test_records_are_compact_and_immutable():
+    business = businesses('ramen', 1)[0]
+
+    assert not hasattr(business, '__dict__')
+    with pytest.raises(AttributeError):
+        business.name = 'Other'
+    assert business.compact().startswith(f"{business.name} | {business.rating}/5 ({business.review_count})")
+
+
+def test_compact_rendering_is_smaller_than_markdown(monkeypatch):
+    _, data = geoapify_places({'categories': 'tourism.sights', 'limit': '6'}, random.Random(2))
+    pois = [POI.from_geoapify(feature) for feature in data['features']]
+
+    def markdown(i, poi):
+        return f"{i}. Name: {poi.name}\n   Address: {poi.address}\n   Distance: ~{poi.distance}m\n\n"
+
+    monkeypatch.setenv('TRAVEL_AGENT_TOOL_RENDER', 'compact')
+    compact = render(pois, markdown)
+    full = render(pois, markdown, mode='markdown')
+    assert compact.count("\n") == len(pois)
+    assert full.startswith(f"1. Name: {pois[0].name}\n")
+    assert len(compact) < len(full) * 0.7
+
+
+def test_unique_drops_repeats_across_result_sets():
+    first, second = businesses('ramen', 3), businesses('ramen', 3)
+    merged = unique(first + second[:2] + businesses('tapas', 4))
+
+    assert len(merged) == len({b.key for b in merged}) == len(first) + 5
+    assert merged[:len(first)] == first
+
+
+def test_an_unknown_render_mode_warns_once_and_falls_back_to_markdown(monkeypatch, capsys):
+    monkeypatch.setenv('TRAVEL_AGENT_TOOL_RENDER', 'Terse')
+
+    assert [render_mode(), render_mode()] == ['markdown', 'markdown']
+    assert capsys.readouterr().out.count("Unknown tool render mode 'terse'") == 1
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Tests for the response cache between the tools and their APIs (tools.response_cache)
+and the single-flight coalescing in front of it (tools.single_flight).
+A fake clock drives TTL expiry; loaders count how often the upstream is hit.
+"""
+import threading
+import time
+
+from tools.response_cache import (
+    MemoryResponseStore, ResponseCache, SQLiteResponseStore, canonical_key,
+)
+from tools.deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+from tools.single_flight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {'version': self.calls}
+
+
+def test_equivalent_requests_share_a_key():
+    a = canonical_key('yelp', {'term': ' Ramen  Shops', 'location': 'Tokyo', 'apiKey': 'one', 'price': None})
+    b = canonical_key('yelp', {'location': 'tokyo', 'term': 'ramen shops', 'apiKey': 'two'})
+
+    assert a == b
+    assert a != canonical_key('geoapify', {'location': 'tokyo', 'term': 'ramen shops'})
+    assert canonical_key('geoapify', {'lat': 48.8566001}) == canonical_key('geoapify', {'lat': 48.8566})
+    # Only free-text fields are folded: case-sensitive values keep their own keys
+    assert canonical_key('amadeus_hotels', {'cityCode': 'PAR', 'host': 'https://api.example.com/V1'}) != \
+        canonical_key('amadeus_hotels', {'cityCode': 'par', 'host': 'https://api.example.com/v1'})
+
+
+def test_stale_entries_are_served_while_refreshed(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(SQLiteResponseStore(str(tmp_path / 'responses.sqlite')),
+                          ttls={'weather': 60}, stale_ttls={'weather': 60}, clock=clock)
+    upstream = Upstream()
+
+    assert cache.fetch('weather', {'location': 'Paris'}, upstream) == {'version': 1}
+    assert cache.fetch('weather', {'location': 'paris'}, upstream) == {'version': 1}
+
+    clock.now += 90
+    assert cache.fetch('weather', {'location': 'Paris'}, upstream) == {'version': 1}
+    cache.wait_for_refreshes()
+    assert cache.fetch('weather', {'location': 'Paris'}, upstream) == {'version': 2}
+
+    clock.now += 500
+    assert cache.fetch('weather', {'location': 'Paris'}, upstream) == {'version': 3}
+    assert cache.stats()['per_provider']['weather'] == {'misses': 2, 'hits': 2, 'stale_hits': 1, 'refreshes': 1}
+
+
+def test_failed_loads_are_not_cached_and_store_stays_within_size():
+    cache = ResponseCache(MemoryResponseStore(max_bytes=200), clock=FakeClock())
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    try:
+        cache.fetch('yelp', {'term': 'tapas'}, failing)
+    except ConnectionError:
+        pass
+    assert cache.stats()['entries'] == 0
+
+    for i in range(10):
+        cache.fetch('yelp', {'term': f'query {i}'}, lambda: {'text': 'x' * 60})
+    stats = cache.stats()
+    assert stats['bytes'] <= 200 and stats['per_provider']['yelp']['evictions'] == 8
+
+
+def test_concurrent_identical_requests_share_one_upstream_call():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    upstream = Upstream()
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return upstream()
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('geoapify', 'k', slow)))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(flights.do('geoapify', 'k', slow)))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert upstream.calls == 1 and results == [{'version': 1}] * 4
+    assert flights.stats()['per_provider']['geoapify'] == {'calls': 4, 'coalesced': 3}
+    assert flights.do('geoapify', 'k', upstream) == {'version': 2}
+
+
+def test_a_leader_out_of_budget_does_not_fail_followers_with_time_left():
+    flights = SingleFlight()
+    started = threading.Event()
+    upstream = Upstream()
+
+    def bounded():
+        # Like http_get: the timeout is clipped to the caller's deadline
+        deadline = current_deadline()
+        if deadline is not None:
+            started.set()
+            time.sleep(deadline.remaining())
+            raise DeadlineExceeded("leader's budget ran out")
+        return upstream()
+
+    outcomes = {}
+
+    def call(name, seconds):
+        with deadline_scope(Deadline(seconds) if seconds else None):
+            try:
+                outcomes[name] = flights.do('yelp', 'k', bounded)
+            except DeadlineExceeded as e:
+                outcomes[name] = e
+
+    leader = threading.Thread(target=call, args=('leader', 0.2))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=call, args=('unbounded', None)),
+                 threading.Thread(target=call, args=('expired', 0.1))]
+    for thread in followers:
+        thread.start()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert isinstance(outcomes['leader'], DeadlineExceeded)
+    assert outcomes['unbounded'] == {'version': 1} and upstream.calls == 1
+    # A follower whose own budget is gone fails on it without calling again
+    assert isinstance(outcomes['expired'], DeadlineExceeded) and "skipped" in str(outcomes['expired'])
+    assert flights.stats()['per_provider']['yelp'] == {'calls': 3, 'coalesced': 2, 'reruns': 1}
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Tests for the dependency-aware task scheduler (planning.scheduler).
+Tasks are stand-ins and their kickoff is replaced, so no LLM keys are needed.
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from planning.scheduler import TaskGraphScheduler
+
+
+def task(name, context=None):
+    return SimpleNamespace(name=name, description=name, context=context, callback=None, agent=None)
+
+
+class CountingLLM:
+    """Cumulative token counters only, like a plain LLM client several agents share."""
+
+    def __init__(self):
+        self.total = 0
+
+    def get_token_usage_summary(self):
+        return {'total_tokens': self.total}
+
+    def spend(self, task, tokens):
+        self.total += tokens
+
+
+class PerTaskLLM(CountingLLM):
+    """Also counts the tokens of each task's calls, like PooledLLM."""
+
+    def __init__(self):
+        super().__init__()
+        self.per_task = {}
+
+    def task_usage(self, task):
+        return {'total_tokens': self.per_task.get(id(task), 0)}
+
+    def spend(self, task, tokens):
+        super().spend(task, tokens)
+        self.per_task[id(task)] = self.per_task.get(id(task), 0) + tokens
+
+
+def sharing(llm, **tokens):
+    """Tasks named after the keywords, all run by agents on llm, each spending its tokens."""
+    tasks = [task(name) for name in tokens]
+    for t in tasks:
+        t.agent, t.tokens = SimpleNamespace(llm=llm), tokens[t.name]
+    return tasks
+
+
+class RecordingScheduler(TaskGraphScheduler):
+    """Runs each task by sleeping briefly and records what ran at the same time."""
+
+    def __init__(self, tasks, seconds=0.05, failing=(), **kwargs):
+        super().__init__(tasks, verbose=False, **kwargs)
+        self.seconds = seconds
+        self.failing = set(failing)
+        self.started, self.finished = [], []
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def _kickoff_task(self, task, inputs):
+        with self._lock:
+            self.started.append(task.name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.seconds)
+            if task.name in self.failing:
+                raise RuntimeError(f"{task.name} broke")
+            if task.agent is not None:
+                with self._lock:
+                    task.agent.llm.spend(task, task.tokens)
+            return SimpleNamespace(raw=f"{task.name} for {inputs['destination']}")
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.finished.append(task.name)
+
+
+def fan_graph(width):
+    specialists = [task(f"specialist_{i}") for i in range(width)]
+    report = task("report", context=specialists)
+    return specialists, report, task("evaluate", context=[report])
+
+
+def test_fans_out_specialists_and_fans_in_to_the_report():
+    specialists, report, evaluate = fan_graph(4)
+    scheduler = RecordingScheduler([*specialists, report, evaluate], max_concurrency=4)
+
+    started = time.perf_counter()
+    result = scheduler.run({'destination': 'Paris'})
+    elapsed = time.perf_counter() - started
+
+    # The four specialists overlap; report and evaluation wait for everything upstream
+    assert scheduler.peak == 4
+    assert elapsed < 4 * 0.05 + 0.1
+    assert set(scheduler.finished[:4]) == {t.name for t in specialists}
+    assert scheduler.started[4:] == ["report", "evaluate"]
+    assert [o.raw for o in result.tasks_output][-2:] == ["report for Paris", "evaluate for Paris"]
+    assert not result.errors
+
+
+def test_never_runs_more_than_max_concurrency_tasks():
+    specialists, report, evaluate = fan_graph(7)
+    scheduler = RecordingScheduler([*specialists, report, evaluate], seconds=0.02, max_concurrency=2)
+
+    result = scheduler.run({'destination': 'Paris'})
+
+    assert scheduler.peak == 2
+    assert len(result.tasks_output) == 9
+
+
+def test_a_failed_task_does_not_stop_its_dependents():
+    specialists, report, evaluate = fan_graph(3)
+    scheduler = RecordingScheduler([*specialists, report, evaluate], failing={"specialist_1"})
+
+    result = scheduler.run({'destination': 'Paris'})
+
+    assert list(result.errors) == ["specialist_1"]
+    assert scheduler.started[-2:] == ["report", "evaluate"]
+    assert len(result.tasks_output) == 4
+
+
+def test_a_dependency_cycle_is_an_error():
+    first = task("first")
+    second = task("second", context=[first])
+    first.context = [second]
+
+    with pytest.raises(ValueError, match="cycle"):
+        RecordingScheduler([first, second]).run({'destination': 'Paris'})
+
+
+def test_overlapping_runs_on_a_shared_plain_llm_get_no_per_task_usage():
+    llm = CountingLLM()
+    weather, dining, report = sharing(llm, weather=30, dining=500, report=7)
+    report.context = [weather, dining]
+
+    result = RecordingScheduler([weather, dining, report], max_concurrency=2).run({'destination': 'Paris'})
+
+    # The specialists ran side by side on one client, so neither can be told apart; the report ran alone
+    assert result.token_usage == {'weather': {}, 'dining': {}, 'report': {'total_tokens': 7}}
+    assert llm.total == 537
+
+
+def test_an_llm_that_counts_per_task_attributes_overlapping_runs():
+    llm = PerTaskLLM()
+    weather, dining = sharing(llm, weather=30, dining=500)
+
+    result = RecordingScheduler([weather, dining], max_concurrency=2).run({'destination': 'Paris'})
+
+    assert result.token_usage == {'weather': {'total_tokens': 30}, 'dining': {'total_tokens': 500}}
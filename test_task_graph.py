@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+"""
+Tests for the per-kickoff task graph built by TravelAgentCrew.build_tasks(),
+and for planning with it (kickoff, kickoff_async, incremental re-plans,
+kickoff_many).
+Agent and Task are replaced with counting stand-ins so no LLM keys are needed.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+import crew
+from planning.batch import SharedTaskOutputs
+from planning.events import PlanCompletedEvent, TaskCompletedEvent
+from planning.inputs import trip_key
+from planning.scheduler import TaskGraphScheduler
+from tools.deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+
+INPUTS = {
+    'starting_point': 'New York',
+    'destination': 'Paris',
+    'start_date': '2025-05-15',
+    'end_date': '2025-05-22',
+    'budget': 'Moderate'
+}
+
+
+class CountingAgent:
+    created = 0
+
+    def __init__(self, **kwargs):
+        CountingAgent.created += 1
+        self.__dict__.update(kwargs)
+
+
+class CountingTask:
+    created = 0
+
+    def __init__(self, **kwargs):
+        CountingTask.created += 1
+        self.context = None
+        self.callback = None
+        self.__dict__.update(kwargs)
+
+
+@pytest.fixture
+def travel_crew(monkeypatch, tmp_path):
+    # Task callbacks dump raw outputs under reports/raw; keep them out of the tree
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'reports' / 'raw').mkdir(parents=True)
+    monkeypatch.setattr(crew, 'Agent', CountingAgent)
+    monkeypatch.setattr(crew, 'Task', CountingTask)
+    CountingAgent.created = CountingTask.created = 0
+
+    travel_crew = crew.TravelAgentCrew(cache_outputs=False)
+    travel_crew.llms = {'gemini_1': object()}
+    travel_crew.kickoff_inputs = INPUTS
+    return travel_crew
+
+
+def test_each_agent_and_task_built_once(travel_crew):
+    tasks = travel_crew.build_tasks()
+
+    assert len(tasks) == 7
+    assert CountingTask.created == 7
+    assert CountingAgent.created == 7
+
+
+def test_context_references_graph_instances(travel_crew):
+    tasks = travel_crew.build_tasks()
+    by_name = {t.name: t for t in tasks}
+
+    compile_task = by_name['compile_travel_report_task']
+    specialists = [by_name[name] for name in crew.SPECIALIST_TASKS]
+    assert [id(t) for t in compile_task.context] == [id(t) for t in specialists]
+    assert by_name['evaluate_report_task'].context[0] is compile_task
+
+
+def test_each_build_uses_current_inputs(travel_crew):
+    first = travel_crew.build_tasks()
+    travel_crew.kickoff_inputs = {**INPUTS, 'destination': 'Rome'}
+    second = travel_crew.build_tasks()
+
+    assert not {id(t) for t in first} & {id(t) for t in second}
+    assert all('Rome' in t.description for t in second)
+    assert CountingTask.created == 14
+
+
+def test_inactive_agents_are_skipped(travel_crew):
+    travel_crew.active_agents = ['local_guide', 'report_compiler']
+    tasks = travel_crew.build_tasks()
+
+    assert [t.name for t in tasks] == ['get_local_context_task', 'compile_travel_report_task']
+    assert CountingAgent.created == 2
+
+
+def test_incremental_kickoff_reruns_only_affected_tasks(travel_crew, monkeypatch):
+    runs = []
+
+    def fake_kickoff_task(scheduler, task, inputs):
+        runs.append(task.name)
+        return SimpleNamespace(name=task.name, raw=f"{task.name} for {inputs['budget']}")
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task', fake_kickoff_task)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results', lambda self, result: 'report.md')
+
+    travel_crew.kickoff(inputs=INPUTS)
+    assert len(runs) == 7
+
+    runs.clear()
+    travel_crew.kickoff(inputs={**INPUTS, 'budget': 'Luxury'}, incremental=True)
+
+    assert sorted(runs) == ['compile_travel_report_task', 'evaluate_report_task',
+                            'find_accommodation_task', 'get_dining_recommendations_task']
+    assert sorted(travel_crew.last_run.retained) == ['find_transportation_task', 'get_local_context_task',
+                                                     'get_weather_and_packing_advice_task']
+    assert travel_crew.last_run.outputs['get_local_context_task'].raw == 'get_local_context_task for Moderate'
+
+
+def test_deterministic_compile_skips_compiler_llm(travel_crew, monkeypatch, tmp_path):
+    runs = []
+
+    def fake_kickoff_task(scheduler, task, inputs):
+        runs.append(task.name)
+        task.output = SimpleNamespace(name=task.name, raw=f"Notes from {task.name}. More detail.")
+        return task.output
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task', fake_kickoff_task)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results', lambda self, result: 'report.md')
+    travel_crew.compile_mode = 'deterministic'
+
+    travel_crew.kickoff(inputs=INPUTS)
+
+    assert 'compile_travel_report_task' not in runs
+    assert 'evaluate_report_task' in runs
+    report = travel_crew.last_run.outputs['compile_travel_report_task'].raw
+    assert "## Executive Summary" in report
+    assert "- **Weather & Packing**: Notes from get_weather_and_packing_advice_task." in report
+    assert (tmp_path / 'temp_report.md').read_text(encoding='utf-8') == report
+
+
+def test_deadline_compiles_report_from_what_finished(travel_crew, monkeypatch, tmp_path):
+    release = threading.Event()
+
+    def fake_kickoff_task(scheduler, task, inputs):
+        if task.name == 'get_weather_and_packing_advice_task':
+            release.wait(5)
+        task.output = SimpleNamespace(name=task.name, raw=f"Notes from {task.name}.")
+        return task.output
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task', fake_kickoff_task)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results', lambda self, result: 'report.md')
+    travel_crew.compile_mode = 'deterministic'
+
+    try:
+        travel_crew.kickoff(inputs=INPUTS, deadline=0.5)
+    finally:
+        release.set()
+
+    run = travel_crew.last_run
+    assert run.timed_out == ['get_weather_and_packing_advice_task', 'evaluate_report_task']
+    report = run.outputs['compile_travel_report_task'].raw
+    assert "## Transportation" in report
+    assert "sections are missing: Weather. They did not finish within the 0.5s planning budget." in report
+
+
+def test_kickoff_many_shares_matching_specialist_tasks(travel_crew, monkeypatch, tmp_path):
+    runs, lock = Counter(), threading.Lock()
+
+    def fake_kickoff_task(scheduler, task, inputs):
+        with lock:
+            runs[task.name] += 1
+        output = SimpleNamespace(name=task.name, raw=f"{task.name} for {inputs['destination']} {inputs['budget']}")
+        task.callback(output)
+        return output
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task', fake_kickoff_task)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results', lambda self, result: 'report.md')
+    trips = [INPUTS, {**INPUTS, 'budget': 'Luxury'}, {**INPUTS, 'destination': 'Rome'}]
+
+    manifest = travel_crew.kickoff_many(trips, max_workers=3)
+
+    assert manifest['succeeded'] == 3
+    # Transport, local context and weather depend on neither budget: the two Paris trips share them
+    assert manifest['specialist_tasks_shared'] == 3 and manifest['specialist_tasks_run'] == 12
+    assert runs['get_weather_and_packing_advice_task'] == 2 and runs['find_accommodation_task'] == 3
+    # Either Paris trip may be the one reusing a given task; Rome shares nothing
+    paris, luxury, rome = sorted(manifest['trips'], key=lambda t: t['index'])
+    assert sorted(paris['shared_tasks'] + luxury['shared_tasks']) == [
+        'find_transportation_task', 'get_local_context_task', 'get_weather_and_packing_advice_task']
+    assert rome['shared_tasks'] == []
+    # Each trip's raw dumps (its evaluation refs) are its own, shared outputs included
+    for inputs in trips:
+        dumps = [p.read_text(encoding='utf-8') for p in (tmp_path / 'reports' / 'raw' / trip_key(inputs)).glob('*.txt')]
+        assert len(dumps) == 7
+        assert f"find_accommodation_task for {inputs['destination']} {inputs['budget']}" in dumps
+        assert any(d.startswith('get_weather_and_packing_advice_task') for d in dumps)
+    assert not list((tmp_path / 'reports' / 'raw').glob('*.txt'))
+
+
+def test_kickoff_many_reruns_a_shared_task_that_failed(travel_crew, monkeypatch):
+    runs = Counter()
+
+    def fake_kickoff_task(scheduler, task, inputs):
+        runs[task.name] += 1
+        if task.name == 'get_weather_and_packing_advice_task' and runs[task.name] == 1:
+            raise RuntimeError("weather API hiccup")
+        return SimpleNamespace(name=task.name, raw=f"{task.name} for {inputs['budget']}")
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task', fake_kickoff_task)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results', lambda self, result: 'report.md')
+
+    manifest = travel_crew.kickoff_many([INPUTS, {**INPUTS, 'budget': 'Luxury'}], max_workers=1)
+
+    first, second = manifest['trips']
+    assert first['task_errors'] == {'get_weather_and_packing_advice_task': 'weather API hiccup'}
+    assert second['task_errors'] == {}
+    assert 'get_weather_and_packing_advice_task' not in second['shared_tasks']
+    assert runs['get_weather_and_packing_advice_task'] == 2
+
+
+def test_a_trip_out_of_budget_does_not_fail_trips_sharing_its_task():
+    shared = SharedTaskOutputs()
+    started = threading.Event()
+    outcomes = {}
+
+    def compute():
+        deadline = current_deadline()
+        if deadline is not None:
+            started.set()
+            time.sleep(deadline.remaining())
+            raise DeadlineExceeded("owner's budget ran out")
+        return 'weather for Paris'
+
+    def trip(name, seconds):
+        with deadline_scope(Deadline(seconds) if seconds else None):
+            try:
+                outcomes[name] = shared.get_or_compute('weather', compute)
+            except DeadlineExceeded as e:
+                outcomes[name] = e
+
+    owner = threading.Thread(target=trip, args=('owner', 0.2))
+    owner.start()
+    started.wait(2)
+    waiting = threading.Thread(target=trip, args=('waiting', None))
+    waiting.start()
+    for thread in (owner, waiting):
+        thread.join(2)
+
+    assert isinstance(outcomes['owner'], DeadlineExceeded)
+    assert outcomes['waiting'] == ('weather for Paris', False)
+    assert shared.get_or_compute('weather', compute) == ('weather for Paris', True)
+
+
+def collect(events):
+    async def drain():
+        return [event async for event in events]
+    return drain()
+
+
+def test_kickoff_async_yields_each_task_then_the_plan(travel_crew, monkeypatch):
+    async def fake_kickoff_task_async(scheduler, task, inputs):
+        await asyncio.sleep(0.01)
+        if task.name == 'find_transportation_task':
+            raise RuntimeError("no trains")
+        return SimpleNamespace(name=task.name, raw=f"{task.name} for {inputs['destination']}")
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task_async', fake_kickoff_task_async)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results', lambda self, result: 'report.md')
+
+    events = asyncio.run(collect(travel_crew.kickoff_async(inputs=INPUTS)))
+
+    *tasks, plan = events
+    assert all(isinstance(e, TaskCompletedEvent) for e in tasks)
+    assert sorted(e.name for e in tasks) == sorted(t.name for t in travel_crew.build_tasks())
+    # The report and its evaluation settle after every specialist
+    assert [e.name for e in tasks[-2:]] == ['compile_travel_report_task', 'evaluate_report_task']
+    failed = [e for e in tasks if e.error]
+    assert [(e.name, e.error, e.raw) for e in failed] == [('find_transportation_task', 'no trains', '')]
+    assert isinstance(plan, PlanCompletedEvent)
+    assert plan.report_path == 'report.md'
+    assert plan.errors == {'find_transportation_task': 'no trains'}
+
+
+def test_concurrent_kickoff_async_plans_keep_their_own_results(travel_crew, monkeypatch):
+    async def fake_kickoff_task_async(scheduler, task, inputs):
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(name=task.name, raw=f"{task.name} for {inputs['destination']}")
+
+    monkeypatch.setattr(TaskGraphScheduler, '_kickoff_task_async', fake_kickoff_task_async)
+    monkeypatch.setattr(crew.TravelAgentCrew, 'aggregate_results',
+                        lambda self, result: f"report for {result.inputs['destination']}.md")
+
+    async def both():
+        return await asyncio.gather(collect(travel_crew.kickoff_async(inputs=INPUTS)),
+                                    collect(travel_crew.kickoff_async(inputs={**INPUTS, 'destination': 'Rome'})))
+
+    paris, rome = asyncio.run(both())
+
+    assert paris[-1].report_path == 'report for Paris.md' and rome[-1].report_path == 'report for Rome.md'
+    assert all(e.raw.endswith('for Paris') for e in paris[:-1])
+    assert all(e.raw.endswith('for Rome') for e in rome[:-1])
+    # The crew itself is left as it was; each plan ran on a fork
+    assert travel_crew.last_run is None
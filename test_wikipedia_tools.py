@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Tests for the cached Wikipedia search behind the Wikipedia tools (tools.wikipedia_tools).
+A stub stands in for langchain's WikipediaAPIWrapper.
+"""
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from tools.response_cache import MemoryResponseStore, ResponseCache, set_response_cache
+from tools.wikipedia_tools import _search
+
+
+class StubWikipedia:
+    top_k_results = 2
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def run(self, query):
+        self.calls += 1
+        return self.answers.pop(0)
+
+
+@pytest.fixture
+def memory_cache():
+    set_response_cache(ResponseCache(MemoryResponseStore()))
+    yield
+    set_response_cache(None)
+
+
+def test_only_page_summaries_are_cached(memory_cache):
+    wiki = StubWikipedia("No good Wikipedia Search Result was found", "Page: Lisbon\nSummary: Capital of Portugal.")
+
+    assert _search(wiki, "history of Lisbon") == ""
+    assert _search(wiki, "history of Lisbon") == "Page: Lisbon\nSummary: Capital of Portugal."
+    assert _search(wiki, "history of Lisbon") == "Page: Lisbon\nSummary: Capital of Portugal."
+    assert wiki.calls == 2
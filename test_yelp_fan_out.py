@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Tests for the concurrent Yelp sub-searches (tools.yelp_tools._fan_out) and
+the tools built on them. Searches are stand-in functions that sleep, so no
+API keys or network are needed.
+"""
+import threading
+import time
+
+import pytest
+
+from tools import yelp_tools
+from tools.deadline import Deadline, current_deadline, deadline_scope
+from tools.records import Business
+from tools.yelp_tools import YelpCulinaryExperienceTool, _fan_out
+
+
+def business(name):
+    return Business(id=name, name=name, rating=4.5, review_count=10, price="$$", categories=("Food",),
+                    address="", phone="")
+
+
+def test_results_come_back_in_call_order_whatever_finishes_first():
+    def search(term, seconds):
+        time.sleep(seconds)
+        return {'term': term}
+
+    started = time.perf_counter()
+    results = _fan_out(search, [("slow", 0.15), ("fast", 0.0), ("middle", 0.05)])
+
+    assert [r['term'] for r in results] == ["slow", "fast", "middle"]
+    # Concurrent: the total is the slowest search, not the sum
+    assert time.perf_counter() - started < 0.15 + 0.1
+
+
+def test_at_most_yelp_max_concurrency_searches_run_at_once(monkeypatch):
+    monkeypatch.setattr(yelp_tools, 'YELP_MAX_CONCURRENCY', 2)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def search(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return i
+
+    assert _fan_out(search, [(i,) for i in range(6)]) == list(range(6))
+    assert peak[0] == 2
+
+
+def test_a_concurrency_of_one_runs_in_the_calling_thread(monkeypatch):
+    monkeypatch.setattr(yelp_tools, 'YELP_MAX_CONCURRENCY', 1)
+    caller = threading.current_thread()
+
+    assert _fan_out(lambda i: threading.current_thread() is caller, [(1,), (2,)]) == [True, True]
+
+
+def test_an_exception_in_one_search_propagates():
+    def search(term):
+        if term == "broken":
+            raise RuntimeError("unexpected payload")
+        return {'term': term}
+
+    with pytest.raises(RuntimeError, match="unexpected payload"):
+        _fan_out(search, [("ok",), ("broken",), ("also ok",)])
+
+
+def test_searches_see_the_callers_deadline():
+    budget = Deadline(30)
+    with deadline_scope(budget):
+        seen = _fan_out(lambda i: current_deadline(), [(1,), (2,), (3,)])
+
+    assert seen == [budget] * 3
+
+
+def test_culinary_search_keeps_the_sections_that_answered(monkeypatch):
+    def api_call(tool, term, location, limit=10):
+        if term.startswith("cooking"):
+            return {'error': "Error calling Yelp API: 503"}
+        time.sleep(0.05 if term.startswith("food tour") else 0.0)
+        return {'businesses': [business(f"{term.split()[0]} place")], 'total': 1}
+
+    monkeypatch.setattr(YelpCulinaryExperienceTool, '_api_call', api_call)
+
+    result = YelpCulinaryExperienceTool(api_key='test')._run("culinary experiences in Lisbon")
+
+    sections = [line for line in result.splitlines() if line.startswith("## ")]
+    assert sections == ["## Food Tours", "## Food Markets", "## Street Foods"]
+    assert "Cooking" not in result and "503" not in result
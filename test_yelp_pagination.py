@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Tests for paging Yelp searches past 50 results (tools.yelp_tools), against the
+local API stand-ins.
+"""
+import time
+
+import pytest
+
+from tools.business_store import BusinessStore, set_business_store
+from tools.mock_apis import MockAPIServer
+from tools.response_cache import set_response_cache
+from tools.yelp_tools import YelpRestaurantSearchTool
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('TRAVEL_AGENT_RESPONSE_CACHE', 'off')
+    set_response_cache(None)
+    store = BusinessStore(":memory:")
+    set_business_store(store)
+    yield store
+    set_business_store(None)
+
+
+def test_large_limits_fetch_offset_pages_concurrently(store):
+    with MockAPIServer(defaults={'latency': {'dist': 'fixed', 'value': 0.4}}) as server:
+        yelp = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)
+        started = time.perf_counter()
+        result = yelp._run("limit 120 tapas restaurants in Madrid")
+        elapsed = time.perf_counter() - started
+
+        assert result.count("Rating:") == 120
+        assert server.stats() == {'yelp': {200: 3}}
+        # Three pages in parallel take about one round trip, not three
+        assert elapsed < 1.0
+        assert store.stats()['businesses'] == 120
+
+
+def test_rating_filter_stops_paging_once_enough_businesses_pass(store):
+    with MockAPIServer(defaults={'latency': {'dist': 'fixed', 'value': 0}}) as server:
+        yelp = YelpRestaurantSearchTool(api_key='test', base_url=server.base_url)
+        result = yelp._run("limit 5 rating:4.5 tapas restaurants in Madrid")
+        ratings = [float(line.split()[1].split("/")[0]) for line in result.splitlines() if "Rating:" in line]
+
+        assert len(ratings) == 5 and min(ratings) >= 4.5
+        # The first page had enough; the other 19 pages of the candidate pool were never requested
+        assert server.stats() == {'yelp': {200: 1}}
+        # The whole first page was kept, so the unfiltered search is answered locally
+        assert yelp._run("limit 50 tapas restaurants in Madrid").count("Rating:") == 50
+        assert server.stats() == {'yelp': {200: 1}}
+        assert store.stats()['hits'] == 1
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Tests for the Yelp query parser (tools.yelp_query): expected specs, a fuzz run
+over a corpus of agent-style queries, and a micro-benchmark that only runs
+with TRAVEL_AGENT_BENCHMARKS=1 (`python test_yelp_query.py` prints the timings).
+"""
+import os
+import random
+import re
+import time
+
+import pytest
+
+from tools.yelp_query import SORT_ORDERS, YelpQuerySpec, parse_yelp_query
+
+# Queries in the shape the dining agent sends (from the tool descriptions, task prompts and runs)
+CORPUS = [
+    "Italian restaurants in New York",
+    "Italian restaurants in Paris price:2 limit:3",
+    "restaurants in Paris, France",
+    "best restaurants in Paris, France price:2,3 limit:10",
+    "fine dining in Paris, France price:3,4 sort:rating limit:5",
+    "authentic local eateries in Paris, France price:1,2",
+    "cafes in Montmartre, Paris",
+    "bistros in Le Marais, Paris sort:review_count",
+    "vegetarian restaurants in Paris limit 5",
+    "brunch in Atlanta, USA",
+    "southern food in Atlanta, GA price:1,2 limit:8",
+    "soul food restaurants in Atlanta sort:review_count limit:5",
+    "BBQ near Atlanta",
+    "ramen in Tokyo",
+    "sushi near Shinjuku, Tokyo limit:60",
+    "izakaya in Tokyo price:2 rating:4",
+    "tapas bars in Barcelona, Spain",
+    "seafood restaurants in Lisbon. rating 4.5+",
+    "cheap eats $$ in Rome",
+    "trattorias in Rome, Italy sort:distance limit 20",
+    "food tours in Paris",
+    "food experiences in Rome",
+    "cooking class in Rome",
+    "food market in Barcelona",
+    "street food in Bangkok",
+    "local food in Tokyo",
+    "local food specialties in Tokyo",
+    "traditional dishes in Lyon, France",
+    "Tokyo food specialties",
+    "Paris cuisine",
+    "must try food in Mexico City",
+    "dessert shops in Vienna price:1,2,3",
+    "wine bars in Bordeaux limit:15 sort:rating",
+    "romantic dinner in Venice price:4",
+    "family friendly restaurants in Orlando, FL price:1,2 limit:6",
+    "late night food in Berlin",
+    "Berlin restaurants in Berlin",
+    "halal restaurants in London, UK price:2",
+    "gluten free bakeries in Dublin",
+    "limit 3 tapas restaurants in Madrid",
+]
+
+EXPECTED = {
+    "Italian restaurants in Paris price:2 limit:3":
+        YelpQuerySpec("Italian restaurants", "paris", frozenset({2}), "rating", 3),
+    "fine dining in Paris, France price:3,4 sort:rating limit:5":
+        YelpQuerySpec("fine dining", "paris, france", frozenset({3, 4}), "rating", 5),
+    "bistros in Le Marais, Paris sort:review_count":
+        YelpQuerySpec("bistros", "le marais, paris", frozenset(), "review_count", 10),
+    "seafood restaurants in Lisbon. rating 4.5+":
+        YelpQuerySpec("seafood restaurants", "lisbon", min_rating=4.5),
+    "cheap eats $$ in Rome": YelpQuerySpec("cheap eats", "rome", frozenset({2})),
+    "Berlin restaurants in Berlin": YelpQuerySpec("Berlin restaurants", "berlin"),
+    "Tokyo food specialties": YelpQuerySpec("Tokyo food specialties", None),
+    "restaurants in": YelpQuerySpec("restaurants in", None),
+}
+
+PARAMS = [("price:1,2", 'prices', frozenset({1, 2})), ("limit 25", 'limit', 25),
+          ("sort:distance", 'sort_by', 'distance'), ("rating:4", 'min_rating', 4.0), ("$$$", 'prices', frozenset({3}))]
+PARAM_TEXT = re.compile(r'(?:price|limit|sort|rating)\s*[:=]?\s*\d|\$', re.IGNORECASE)
+
+
+@pytest.mark.parametrize("query", sorted(EXPECTED))
+def test_parses_the_expected_spec(query):
+    assert parse_yelp_query(query) == EXPECTED[query]
+
+
+def test_specs_are_memoized_and_hashable():
+    spec = parse_yelp_query(CORPUS[1])
+
+    assert parse_yelp_query(CORPUS[1]) is spec
+    assert spec.price == "2"
+    assert {spec: 'cached'}[parse_yelp_query("Italian restaurants in Paris price:2 limit:3")] == 'cached'
+
+
+def _mutate(query: str, rng: random.Random) -> str:
+    """query with its spacing and letter case scrambled."""
+    words = query.split(" ")
+    words = [w.upper() if rng.random() < 0.3 else w for w in words]
+    return " " * rng.randint(0, 2) + "".join(w + " " * rng.randint(1, 3) for w in words)
+
+
+def test_fuzzed_corpus_keeps_its_meaning():
+    rng = random.Random(24)
+    for query in CORPUS:
+        base = parse_yelp_query(query)
+        assert base.sort_by in SORT_ORDERS and base.prices <= {1, 2, 3, 4}
+        assert not PARAM_TEXT.search(base.term)
+        assert base.location is None or (not PARAM_TEXT.search(base.location) and base.location.count(",") <= 1)
+
+        for _ in range(25):
+            mutated = parse_yelp_query(_mutate(query, rng))
+            assert mutated.term.lower() == base.term.lower()
+            assert (mutated.location, mutated.prices, mutated.sort_by, mutated.limit) == \
+                   (base.location, base.prices, base.sort_by, base.limit)
+
+            # A parameter added at either end leaves the rest alone; the last one given wins, prices add up
+            text, field, value = rng.choice(PARAMS)
+            appended = rng.random() < 0.5
+            extended = parse_yelp_query(f"{query} {text}" if appended else f"{text} {query}")
+            assert (extended.term, extended.location) == (base.term, base.location)
+            if field == 'prices':
+                assert extended.prices == base.prices | value
+            elif appended:
+                assert getattr(extended, field) == value
+            else:
+                assert getattr(extended, field) in (value, getattr(base, field))
+
+
+def test_random_text_never_breaks_the_parser():
+    rng = random.Random(7)
+    alphabet = "abcdefghijklmnopqrstuvwxyz  ,.;:!?()$+=_0123456789éü東京"
+    pieces = ["in", "near", "price", "limit", "sort", "rating", "min_rating", "review_count", ":", "$$"]
+    for _ in range(2000):
+        query = "".join(rng.choice(pieces) + " " if rng.random() < 0.2 else rng.choice(alphabet)
+                        for _ in range(rng.randint(0, 60)))
+        spec = parse_yelp_query(query)
+        hash(spec)
+        assert spec.sort_by in SORT_ORDERS and spec.prices <= {1, 2, 3, 4}
+
+
+def benchmark(queries=CORPUS, rounds=200):
+    """Microseconds per query for a fresh parse and for a memoized one."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        parse_yelp_query.cache_clear()
+        for query in queries:
+            parse_yelp_query(query)
+    cold = (time.perf_counter() - started) / (rounds * len(queries)) * 1e6
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            parse_yelp_query(query)
+    warm = (time.perf_counter() - started) / (rounds * len(queries)) * 1e6
+    return cold, warm
+
+
+def test_repeated_queries_are_served_from_the_memo():
+    parse_yelp_query.cache_clear()
+    first = [parse_yelp_query(query) for query in CORPUS]
+    again = [parse_yelp_query(query) for query in CORPUS]
+
+    assert all(a is b for a, b in zip(first, again))
+    info = parse_yelp_query.cache_info()
+    assert (info.hits, info.misses) == (len(CORPUS), len(set(CORPUS)))
+
+
+@pytest.mark.skipif(not os.getenv('TRAVEL_AGENT_BENCHMARKS'),
+                    reason="wall-clock benchmark; set TRAVEL_AGENT_BENCHMARKS=1 to run it")
+def test_parsing_takes_microseconds():
+    cold, warm = benchmark(rounds=20)
+
+    assert cold < 100
+    assert warm < cold
+
+
+if __name__ == "__main__":
+    cold, warm = benchmark()
+    print(f"{len(CORPUS)} queries: {cold:.1f} µs per parse, {warm:.2f} µs per memoized parse")
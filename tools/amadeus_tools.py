@@ -1,21 +1,54 @@
 # travel_agent/tools/amadeus_tools.py
 import os
+from functools import lru_cache
+from urllib.parse import urlsplit
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Optional, Type, List
 # Ensure you have installed the amadeus library: pip install amadeus
 from amadeus import Client, ResponseError, Location
 
+from .http_client import base_url
+from .circuit_breaker import guarded_call
+from .records import FlightOffer, HotelOffer, render
+from .response_cache import cached_call
+
+
+def _host_options(url: Optional[str]) -> dict:
+    """Client options pointing the SDK at url (e.g. a local tools.mock_apis server)."""
+    if not url:
+        return {}
+    parts = urlsplit(url)
+    ssl = parts.scheme == "https"
+    return {'host': parts.hostname, 'ssl': ssl, 'port': parts.port or (443 if ssl else 80)}
+
+
+@lru_cache(maxsize=None)
+def client_for(url: str) -> Optional[Client]:
+    """Client for a non-default API host (a tool's base_url), or None if it can't be created."""
+    try:
+        return Client(
+            client_id=os.getenv("AMADEUS_CLIENT_ID"),
+            client_secret=os.getenv("AMADEUS_CLIENT_SECRET"),
+            log_level='warning',
+            **_host_options(url)
+        )
+    except Exception as e:
+        print(f"Error initializing Amadeus client for {url}: {e}")
+        return None
+
+
 # --- Amadeus Client Initialization ---
 # Store keys in .env: AMADEUS_CLIENT_ID=YOUR_ID, AMADEUS_CLIENT_SECRET=YOUR_SECRET
 amadeus_client = None
 try:
-    # Initialize client using environment variables
+    # Initialize client using environment variables; AMADEUS_BASE_URL overrides the API host
     amadeus_client = Client(
         client_id=os.getenv("AMADEUS_CLIENT_ID"),
         client_secret=os.getenv("AMADEUS_CLIENT_SECRET"),
         # hostname='production' # Uncomment for production environment if needed
-        log_level='warning' # Set to 'debug' for detailed logs if needed
+        log_level='warning', # Set to 'debug' for detailed logs if needed
+        **_host_options(base_url("amadeus"))
     )
     print("Amadeus client initialized successfully.")
 except Exception as e:
@@ -37,9 +70,11 @@ class AmadeusFlightSearchTool(BaseTool):
     Returns a list of flight options including price, airlines, and stop information.
     """
     args_schema: Type[BaseModel] = AmadeusFlightInput
+    base_url: Optional[str] = None  # overrides AMADEUS_BASE_URL for this tool
 
     def _run(self, origin_city_code: str, destination_city_code: str, departure_date: str, return_date: Optional[str] = None, adults: int = 1, max_results: int = 5) -> str:
-        if not amadeus_client:
+        client = client_for(self.base_url) if self.base_url else amadeus_client
+        if not client:
             return "Amadeus client not initialized. Check API keys in .env file."
 
         try:
@@ -54,33 +89,19 @@ class AmadeusFlightSearchTool(BaseTool):
             if return_date:
                 search_params['returnDate'] = return_date
 
-            # Make the API call using the SDK
-            response = amadeus_client.shopping.flight_offers_search.get(**search_params)
-            offers = response.data # The SDK parses the JSON response
+            # Make the API call using the SDK; prices are only reused for a few minutes
+            offers = cached_call("amadeus_flights", {**search_params, 'host': self.base_url}, lambda: guarded_call(
+                "amadeus", lambda: client.shopping.flight_offers_search.get(**search_params).data))
 
             if not offers:
                 return f"No Amadeus flight offers found for {origin_city_code} to {destination_city_code} on {departure_date}."
 
-            results_str = f"Amadeus Flight Offers for {origin_city_code} to {destination_city_code}:\n\n"
-            for i, offer in enumerate(offers[:max_results], 1):
-                price = offer.get('price', {}).get('total', 'N/A')
-                currency = offer.get('price', {}).get('currency', '')
-                itineraries = offer.get('itineraries', [])
-
-                # Determine airline codes involved in the first itinerary's outbound segments
-                airline_codes = set()
-                if itineraries and itineraries[0].get('segments'):
-                    for segment in itineraries[0]['segments']:
-                        airline_codes.add(segment.get('carrierCode', '??'))
-                airlines = ', '.join(sorted(list(airline_codes))) if airline_codes else 'N/A'
-
-                # Count stops for the first itinerary's outbound leg
-                num_stops_outbound = len(itineraries[0]['segments']) - 1 if (itineraries and itineraries[0].get('segments')) else 'N/A'
-
-                results_str += f"{i}. Price: {price} {currency}, Airlines: {airlines}, Stops (Outbound): {num_stops_outbound}\n"
-                # Further details like duration or specific segment info can be parsed from 'itineraries' if needed
-
-            return results_str
+            flights = [FlightOffer.from_amadeus(offer) for offer in offers[:max_results]]
+            return f"Amadeus Flight Offers for {origin_city_code} to {destination_city_code}:\n\n" + render(
+                flights, lambda i, flight: (
+                    f"{i}. Price: {flight.price} {flight.currency}, Airlines: {', '.join(flight.airlines) or 'N/A'}, "
+                    f"Stops (Outbound): {'N/A' if flight.stops is None else flight.stops}\n"
+                ))
 
         except ResponseError as error:
             # Log the detailed error for debugging
@@ -106,9 +127,11 @@ class AmadeusHotelSearchTool(BaseTool):
     Returns a list of hotels with names, address, rating and approximate price if available.
     """
     args_schema: Type[BaseModel] = AmadeusHotelInput
+    base_url: Optional[str] = None  # overrides AMADEUS_BASE_URL for this tool
 
     def _run(self, city_code: str, check_in_date: Optional[str] = None, check_out_date: Optional[str] = None, adults: int = 1, max_results: int = 5) -> str:
-        if not amadeus_client:
+        client = client_for(self.base_url) if self.base_url else amadeus_client
+        if not client:
             return "Amadeus client not initialized. Check API keys in .env file."
 
         try:
@@ -129,47 +152,23 @@ class AmadeusHotelSearchTool(BaseTool):
                 search_params['checkOutDate'] = check_out_date
 
             # Use the hotel_offers endpoint for searching by cityCode
-            response = amadeus_client.shopping.hotel_offers.get(**search_params)
-            hotels_data = response.data
+            hotels_data = cached_call("amadeus_hotels", {**search_params, 'host': self.base_url}, lambda: guarded_call(
+                "amadeus", lambda: client.shopping.hotel_offers.get(**search_params).data))
 
             if not hotels_data:
                 return f"No Amadeus hotel offers found for city code {city_code}."
 
-            results_str = f"Amadeus Hotel Options in {city_code}:\n\n"
-            count = 0
-            for hotel_entry in hotels_data:
-                if count >= max_results:
-                    break
-
-                hotel_info = hotel_entry.get('hotel', {})
-                hotel_name = hotel_info.get('name', 'N/A')
-                hotel_id = hotel_info.get('hotelId', 'N/A') # Useful for subsequent detailed searches
-                address_info = hotel_info.get('address', {})
-                address_lines = address_info.get('lines', [])
-                address = address_lines[0] if address_lines else 'N/A'
-                city = address_info.get('cityName', 'N/A')
-                country = address_info.get('countryCode', 'N/A')
-                rating = hotel_info.get('rating', 'N/A')
-
-                # Attempt to get price from the first available offer in the response
-                offer_price = 'N/A'
-                currency = ''
-                if hotel_entry.get('offers'):
-                    offer = hotel_entry['offers'][0]
-                    price_info = offer.get('price', {})
-                    offer_price = price_info.get('total', price_info.get('base', 'N/A')) # Try total, fallback to base
-                    currency = price_info.get('currency', '')
-
-                results_str += f"{count+1}. Name: {hotel_name} (ID: {hotel_id})\n"
-                results_str += f"   Address: {address}, {city}, {country}\n"
-                results_str += f"   Rating: {rating}-star\n"
-                results_str += f"   Price (approx): {offer_price} {currency}\n\n"
-                count += 1
-
-            if count == 0: # If loop didn't run but hotels_data was not empty
+            # The hotel ID is useful for subsequent detailed searches
+            hotels = [HotelOffer.from_amadeus(hotel_entry) for hotel_entry in hotels_data[:max_results]]
+            if not hotels: # If hotels_data was not empty but nothing could be listed
                  return f"Found hotel data for {city_code}, but could not parse details or offers."
 
-            return results_str
+            return f"Amadeus Hotel Options in {city_code}:\n\n" + render(hotels, lambda i, hotel: (
+                f"{i}. Name: {hotel.name} (ID: {hotel.hotel_id})\n"
+                f"   Address: {hotel.address}, {hotel.city}, {hotel.country}\n"
+                f"   Rating: {hotel.rating}-star\n"
+                f"   Price (approx): {hotel.price} {hotel.currency}\n\n"
+            ))
 
         except ResponseError as error:
             print(f"Amadeus API Response Error (Hotel Search): Status={error.response.status_code}, Code={error.code}, Details={error.description}")
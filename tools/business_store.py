@@ -0,0 +1,181 @@
+# travel_agent/tools/business_store.py
+"""
+Local store of Yelp businesses shared by the three Yelp tools.
+Every business is kept once, by Yelp id, as a compact record (name, rating,
+reviews, price, categories, coordinates, address), indexed by city and
+category. Each search also remembers the businesses it returned, so a repeat
+search for the same city, term and filters is answered locally, and one
+asking for more results only fetches the missing page from Yelp. A search for
+a bare category the store already holds enough of for the city (e.g. "italian
+restaurants" in Paris) is answered from the category index.
+
+The store lives in .cache/businesses.sqlite, so it outlasts a trip, and keeps
+entries for BUSINESS_TTL. TRAVEL_AGENT_BUSINESS_STORE selects "sqlite"
+(default), "memory" or "off".
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .records import Business
+
+DEFAULT_CACHE_DIR = os.getenv("TRAVEL_AGENT_CACHE_DIR", ".cache")
+# Yelp's terms allow keeping business content for up to 24 hours
+BUSINESS_TTL = 24 * 3600
+
+# Words that don't narrow a restaurant search down to a category
+FILLER_WORDS = {'restaurant', 'restaurants', 'food', 'dining', 'eat', 'places', 'place', 'best', 'top', 'good'}
+
+
+def city_key(location: str) -> str:
+    return " ".join(location.lower().split())
+
+
+def category_of(term: str, location: str = "") -> Optional[str]:
+    """The category a search term asks for once filler words and the place are dropped ("Italian restaurants" -> "italian")."""
+    place = set(location.lower().split()) | {"in", "near"}
+    words = [w for w in term.lower().split() if w not in FILLER_WORDS and w not in place]
+    return " ".join(words) or None
+
+
+def _dump(business: Business) -> str:
+    return json.dumps(asdict(business), separators=(",", ":"))
+
+
+def _load(record: str) -> Business:
+    fields = json.loads(record)
+    fields['categories'] = tuple(fields['categories'])
+    return Business(**fields)
+
+
+class BusinessStore:
+    """SQLite-backed business records plus the searches that produced them."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = BUSINESS_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "businesses.sqlite")
+        self.ttl = ttl
+        self.clock = clock
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS businesses ("
+                " id TEXT PRIMARY KEY, city TEXT, record TEXT, rating REAL, review_count INTEGER, updated REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS categories ("
+                " id TEXT, city TEXT, category TEXT, PRIMARY KEY (id, category))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_categories_city ON categories(city, category)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS searches ("
+                " city TEXT, search TEXT, ids TEXT, total INTEGER, updated REAL, PRIMARY KEY (city, search))"
+            )
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def put(self, city: str, businesses: Sequence[Business]) -> None:
+        """Insert or refresh businesses found in city."""
+        now = self.clock()
+        with self._lock, self._conn:
+            for business in businesses:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO businesses (id, city, record, rating, review_count, updated)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (business.id, city, _dump(business), business.rating, business.review_count, now)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO categories (id, city, category) VALUES (?, ?, ?)",
+                    [(business.id, city, category.lower()) for category in business.categories if category]
+                )
+
+    def _fresh(self, ids: Sequence[str]) -> Dict[str, Business]:
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        rows = self._conn.execute(
+            f"SELECT id, record FROM businesses WHERE id IN ({marks}) AND updated >= ?",
+            (*ids, self.clock() - self.ttl)
+        ).fetchall()
+        return {row[0]: _load(row[1]) for row in rows}
+
+    def search(self, city: str, search: str) -> Optional[Tuple[List[Business], int]]:
+        """(businesses in the order Yelp returned them, Yelp's total) of an earlier search, if still fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ids, total FROM searches WHERE city = ? AND search = ? AND updated >= ?",
+                (city, search, self.clock() - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            ids = json.loads(row[0])
+            found = self._fresh(ids)
+        if len(found) < len(ids):
+            return None
+        return [found[i] for i in ids], row[1]
+
+    def record_search(self, city: str, search: str, businesses: Sequence[Business], total: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (city, search, ids, total, updated) VALUES (?, ?, ?, ?, ?)",
+                (city, search, json.dumps([b.id for b in businesses]), total, self.clock())
+            )
+
+    def by_category(self, city: str, category: str, limit: int) -> List[Business]:
+        """Up to limit fresh businesses of category in city, best rated first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT b.record FROM categories c JOIN businesses b ON b.id = c.id"
+                " WHERE c.city = ? AND c.category = ? AND b.updated >= ?"
+                " ORDER BY b.rating DESC, b.review_count DESC LIMIT ?",
+                (city, category.lower(), self.clock() - self.ttl, limit)
+            ).fetchall()
+        return [_load(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Businesses held plus search hits, partial hits, category hits and misses."""
+        with self._lock:
+            businesses = self._conn.execute("SELECT COUNT(*) FROM businesses").fetchone()[0]
+            return {'businesses': businesses, **self.counters}
+
+
+_store: Optional[BusinessStore] = None
+_configured = False
+_store_lock = threading.Lock()
+
+
+def get_business_store() -> Optional[BusinessStore]:
+    """The process-wide store, created on first use; None when TRAVEL_AGENT_BUSINESS_STORE=off."""
+    global _store, _configured
+    with _store_lock:
+        if not _configured:
+            backend = os.getenv("TRAVEL_AGENT_BUSINESS_STORE", "sqlite").lower()
+            if backend not in ("off", "0", "none"):
+                try:
+                    _store = BusinessStore(":memory:" if backend == "memory" else None)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Warning: business store unavailable ({e}); using an in-memory store")
+                    _store = BusinessStore(":memory:")
+            _configured = True
+        return _store
+
+
+def set_business_store(store: Optional[BusinessStore]) -> None:
+    """Use store for every Yelp tool in this process (None turns it off)."""
+    global _store, _configured
+    with _store_lock:
+        _store = store
+        _configured = True
@@ -0,0 +1,144 @@
+# travel_agent/tools/cassette.py
+"""
+Record/replay of the tools' upstream traffic.
+In record mode every upstream exchange made through the tools (request,
+response, latency) is appended to a gzip-compressed JSON Lines cassette. In
+replay mode the tools are answered from the cassette only, optionally with the
+recorded or a fixed latency, so benchmarks and load tests run offline and give
+the same results every time. Both modes bypass the response cache. Recorded
+calls still go upstream through the rate limiter and circuit breaker
+(circuit_breaker.guarded_call); replayed calls never reach either. Only
+successful responses are recorded.
+
+TRAVEL_AGENT_CASSETTE_MODE selects "record" or "replay" ("off" by default),
+TRAVEL_AGENT_CASSETTE the file and TRAVEL_AGENT_CASSETTE_LATENCY the replay
+latency ("recorded" or seconds, default 0).
+"""
+import os
+import json
+import gzip
+import time
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Union
+
+CASSETTE_MODES = ('off', 'record', 'replay')
+DEFAULT_CASSETTE_PATH = os.getenv("TRAVEL_AGENT_CASSETTE", os.path.join("cassettes", "tools.jsonl.gz"))
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a request the cassette has no response for."""
+
+
+class Cassette:
+    """
+    One cassette file. Repeated recordings of the same request are replayed in
+    order, the last one again once they run out.
+    """
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH, mode: str = 'replay',
+                 latency: Union[str, float] = 0, sleep: Callable[[float], None] = time.sleep):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.sleep = sleep
+        self.recorded = 0
+        self.replayed = 0
+        self._lock = threading.Lock()
+        self._tracks: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._positions: Dict[str, int] = defaultdict(int)
+
+        if mode == 'replay':
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"No cassette to replay at {path}")
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._tracks[entry['key']].append(entry)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def __len__(self) -> int:
+        return sum(len(track) for track in self._tracks.values())
+
+    def _replay(self, provider: str, key: str, request: Any) -> Any:
+        with self._lock:
+            track = self._tracks.get(key)
+            if not track:
+                raise CassetteMiss(f"No recorded {provider} response for {json.dumps(request, default=str)}")
+            entry = track[min(self._positions[key], len(track) - 1)]
+            self._positions[key] += 1
+            self.replayed += 1
+        delay = entry.get('latency', 0) if self.latency == 'recorded' else float(self.latency or 0)
+        if delay > 0:
+            self.sleep(delay)
+        return entry['response']
+
+    def _record(self, provider: str, key: str, request: Any, loader: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        response = loader()
+        entry = {
+            'provider': provider,
+            'key': key,
+            'request': request,
+            'response': response,
+            'latency': round(time.perf_counter() - started, 3),
+        }
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            # Appending gzip members keeps the file readable even if the run is killed
+            with gzip.open(self.path, 'at', encoding='utf-8') as file:
+                file.write(line)
+            self._tracks[key].append(entry)
+            self.recorded += 1
+        return response
+
+    def call(self, provider: str, key: str, request: Any, loader: Callable[[], Any]) -> Any:
+        """Replay the response for key, or run loader() and record its response."""
+        if self.mode == 'replay':
+            return self._replay(provider, key, request)
+        return self._record(provider, key, request, loader)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'mode': self.mode, 'path': self.path, 'recorded': self.recorded,
+                'replayed': self.replayed, 'entries': len(self)}
+
+
+_cassette: Optional[Cassette] = None
+_configured = False
+_cassette_lock = threading.Lock()
+
+
+def make_cassette(mode: str, path: Optional[str] = None,
+                  latency: Union[str, float, None] = None) -> Optional[Cassette]:
+    """Cassette for mode ('off' gives None), at path or TRAVEL_AGENT_CASSETTE, with the env latency by default."""
+    mode = mode.lower()
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"Unknown cassette mode '{mode}', expected one of: {', '.join(CASSETTE_MODES)}")
+    if mode == 'off':
+        return None
+    if latency is None:
+        latency = os.getenv("TRAVEL_AGENT_CASSETTE_LATENCY", "0")
+        latency = latency if latency == 'recorded' else float(latency)
+    return Cassette(path or DEFAULT_CASSETTE_PATH, mode, latency)
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process-wide cassette, or None when recording/replaying is off."""
+    global _cassette, _configured
+    with _cassette_lock:
+        if not _configured:
+            _cassette = make_cassette(os.getenv("TRAVEL_AGENT_CASSETTE_MODE", "off"))
+            _configured = True
+        return _cassette
+
+
+def set_cassette(cassette: Optional[Cassette]) -> None:
+    """Record to / replay from cassette for every tool in this process (None turns it off)."""
+    global _cassette, _configured
+    with _cassette_lock:
+        _cassette = cassette
+        _configured = True
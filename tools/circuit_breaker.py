@@ -0,0 +1,158 @@
+# travel_agent/tools/circuit_breaker.py
+"""
+Per-provider circuit breakers in front of the tools' upstream calls.
+Each breaker watches the outcome of the provider's last `window` requests;
+guarded_call() puts it inside the retry loop, so every attempt counts. Once at
+least `min_calls` have been made and `failure_rate` of them failed (429, 5xx,
+timeouts, connection errors; see rate_limit.is_transient), it opens. An open
+breaker rejects calls immediately with CircuitOpenError, which also ends any
+retrying, so tools fall back to a cached response or their fallback message
+instead of waiting on a sick API.
+After `open_seconds` the next rejected call is replayed once in the background
+as a half-open probe; success closes the breaker, failure keeps it open.
+
+Thresholds live next to the quotas in config/rate_limits.yaml.
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .rate_limit import get_rate_limiter, is_transient, rate_limited
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+_probes: Optional[ThreadPoolExecutor] = None
+_probes_lock = threading.Lock()
+
+
+def _probe_executor() -> ThreadPoolExecutor:
+    global _probes
+    with _probes_lock:
+        if _probes is None:
+            _probes = ThreadPoolExecutor(max_workers=2, thread_name_prefix="breaker-probe")
+        return _probes
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider's breaker is open; the call was not attempted."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} is unavailable (circuit open, next probe in {max(0.0, retry_in):.0f}s)")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """Closed -> open on too many failures -> half-open background probe -> closed or open again."""
+
+    def __init__(self, provider: str, failure_rate: float = 0.5, min_calls: int = 5, window: int = 20,
+                 open_seconds: float = 30, clock: Callable[[], float] = time.monotonic):
+        self.provider = provider
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes: deque = deque(maxlen=window)
+        self._probe: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.times_opened += 1
+        print(f"Circuit for {self.provider} opened; failing fast for {self.open_seconds:.0f}s")
+
+    def _record(self, ok: bool) -> None:
+        with self._lock:
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures >= self.failure_rate * len(self._outcomes)):
+                self._open()
+
+    def _run_probe(self, call: Callable[[], Any]) -> None:
+        try:
+            call()
+            ok = True
+        except Exception as e:
+            ok = not is_transient(e)
+        with self._lock:
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+                print(f"Circuit for {self.provider} closed; probe succeeded")
+            else:
+                self._open()
+
+    def call(self, call: Callable[[], Any]) -> Any:
+        """call(), unless the breaker is open; upstream failures count towards opening it."""
+        with self._lock:
+            if self.state != CLOSED:
+                retry_in = self.opened_at + self.open_seconds - self.clock()
+                if self.state == OPEN and retry_in <= 0:
+                    self.state = HALF_OPEN
+                    self._probe = _probe_executor().submit(self._run_probe, call)
+                self.rejected += 1
+                raise CircuitOpenError(self.provider, retry_in)
+        try:
+            result = call()
+        except Exception as e:
+            if is_transient(e):
+                self._record(False)
+            raise
+        self._record(True)
+        return result
+
+    def wait_for_probe(self, timeout: Optional[float] = None) -> None:
+        """Block until a running half-open probe has finished."""
+        probe = self._probe
+        if probe is not None:
+            probe.result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                'state': self.state,
+                'failure_rate': round(self._outcomes.count(False) / calls, 3) if calls else 0.0,
+                'recent_calls': calls,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """The process-wide breaker for provider, configured from its rate-limit quota entry."""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            quota = get_rate_limiter().quota(provider)
+            breaker = _breakers[provider] = CircuitBreaker(
+                provider,
+                failure_rate=quota['failure_rate'],
+                min_calls=int(quota['min_calls']),
+                window=int(quota['window']),
+                open_seconds=quota['open_seconds'],
+            )
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """State and counters of every provider's breaker."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {provider: breakers[provider].stats() for provider in sorted(breakers)}
+
+
+def guarded_call(provider: str, call: Callable[[], Any]) -> Any:
+    """call() within provider's quota (tools.rate_limit), each attempt behind its circuit breaker."""
+    return rate_limited(provider, call, guard=get_breaker(provider).call)
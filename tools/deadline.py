@@ -0,0 +1,66 @@
+# travel_agent/tools/deadline.py
+"""
+Latency budget of a kickoff, visible to every task, LLM call and tool call made
+on its behalf. The scheduler runs each task inside deadline_scope(); anything
+below it asks current_deadline() how much time is left, shortens its own
+timeouts to fit, and raises DeadlineExceeded instead of starting work that
+cannot finish. Tools catch it like any other upstream error and answer from
+the response cache or their fallback data.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+_current: ContextVar[Optional["Deadline"]] = ContextVar("travel_agent_deadline", default=None)
+
+
+class DeadlineExceeded(RuntimeError):
+    """The kickoff's latency budget ran out before this work could be done."""
+
+
+class Deadline:
+    """A point in time `seconds` from now."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: Optional[float]) -> float:
+        """default (None meaning unbounded) shortened to the time that is left."""
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
+
+    def check(self, what: str) -> None:
+        """Raise DeadlineExceeded if no time is left for what."""
+        if self.expired:
+            raise DeadlineExceeded(f"{what} skipped: the {self.seconds:g}s planning budget ran out")
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the kickoff this code runs for, or None without a budget."""
+    return _current.get()
+
+
+def check_deadline(what: str) -> None:
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(what)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Make deadline the current one for the code inside the block (None clears it)."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -0,0 +1,297 @@
+# travel_agent/tools/geo_tiles.py
+"""
+Geohash tile cache for Geoapify place searches.
+Agents ask for places around slightly different centers in the same city all
+the time. Instead of one circle query per (categories, center, radius), the
+circle is covered by geohash tiles (at the finest precision that needs no more
+than GEOAPIFY_MAX_TILES of them, so tiles stay within a few radii), only the
+tiles not held yet are fetched, as rectangle queries paged until the tile is
+complete, and the answer is the cached places within the radius, nearest
+first, by haversine distance. Overlapping nearby searches become local lookups.
+
+A tile with more places than GEOAPIFY_TILE_PAGES pages hold is never cached
+as if it were complete: the search stops loading tiles, returns None and the
+caller falls back to its circle query. The tile is remembered as dense (for
+TILE_TTL like any tile), so later searches over it fall back straight away.
+
+Decoded tiles are kept in memory (at most GEOAPIFY_TILE_MEMORY tiles, for
+TILE_TTL); the tile requests themselves go through the shared HTTP client, so
+the response cache keeps them on disk under its own TTL and size bound.
+GEOAPIFY_TILE_CACHE=off sends plain circle queries instead.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .records import POI
+from .response_cache import PROVIDER_TTLS
+
+GEOAPIFY_MAX_TILES = int(os.getenv("GEOAPIFY_MAX_TILES", "30"))
+GEOAPIFY_TILE_MEMORY = int(os.getenv("GEOAPIFY_TILE_MEMORY", "256"))
+# Pages fetched per tile before it counts as too dense to cache
+GEOAPIFY_TILE_PAGES = int(os.getenv("GEOAPIFY_TILE_PAGES", "3"))
+# Places requested per tile page (Geoapify's usual page size)
+TILE_LIMIT = 100
+TILE_TTL = PROVIDER_TTLS["geoapify"]
+# Tile requests a single search may have in flight at once
+TILE_CONCURRENCY = 4
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = 111320.0
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# (south, west, north, east) in degrees
+Box = Tuple[float, float, float, float]
+
+# Held in place of a tile's places when it has too many to load whole
+DENSE = object()
+
+
+def geohash(latitude: float, longitude: float, precision: int) -> str:
+    """Geohash of a point with precision characters."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def tile_box(tile: str) -> Box:
+    """Bounds of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in tile:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    h = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, h)))
+
+
+def _circle_box(latitude: float, longitude: float, radius: float) -> Box:
+    dlat = radius / METERS_PER_DEGREE
+    dlon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+    return max(latitude - dlat, -90.0), longitude - dlon, min(latitude + dlat, 90.0), longitude + dlon
+
+
+def tile_precision(latitude: float, longitude: float, radius: float, max_tiles: int = GEOAPIFY_MAX_TILES) -> int:
+    """Finest precision at which a circle spans at most max_tiles cells wherever it is centered nearby."""
+    south, west, north, east = _circle_box(latitude, longitude, radius)
+    for precision in range(9, 0, -1):
+        height, width = cell_size(precision)
+        worst = (math.ceil((north - south) / height) + 1) * (math.ceil((east - west) / width) + 1)
+        if worst <= max_tiles:
+            return precision
+    return 1
+
+
+def covering_tiles(latitude: float, longitude: float, radius: float,
+                   max_tiles: int = GEOAPIFY_MAX_TILES) -> List[str]:
+    """Geohash cells that together cover the circle, at tile_precision()."""
+    precision = tile_precision(latitude, longitude, radius, max_tiles)
+    height, width = cell_size(precision)
+    south, west, north, east = _circle_box(latitude, longitude, radius)
+    tiles = []
+    lat = math.floor(south / height) * height
+    while lat < north:
+        lon = math.floor(west / width) * width
+        while lon < east:
+            cell_lat = min(lat + height / 2, 90.0)
+            cell_lon = (lon + width / 2 + 180.0) % 360.0 - 180.0
+            tile = geohash(cell_lat, cell_lon, precision)
+            # Skip corner cells the circle does not reach
+            s, w, n, e = tile_box(tile)
+            nearest = haversine(latitude, longitude, min(max(latitude, s), n), min(max(longitude, w), e))
+            if nearest <= radius and tile not in tiles:
+                tiles.append(tile)
+            lon += width
+        lat += height
+    return tiles
+
+
+class TileCache:
+    """Decoded tiles, least recently used first out, each valid for ttl seconds."""
+
+    def __init__(self, max_tiles: int = GEOAPIFY_TILE_MEMORY, ttl: float = TILE_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.max_tiles = max_tiles
+        self.ttl = ttl
+        self.clock = clock
+        self._tiles: "OrderedDict[Tuple[str, str], Tuple[float, Tuple[POI, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def get(self, categories: str, tile: str):
+        """Places of a held tile, DENSE for a tile known to be too dense, or None."""
+        with self._lock:
+            entry = self._tiles.get((categories, tile))
+            if entry is None or self.clock() - entry[0] > self.ttl:
+                return None
+            self._tiles.move_to_end((categories, tile))
+            return entry[1]
+
+    def put(self, categories: str, tile: str, pois) -> None:
+        """Hold a tile's places, or DENSE to remember it is too dense to load."""
+        with self._lock:
+            self._tiles[(categories, tile)] = (self.clock(), pois if pois is DENSE else tuple(pois))
+            self._tiles.move_to_end((categories, tile))
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    def _covering(self, categories: str, tile: str):
+        """Places of tile from memory, itself or a coarser tile containing it (a geohash prefix); DENSE if it is."""
+        pois = self.get(categories, tile)
+        if pois is not None:
+            return pois
+        for length in range(len(tile) - 1, 0, -1):
+            # A dense coarser tile says nothing about this one
+            pois = self.get(categories, tile[:length])
+            if pois is not None and pois is not DENSE:
+                return pois
+        return None
+
+    @staticmethod
+    def _load(fetch: Callable[[Box, int], Sequence[POI]], tile: str, stop: threading.Event):
+        """All places of a tile, page by page; DENSE if GEOAPIFY_TILE_PAGES pages don't reach its end, None once stop is set."""
+        box, pois = tile_box(tile), []
+        for page in range(GEOAPIFY_TILE_PAGES):
+            if stop.is_set():
+                return None
+            batch = list(fetch(box, page * TILE_LIMIT))
+            pois.extend(batch)
+            if len(batch) < TILE_LIMIT:
+                return tuple(pois)
+        return DENSE
+
+    def search(self, categories: Sequence[str], latitude: float, longitude: float, radius: float,
+               limit: int, fetch: Callable[[Box, int], Sequence[POI]]) -> Optional[List[POI]]:
+        """
+        Up to limit places of categories within radius meters of the point, nearest
+        first, with their distance from it; None when tiles can't answer (too many
+        tiles, or a tile too dense to load whole). fetch(box, offset) loads one page
+        of TILE_LIMIT places of a tile; tiles not in memory are fetched concurrently,
+        the first dense tile stops the rest, and errors propagate.
+        """
+        key = ",".join(sorted(categories))
+        tiles = covering_tiles(latitude, longitude, radius)
+        if len(tiles) > GEOAPIFY_MAX_TILES:
+            return self._fall_back()
+        held = {tile: self._covering(key, tile) for tile in tiles}
+        if any(pois is DENSE for pois in held.values()):
+            with self._lock:
+                self.counters['dense_tiles_held'] += 1
+            return self._fall_back()
+        missing = [tile for tile, pois in held.items() if pois is None]
+        with self._lock:
+            self.counters['searches'] += 1
+            self.counters['tiles_held'] += len(tiles) - len(missing)
+        if missing and not self._fetch(key, missing, held, fetch):
+            return self._fall_back()
+
+        found: Dict[object, POI] = {}
+        # Coarser tiles answer for several of the circle's tiles; read each once
+        for pois in {id(pois): pois for pois in held.values()}.values():
+            for poi in pois:
+                if poi.latitude is None or poi.longitude is None:
+                    continue
+                distance = haversine(latitude, longitude, poi.latitude, poi.longitude)
+                if distance <= radius and poi.key not in found:
+                    found[poi.key] = replace(poi, distance=int(round(distance)))
+        return sorted(found.values(), key=lambda poi: poi.distance)[:limit]
+
+    def _fetch(self, key: str, missing: List[str], held: Dict[str, object],
+               fetch: Callable[[Box, int], Sequence[POI]]) -> bool:
+        """Load the missing tiles into held and memory; False, giving up on the rest, once one is dense."""
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=min(TILE_CONCURRENCY, len(missing)),
+                                thread_name_prefix="geoapify-tile") as pool:
+            # Each tile runs in a copy of the caller's context, so it sees the kickoff deadline
+            futures = {pool.submit(copy_context().run, self._load, fetch, tile, stop): tile for tile in missing}
+            for future in as_completed(futures):
+                pois = None if future.cancelled() else future.result()
+                if pois is None:
+                    continue
+                with self._lock:
+                    self.counters['tiles_fetched'] += 1
+                    if pois is DENSE:
+                        self.counters['dense_tiles'] += 1
+                self.put(key, futures[future], pois)
+                held[futures[future]] = pois
+                if pois is DENSE and not stop.is_set():
+                    # Tiles not started are dropped and running ones stop after their current page
+                    stop.set()
+                    for other in futures:
+                        other.cancel()
+        return not stop.is_set()
+
+    def _fall_back(self) -> None:
+        with self._lock:
+            self.counters['fallbacks'] += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Tiles in memory plus searches, tiles answered from memory, tiles fetched, dense tiles and fallbacks."""
+        with self._lock:
+            return {'tiles': len(self._tiles), **self.counters}
+
+
+_cache: Optional[TileCache] = None
+_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> Optional[TileCache]:
+    """The process-wide tile cache, created on first use; None when GEOAPIFY_TILE_CACHE=off."""
+    global _cache, _configured
+    with _cache_lock:
+        if not _configured:
+            if os.getenv("GEOAPIFY_TILE_CACHE", "on").lower() not in ("off", "0", "none"):
+                _cache = TileCache()
+            _configured = True
+        return _cache
+
+
+def set_tile_cache(cache: Optional[TileCache]) -> None:
+    """Use cache for every Geoapify search in this process (None turns it off)."""
+    global _cache, _configured
+    with _cache_lock:
+        _cache = cache
+        _configured = True
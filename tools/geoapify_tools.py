@@ -1,10 +1,14 @@
 # travel_agent/tools/geoapify_tools.py
 import os
-import requests
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Optional, Type, List
 
+from .cassette import get_cassette
+from .geo_tiles import TILE_LIMIT, get_tile_cache
+from .http_client import base_url, http_get_json, HTTP_ERRORS
+from .records import POI, render
+
 # Store key in .env: GEOAPIFY_API_KEY=YOUR_KEY
 GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY")
 
@@ -31,14 +35,17 @@ class GeoapifyPOITool(BaseTool):
     Returns names, addresses, and distances.
     """
     args_schema: Type[BaseModel] = GeoapifyPOIInput
+    base_url: Optional[str] = None  # defaults to GEOAPIFY_BASE_URL or the public API
 
     def _run(self, categories: List[str], latitude: float, longitude: float, radius: int = 5000, limit: int = 10) -> str:
         """Executes the Geoapify POI search."""
-        if not GEOAPIFY_API_KEY:
+        # Read per call so a key set after import (e.g. for tools.mock_apis) is picked up
+        api_key = GEOAPIFY_API_KEY or os.getenv("GEOAPIFY_API_KEY")
+        if not api_key:
             return "Geoapify API key not configured in .env file."
 
         # Use the v2/places endpoint
-        base_url = "https://api.geoapify.com/v2/places"
+        endpoint = f"{self.base_url or base_url('geoapify')}/v2/places"
         # Ensure limit is within reasonable bounds (Geoapify might have its own max)
         limit = min(limit, 100)
 
@@ -47,39 +54,40 @@ class GeoapifyPOITool(BaseTool):
             'filter': f'circle:{longitude},{latitude},{radius}',
             'bias': f'proximity:{longitude},{latitude}', # Prioritize closer results
             'limit': limit,
-            'apiKey': GEOAPIFY_API_KEY
+            'apiKey': api_key
         }
 
+        def fetch_tile(box, offset):
+            south, west, north, east = box
+            tile_params = dict(params, filter=f'rect:{west},{south},{east},{north}',
+                               bias=f'proximity:{(west + east) / 2},{(south + north) / 2}',
+                               limit=TILE_LIMIT, offset=offset)
+            data = http_get_json(endpoint, params=tile_params, provider="geoapify")
+            return [POI.from_geoapify(feature) for feature in (data or {}).get('features', [])]
+
+        # Recording/replaying needs every request to reach the cassette
+        tiles = get_tile_cache() if get_cassette() is None else None
         try:
-            print(f"Calling Geoapify Places API with params: {params}") # Debug print
-            response = requests.get(base_url, params=params)
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-            data = response.json()
+            # Only the tiles around the point not held yet are requested; None falls back to the circle
+            pois = tiles.search(categories, latitude, longitude, radius, limit, fetch_tile) if tiles else None
+            if pois is None:
+                # Raises HTTPError for bad responses (4xx or 5xx); repeats come from the response cache
+                data = http_get_json(endpoint, params=params, provider="geoapify")
+                pois = [POI.from_geoapify(feature) for feature in (data or {}).get('features', [])[:limit]]
 
-            if not data or 'features' not in data or not data['features']:
+            if not pois:
                 cat_str = ', '.join(categories)
                 return f"No Geoapify POIs found for categories '{cat_str}' near ({latitude}, {longitude}). Check coordinates and categories."
 
-            results_str = f"Geoapify POIs Found (Categories: {', '.join(categories)}):\n\n"
-            for i, feature in enumerate(data['features'][:limit], 1):
-                properties = feature.get('properties', {})
-                # Try to get a meaningful name, fallback to address parts if needed
-                name = properties.get('name', properties.get('address_line1', 'N/A'))
-                address = properties.get('formatted', 'N/A')
-                distance = properties.get('distance', 'N/A')
-                poi_categories = properties.get('categories', [])
-
-                results_str += f"{i}. Name: {name}\n"
-                results_str += f"   Address: {address}\n"
-                if distance != 'N/A':
-                    results_str += f"   Distance: ~{distance}m\n"
-                if poi_categories:
-                    results_str += f"   Main Categories: {', '.join(poi_categories)}\n"
-                results_str += "\n" # Add space between entries
-
-            return results_str
+            return f"Geoapify POIs Found (Categories: {', '.join(categories)}):\n\n" + render(pois, lambda i, poi: (
+                f"{i}. Name: {poi.name}\n"
+                f"   Address: {poi.address}\n"
+                + (f"   Distance: ~{poi.distance}m\n" if poi.distance is not None else "")
+                + (f"   Main Categories: {', '.join(poi.categories)}\n" if poi.categories else "")
+                + "\n"  # Add space between entries
+            ))
 
-        except requests.exceptions.RequestException as e:
+        except HTTP_ERRORS as e:
             print(f"Error calling Geoapify API: {e}") # Log error
             return f"Error calling Geoapify API: {e}"
         except Exception as e:
@@ -0,0 +1,158 @@
+# travel_agent/tools/http_client.py
+"""
+Shared HTTP client for the REST-based tools.
+One process-wide client keeps connections alive in per-host pools, so tool
+calls after the first skip the TCP+TLS handshake. HTTP/2 is used when httpx
+and h2 are installed (TRAVEL_AGENT_HTTP2=0 turns it off); otherwise a pooled
+requests.Session is used. Each host gets a default timeout.
+http_get_json() additionally goes through the shared response cache and, on a
+miss, the provider's rate limiter.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .circuit_breaker import CircuitOpenError, guarded_call
+from .deadline import DeadlineExceeded, current_deadline
+from .response_cache import cached_call
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+POOL_SIZE = int(os.getenv("TRAVEL_AGENT_HTTP_POOL_SIZE", "10"))
+DEFAULT_TIMEOUT = float(os.getenv("TRAVEL_AGENT_HTTP_TIMEOUT", "15"))
+
+# Per-host default timeouts in seconds (connect + read)
+HOST_TIMEOUTS: Dict[str, float] = {
+    "api.yelp.com": 10,
+    "api.geoapify.com": 10,
+    "transit.land": 20,
+}
+
+# Default upstream base URLs; <PROVIDER>_BASE_URL (e.g. YELP_BASE_URL) or a tool's
+# base_url overrides them, e.g. to point load tests at tools.mock_apis. None means
+# the provider's SDK picks its own host.
+DEFAULT_BASE_URLS: Dict[str, Optional[str]] = {
+    "yelp": "https://api.yelp.com",
+    "geoapify": "https://api.geoapify.com",
+    "transitland": "https://transit.land",
+    "amadeus": None,
+    "openweathermap": None,
+}
+
+# Response cache provider for each upstream host
+HOST_PROVIDERS: Dict[str, str] = {
+    "api.yelp.com": "yelp",
+    "api.geoapify.com": "geoapify",
+    "transit.land": "transitland",
+}
+
+# Exceptions raised by either backend, for tools to catch
+HTTP_ERRORS = (requests.exceptions.RequestException, CircuitOpenError, DeadlineExceeded) + ((httpx.HTTPError,) if httpx else ())
+HTTP_TIMEOUTS = (requests.exceptions.Timeout, DeadlineExceeded) + ((httpx.TimeoutException,) if httpx else ())
+
+
+def base_url(provider: str) -> Optional[str]:
+    """Base URL for provider's API, without a trailing slash."""
+    url = os.getenv(f"{provider.upper()}_BASE_URL") or DEFAULT_BASE_URLS.get(provider)
+    return url.rstrip("/") if url else None
+
+
+class HttpClient:
+    """Keep-alive client with per-host connection pools and timeouts."""
+
+    def __init__(self, pool_size: int = POOL_SIZE, timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = DEFAULT_TIMEOUT, http2: Optional[bool] = None):
+        self.timeouts = {**HOST_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        if http2 is None:
+            http2 = HTTP2_AVAILABLE and os.getenv("TRAVEL_AGENT_HTTP2", "1") != "0"
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+
+        if self.http2:
+            # httpx keeps one pool per origin; the limits apply across them
+            self._client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=pool_size * 4, max_keepalive_connections=pool_size),
+            )
+        else:
+            self._client = requests.Session()
+            # pool_connections is the number of per-host pools kept, pool_maxsize the connections in each
+            adapter = HTTPAdapter(pool_connections=max(len(self.timeouts), 4), pool_maxsize=pool_size)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+
+    def timeout_for(self, url: str) -> float:
+        return self.timeouts.get(urlsplit(url).hostname or "", self.default_timeout)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None):
+        """GET url; the response has status_code, headers, text, json() and raise_for_status()."""
+        timeout = timeout if timeout is not None else self.timeout_for(url)
+        # requests drops None-valued params, httpx would send them empty
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        return self._client.get(url, params=params, headers=headers, timeout=timeout)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_client: Optional[HttpClient] = None
+_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """The process-wide client, created on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+             timeout: Optional[float] = None):
+    """GET through the shared client, with the timeout shortened to the kickoff's remaining budget."""
+    client = get_client()
+    deadline = current_deadline()
+    if deadline is None:
+        return client.get(url, params=params, headers=headers, timeout=timeout)
+
+    deadline.check(f"GET {urlsplit(url).hostname}")
+    default = timeout if timeout is not None else client.timeout_for(url)
+    timeout = deadline.timeout(default)
+    try:
+        return client.get(url, params=params, headers=headers, timeout=timeout)
+    except HTTP_TIMEOUTS as e:
+        if timeout < default:
+            # Our budget cut the request short; not the provider's fault
+            raise DeadlineExceeded(f"GET {urlsplit(url).hostname} timed out with the planning budget") from e
+        raise
+
+
+def http_get_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None, provider: Optional[str] = None) -> Any:
+    """Parsed JSON body of a successful GET, served from the response cache when possible.
+
+    Upstream requests wait for the provider's quota and are retried on 429/5xx;
+    while the provider's circuit is open they fail fast with CircuitOpenError, and
+    DeadlineExceeded is raised once the kickoff's budget (tools.deadline) runs out.
+    Raises the backend's HTTP error once retries run out; errors are never cached.
+    """
+    provider = provider or HOST_PROVIDERS.get(urlsplit(url).hostname or "", "http")
+
+    def load():
+        response = http_get(url, params=params, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return cached_call(provider, {"url": url, "params": params or {}}, lambda: guarded_call(provider, load))
@@ -0,0 +1,413 @@
+# travel_agent/tools/mock_apis.py
+"""
+Local stand-ins for the tools' upstream APIs, for load and capacity tests.
+One HTTP server answers the Yelp business search, Geoapify places,
+Transitland stops, Amadeus (OAuth token, flight and hotel offers) and
+OpenWeatherMap current-weather endpoints with synthetic data. The same query
+always gets the same data. Each provider has a profile with a latency
+distribution, an error rate (503), a random-throttle rate and a request rate
+above which it answers 429 with Retry-After.
+
+Point the tools at it with the *_BASE_URL variables from MockAPIServer.env():
+
+    with MockAPIServer(profiles) as server:
+        os.environ.update(server.env())
+        ...
+
+or run it standalone: python -m tools.mock_apis --port 8900 --config mock_apis.yaml
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import yaml
+
+from .geo_tiles import haversine
+
+# latency: {dist: fixed, value} | {dist: uniform, low, high} | {dist: lognormal, median, sigma} (seconds)
+# error_rate: share of requests answered 503; throttle_rate: share answered 429 at random;
+# rate_limit: requests per second above which requests get 429 (0 = unlimited)
+DEFAULT_PROFILE: Dict[str, Any] = {
+    'latency': {'dist': 'lognormal', 'median': 0.05, 'sigma': 0.5},
+    'error_rate': 0.0,
+    'throttle_rate': 0.0,
+    'rate_limit': 0,
+    'retry_after': 1,
+}
+
+# Environment variables the tools read their base URL from
+BASE_URL_VARS = {
+    'yelp': 'YELP_BASE_URL',
+    'geoapify': 'GEOAPIFY_BASE_URL',
+    'transitland': 'TRANSITLAND_BASE_URL',
+    'amadeus': 'AMADEUS_BASE_URL',
+    'openweathermap': 'OPENWEATHERMAP_BASE_URL',
+}
+
+# Credentials the tools require before they call out; any value is accepted by the mock
+MOCK_CREDENTIALS = ['YELP_API_KEY', 'GEOAPIFY_API_KEY', 'TRANSITLAND_API_KEY', 'OPENWEATHERMAP_API_KEY',
+                    'AMADEUS_CLIENT_ID', 'AMADEUS_CLIENT_SECRET']
+
+NAMES = ["Golden", "Blue", "Old Town", "Harbor", "Garden", "Corner", "Royal", "Little", "Grand", "Market"]
+NOUNS = ["Bistro", "Kitchen", "Tavern", "Café", "Grill", "Hotel", "Inn", "House", "Square", "Gallery"]
+CUISINES = ["Italian", "Tapas Bars", "Seafood", "Bakeries", "Ramen", "French", "Street Food", "Wine Bars"]
+CARRIERS = ["AF", "BA", "LH", "IB", "KL", "UA", "DL", "AA"]
+# Geoapify places sit at fixed spots: each cell of a world grid holds
+# 0-2*GEOAPIFY_PLACES_PER_CELL places per category set, so overlapping areas share their places
+GEOAPIFY_CELL_DEGREES = 0.01
+GEOAPIFY_PLACES_PER_CELL = 12
+WEATHER = ["clear sky", "few clouds", "scattered clouds", "light rain", "overcast clouds", "moderate rain"]
+
+
+def sample_latency(latency: Dict[str, Any], rng: random.Random) -> float:
+    dist = latency.get('dist', 'fixed')
+    if dist == 'uniform':
+        return rng.uniform(latency.get('low', 0), latency.get('high', 0))
+    if dist == 'lognormal':
+        return rng.lognormvariate(math.log(max(latency.get('median', 0.05), 1e-6)), latency.get('sigma', 0.5))
+    return float(latency.get('value', 0))
+
+
+def _seeded(path: str, query: Dict[str, str]) -> random.Random:
+    digest = hashlib.sha256(json.dumps([path, sorted(query.items())]).encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _place_name(rng: random.Random) -> str:
+    return f"{rng.choice(NAMES)} {rng.choice(NOUNS)}"
+
+
+def _limit(query: Dict[str, str], key: str, default: int, cap: int) -> int:
+    try:
+        return max(0, min(int(query.get(key, default)), cap))
+    except ValueError:
+        return default
+
+
+def yelp_search(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    city = query.get('location', 'Somewhere').title()
+    businesses = []
+    for i in range(_limit(query, 'limit', 20, 50)):
+        name = _place_name(rng)
+        business_id = f"mock-{rng.getrandbits(48):012x}"
+        # Coordinates come from the id so they don't shift the other fields' draws
+        spot = random.Random(business_id)
+        businesses.append({
+            'id': business_id,
+            'name': name,
+            'rating': rng.choice([3.5, 4.0, 4.5, 5.0]),
+            'review_count': rng.randint(5, 3000),
+            'price': "$" * rng.randint(1, 4),
+            'categories': [{'alias': c.lower().replace(" ", "_"), 'title': c} for c in rng.sample(CUISINES, 2)],
+            'location': {'display_address': [f"{rng.randint(1, 200)} {rng.choice(NAMES)} Street", city]},
+            'display_phone': f"+1 555 {rng.randint(1000000, 9999999)}",
+            'coordinates': {'latitude': round(spot.uniform(-60, 60), 6), 'longitude': round(spot.uniform(-180, 180), 6)},
+            'url': f"https://www.yelp.com/biz/mock-{i}",
+        })
+    return 200, {'businesses': businesses, 'total': len(businesses) * 10}
+
+
+def _geoapify_area(query: Dict[str, str]) -> Tuple[Tuple[float, float, float, float], Callable[[float, float], bool]]:
+    """Bounds (south, west, north, east) and containment test of a Geoapify "circle:" or "rect:" filter."""
+    shape, _, values = query.get('filter', '').partition(':')
+    try:
+        numbers = [float(v) for v in values.split(',')]
+    except ValueError:
+        numbers = []
+    if shape == 'rect' and len(numbers) == 4:
+        south, north = sorted((numbers[1], numbers[3]))
+        west, east = sorted((numbers[0], numbers[2]))
+        return (south, west, north, east), lambda lat, lon: south <= lat <= north and west <= lon <= east
+    lon, lat, radius = numbers if shape == 'circle' and len(numbers) == 3 else (0.0, 0.0, 5000.0)
+    dlat = radius / 111320
+    dlon = radius / (111320 * max(math.cos(math.radians(lat)), 1e-6))
+    return ((lat - dlat, lon - dlon, lat + dlat, lon + dlon),
+            lambda plat, plon: haversine(lat, lon, plat, plon) <= radius)
+
+
+def _geoapify_cell(row: int, col: int, categories: str) -> List[Dict[str, Any]]:
+    """The places of one world grid cell; they are the same whichever query reaches them."""
+    spot = random.Random(f"{categories}|{row}|{col}")
+    places = []
+    for _ in range(spot.randint(0, 2 * GEOAPIFY_PLACES_PER_CELL)):
+        name = _place_name(spot)
+        places.append({
+            'place_id': f"mock-{spot.getrandbits(48):012x}",
+            'name': name,
+            'formatted': f"{name}, {spot.randint(1, 200)} {spot.choice(NAMES)} Avenue",
+            'lat': round((row + spot.random()) * GEOAPIFY_CELL_DEGREES, 7),
+            'lon': round((col + spot.random()) * GEOAPIFY_CELL_DEGREES, 7),
+            'categories': categories.split(','),
+        })
+    return places
+
+
+def geoapify_places(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    categories = query.get('categories', 'tourism.attraction')
+    (south, west, north, east), inside = _geoapify_area(query)
+    # Ordered by distance from the bias point (the filter's center without one)
+    try:
+        bias_lon, bias_lat = (float(v) for v in query['bias'].partition(':')[2].split(','))
+    except (KeyError, ValueError):
+        bias_lat, bias_lon = (south + north) / 2, (west + east) / 2
+    found = []
+    for row in range(math.floor(south / GEOAPIFY_CELL_DEGREES), math.floor(north / GEOAPIFY_CELL_DEGREES) + 1):
+        for col in range(math.floor(west / GEOAPIFY_CELL_DEGREES), math.floor(east / GEOAPIFY_CELL_DEGREES) + 1):
+            for place in _geoapify_cell(row, col, categories):
+                if inside(place['lat'], place['lon']):
+                    found.append({**place, 'distance': round(haversine(bias_lat, bias_lon, place['lat'], place['lon']))})
+    found.sort(key=lambda p: (p['distance'], p['place_id']))
+    offset = _limit(query, 'offset', 0, len(found))
+    features = [{'type': 'Feature', 'properties': place}
+                for place in found[offset:offset + _limit(query, 'limit', 20, 100)]]
+    return 200, {'type': 'FeatureCollection', 'features': features}
+
+
+def transitland_stops(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    agencies = [f"{rng.choice(NAMES)} Transit", "City Metro"]
+    stops = [{
+        'stop_name': f"{rng.choice(NAMES)} Station",
+        'routes': [{'route_name': f"{rng.choice(['Bus', 'Tram', 'Line'])} {rng.randint(1, 99)}",
+                    'agency_name': rng.choice(agencies)} for _ in range(rng.randint(1, 4))],
+    } for _ in range(rng.randint(1, 12))]
+    return 200, {'stops': stops}
+
+
+def amadeus_token(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    return 200, {'type': 'amadeusOAuth2Token', 'access_token': 'mock-token', 'token_type': 'Bearer',
+                 'expires_in': 1799, 'state': 'approved'}
+
+
+def amadeus_flights(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    offers = []
+    for _ in range(_limit(query, 'max', 5, 250)):
+        carrier = rng.choice(CARRIERS)
+        segments = [{'carrierCode': rng.choice([carrier, rng.choice(CARRIERS)])} for _ in range(rng.randint(1, 3))]
+        offers.append({
+            'type': 'flight-offer',
+            'price': {'total': f"{rng.uniform(80, 1500):.2f}", 'currency': query.get('currencyCode', 'USD')},
+            'itineraries': [{'segments': segments}],
+        })
+    return 200, {'data': offers}
+
+
+def amadeus_hotels(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    city = query.get('cityCode', 'XXX')
+    hotels = [{
+        'hotel': {'name': f"{_place_name(rng)} Hotel", 'hotelId': f"MC{city}{rng.randint(100, 999)}",
+                  'rating': str(rng.randint(2, 5)),
+                  'address': {'lines': [f"{rng.randint(1, 200)} {rng.choice(NAMES)} Road"],
+                              'cityName': city, 'countryCode': 'XX'}},
+        'offers': [{'price': {'total': f"{rng.uniform(60, 600):.2f}", 'currency': 'USD'}}],
+    } for _ in range(rng.randint(3, 15))]
+    return 200, {'data': hotels}
+
+
+def owm_weather(query: Dict[str, str], rng: random.Random) -> Tuple[int, Any]:
+    temp = round(rng.uniform(-5, 35), 1)
+    return 200, {
+        'name': query.get('q', 'Somewhere').split(',')[0],
+        'weather': [{'description': rng.choice(WEATHER)}],
+        'main': {'temp': temp, 'feels_like': round(temp - rng.uniform(0, 3), 1), 'temp_min': round(temp - 3, 1),
+                 'temp_max': round(temp + 3, 1), 'humidity': rng.randint(20, 95)},
+        'wind': {'speed': round(rng.uniform(0, 12), 1), 'deg': rng.randint(0, 359)},
+        'clouds': {'all': rng.randint(0, 100)},
+    }
+
+
+# (method, path) -> (provider, generator)
+ROUTES: Dict[Tuple[str, str], Tuple[str, Callable[[Dict[str, str], random.Random], Tuple[int, Any]]]] = {
+    ('GET', '/v3/businesses/search'): ('yelp', yelp_search),
+    ('GET', '/v2/places'): ('geoapify', geoapify_places),
+    ('GET', '/api/v2/rest/stops'): ('transitland', transitland_stops),
+    ('POST', '/v1/security/oauth2/token'): ('amadeus', amadeus_token),
+    ('GET', '/v2/shopping/flight-offers'): ('amadeus', amadeus_flights),
+    ('GET', '/v2/shopping/hotel-offers'): ('amadeus', amadeus_hotels),
+    ('GET', '/v3/shopping/hotel-offers'): ('amadeus', amadeus_hotels),
+    ('GET', '/data/2.5/weather'): ('openweathermap', owm_weather),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            # OAuth form posts; drain the body so the connection can be reused
+            query.update(parse_qsl(self.rfile.read(length).decode("utf-8", "replace")))
+        route = ROUTES.get((method, parts.path))
+        if route is None:
+            self._send(404, {'error': f"No mock for {method} {parts.path}"})
+            return
+        provider, generate = route
+        status, body, headers = self.server.mock.respond(provider, parts.path, query, generate)
+        self._send(status, body, headers)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    mock: "MockAPIServer"
+
+
+class MockAPIServer:
+    """The stand-in API server; profiles are per-provider overrides of DEFAULT_PROFILE."""
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None, host: str = "127.0.0.1",
+                 port: int = 0, defaults: Optional[Dict[str, Any]] = None, seed: int = 0):
+        self.defaults = {**DEFAULT_PROFILE, **(defaults or {})}
+        self.profiles = profiles or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self.counts: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def profile(self, provider: str) -> Dict[str, Any]:
+        return {**self.defaults, **(self.profiles.get(provider) or {})}
+
+    def _over_rate(self, provider: str, rate: float) -> bool:
+        """Token bucket with one second of burst; True when the request exceeds rate."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(provider, (rate, now))
+        tokens = min(rate, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self._buckets[provider] = (tokens, now)
+            return True
+        self._buckets[provider] = (tokens - 1, now)
+        return False
+
+    def respond(self, provider: str, path: str, query: Dict[str, str],
+                generate: Callable[[Dict[str, str], random.Random], Tuple[int, Any]]):
+        """(status, body, headers) for one request, after the profile's simulated latency."""
+        profile = self.profile(provider)
+        with self._lock:
+            delay = sample_latency(profile['latency'], self._rng)
+            roll = self._rng.random()
+            throttled = (profile['rate_limit'] and self._over_rate(provider, profile['rate_limit'])) \
+                or roll < profile['throttle_rate']
+            failed = not throttled and roll < profile['throttle_rate'] + profile['error_rate']
+        if delay > 0:
+            time.sleep(delay)
+
+        if throttled:
+            status, body = 429, {'error': {'code': 'TOO_MANY_REQUESTS', 'description': 'Mock rate limit'}}
+            headers = {'Retry-After': str(profile['retry_after'])}
+        elif failed:
+            status, body, headers = 503, {'error': {'code': 'SERVICE_UNAVAILABLE'}}, {}
+        else:
+            status, body = generate(query, _seeded(path, query))
+            headers = {}
+        with self._lock:
+            self.counts[provider][status] += 1
+        return status, body, headers
+
+    def env(self, credentials: bool = True) -> Dict[str, str]:
+        """Environment pointing every tool at this server (plus placeholder credentials if unset)."""
+        env = {var: self.base_url for var in BASE_URL_VARS.values()}
+        if credentials:
+            env.update({var: os.environ.get(var) or "mock-key" for var in MOCK_CREDENTIALS})
+        return env
+
+    def stats(self) -> Dict[str, Dict[int, int]]:
+        """Responses sent per provider and status code."""
+        with self._lock:
+            return {provider: dict(codes) for provider, codes in sorted(self.counts.items())}
+
+    def start(self) -> "MockAPIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-apis", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockAPIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def load_profiles(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """(defaults, per-provider profiles) from a YAML file shaped like config/rate_limits.yaml."""
+    with open(path, 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file) or {}
+    return config.get('defaults') or {}, config.get('providers') or {}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve stand-ins for the travel tools' upstream APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--config", help="YAML with 'defaults' and per-provider 'providers' profiles")
+    parser.add_argument("--latency-ms", type=float, help="Median latency for every provider")
+    parser.add_argument("--error-rate", type=float, help="Share of requests answered 503")
+    parser.add_argument("--throttle-rate", type=float, help="Share of requests answered 429")
+    parser.add_argument("--rate-limit", type=float, help="Requests per second per provider before 429s")
+    args = parser.parse_args(argv)
+
+    defaults, profiles = load_profiles(args.config) if args.config else ({}, {})
+    if args.latency_ms is not None:
+        defaults['latency'] = {'dist': 'lognormal', 'median': args.latency_ms / 1000, 'sigma': 0.5}
+    for option, key in ((args.error_rate, 'error_rate'), (args.throttle_rate, 'throttle_rate'),
+                        (args.rate_limit, 'rate_limit')):
+        if option is not None:
+            defaults[key] = option
+
+    server = MockAPIServer(profiles, host=args.host, port=args.port, defaults=defaults)
+    print(f"Mock APIs listening on {server.base_url}; point the tools at it with:")
+    for var, value in server.env(credentials=False).items():
+        print(f"  export {var}={value}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+        print(json.dumps(server.stats(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# travel_agent/tools/ranking.py
+"""
+Local re-ranking of dining candidates against the trip being planned.
+Yelp returns businesses in its own order; the restaurant tool instead fetches
+a larger candidate pool and keeps the best few for this trip. Candidates are
+held column-wise in NumPy arrays (rating, log review count, price tier,
+category one-hot, coordinates), scored against the trip's budget, interests
+and travel style in one vectorized pass, and picked with at most
+max_per_category businesses sharing a primary category.
+
+The scheduler runs each task inside trip_scope(inputs), so tools can see the
+kickoff inputs of the trip they are working for (current_trip()).
+"""
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    print("Warning: numpy not found. Dining candidates will keep Yelp's order.")
+
+from .records import Business
+
+_trip: ContextVar[Optional[Dict[str, Any]]] = ContextVar("travel_agent_trip", default=None)
+
+# Yelp price tiers (1=$ ... 4=$$$$) suiting each budget preference
+BUDGET_PRICE_TIERS = {
+    'budget': (1, 2),
+    'moderate': (2, 3),
+    'luxury': (3, 4),
+}
+
+# Score weights of (rating, popularity, price fit, interest match, proximity to the stay)
+DEFAULT_WEIGHTS = (1.0, 0.5, 0.8, 0.6, 0.4)
+TRAVEL_STYLE_WEIGHTS = {
+    'sightseeing & culture': (1.0, 0.6, 0.8, 0.6, 0.5),
+    'relaxation & leisure': (1.0, 0.4, 0.8, 0.4, 0.9),
+    # Hidden gems over the most reviewed places
+    'adventure & activities': (1.0, -0.3, 0.8, 0.8, 0.2),
+    'food & culinary': (1.3, 0.3, 0.6, 1.0, 0.2),
+    'family-friendly': (0.8, 0.8, 1.0, 0.4, 0.7),
+}
+
+# Yelp categories that serve an interest whose words don't appear in them
+INTEREST_CATEGORIES = {
+    'local cuisine': ('street food', 'food stalls', 'markets', 'local flavor', 'farmers market'),
+    'nightlife': ('bars', 'wine bars', 'cocktail bars', 'pubs', 'tapas bars'),
+    'family activities': ('pizza', 'ice cream', 'bakeries', 'desserts'),
+    'nature & outdoors': ('picnic', 'beer gardens'),
+}
+STOP_WORDS = {'and', 'the', 'of', 'local', 'food', '&'}
+
+DEFAULT_MAX_PER_CATEGORY = 3
+# Proximity halves roughly every 1.4 km from the stay
+PROXIMITY_KM = 2.0
+EARTH_RADIUS_KM = 6371.0
+
+
+def current_trip() -> Optional[Dict[str, Any]]:
+    """Kickoff inputs of the trip this code runs for, or None outside a kickoff."""
+    return _trip.get()
+
+
+@contextmanager
+def trip_scope(inputs: Optional[Dict[str, Any]]) -> Iterator[Optional[Dict[str, Any]]]:
+    """Make inputs the current trip for the code inside the block (None clears it)."""
+    token = _trip.set(inputs)
+    try:
+        yield inputs
+    finally:
+        _trip.reset(token)
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.split(r"[^a-z&]+", text.lower()) if w and w not in STOP_WORDS]
+
+
+@dataclass(frozen=True)
+class DiningProfile:
+    """What a trip wants from its dining candidates."""
+    price_tiers: Tuple[int, ...] = ()
+    interests: Tuple[str, ...] = ()
+    travel_style: str = ""
+    stay: Optional[Tuple[float, float]] = None
+
+    @classmethod
+    def from_inputs(cls, inputs: Dict[str, Any]) -> "DiningProfile":
+        interests = inputs.get('interests') or ()
+        if isinstance(interests, str):
+            interests = interests.split(",")
+        stay = inputs.get('stay_coordinates')
+        if isinstance(stay, str):
+            stay = stay.split(",")
+        try:
+            stay = (float(stay[0]), float(stay[1])) if stay else None
+        except (ValueError, IndexError):
+            print(f"Warning: ignoring stay_coordinates {inputs.get('stay_coordinates')!r}; expected 'latitude,longitude'")
+            stay = None
+        return cls(
+            price_tiers=BUDGET_PRICE_TIERS.get(str(inputs.get('budget') or '').strip().lower(), ()),
+            interests=tuple(" ".join(str(i).lower().split()) for i in interests if str(i).strip()),
+            travel_style=" ".join(str(inputs.get('travel_style') or '').lower().split()),
+            stay=stay,
+        )
+
+    @property
+    def weights(self) -> Tuple[float, ...]:
+        return TRAVEL_STYLE_WEIGHTS.get(self.travel_style, DEFAULT_WEIGHTS)
+
+    def serves_interest(self, category: str) -> bool:
+        category = category.lower()
+        wanted = {w for interest in self.interests for w in _words(interest)}
+        if wanted & set(_words(category)):
+            return True
+        return any(category in INTEREST_CATEGORIES.get(interest, ()) for interest in self.interests)
+
+
+def price_tier(price: str) -> int:
+    """Yelp price tier (1-4) of "$$", "€€€", "££" or "¥"; 0 when missing or not a tier."""
+    price = (price or "").strip()
+    if 1 <= len(price) <= 4 and len(set(price)) == 1 and not price[0].isalnum():
+        return len(price)
+    return 0
+
+
+def current_dining_profile() -> Optional[DiningProfile]:
+    """Dining profile of the current trip, or None outside a kickoff."""
+    trip = _trip.get()
+    return DiningProfile.from_inputs(trip) if trip is not None else None
+
+
+class DiningCandidates:
+    """Businesses as columns: one array per feature, one row per business."""
+
+    def __init__(self, businesses: Sequence[Business]):
+        self.businesses = list(businesses)
+        n = len(self.businesses)
+        self.rating = np.array([b.rating if b.rating is not None else np.nan for b in self.businesses], dtype=float)
+        self.log_reviews = np.log1p(np.array([max(b.review_count or 0, 0) for b in self.businesses], dtype=float))
+        self.price_tier = np.array([price_tier(b.price) for b in self.businesses], dtype=float)
+        self.latitude = np.array([b.latitude if b.latitude is not None else np.nan for b in self.businesses],
+                                 dtype=float)
+        self.longitude = np.array([b.longitude if b.longitude is not None else np.nan for b in self.businesses],
+                                  dtype=float)
+
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, business in enumerate(self.businesses):
+            for category in business.categories:
+                if category:
+                    rows.append(i)
+                    cols.append(vocabulary.setdefault(category.lower(), len(vocabulary)))
+        self.categories = list(vocabulary)
+        self.one_hot = np.zeros((n, len(vocabulary)), dtype=bool)
+        self.one_hot[rows, cols] = True
+        # Yelp lists a business's main category first; -1 for none
+        self.primary = np.full(n, -1, dtype=np.int64)
+        firsts = [(i, vocabulary[b.categories[0].lower()]) for i, b in enumerate(self.businesses)
+                  if b.categories and b.categories[0]]
+        if firsts:
+            index, category = zip(*firsts)
+            self.primary[list(index)] = category
+
+    def __len__(self) -> int:
+        return len(self.businesses)
+
+    def features(self, profile: DiningProfile) -> "np.ndarray":
+        """(n, 5) matrix of rating, popularity, price fit, interest match and proximity, each in [0, 1]."""
+        n = len(self)
+        rating = np.nan_to_num((self.rating - 1.0) / 4.0, nan=0.0).clip(0.0, 1.0)
+        top = self.log_reviews.max(initial=0.0)
+        popularity = self.log_reviews / top if top > 0 else np.zeros(n)
+
+        if profile.price_tiers:
+            gap = np.abs(self.price_tier[:, None] - np.array(profile.price_tiers, dtype=float)[None, :]).min(axis=1)
+            price_fit = np.where(self.price_tier > 0, 1.0 - gap / 3.0, 0.5)
+        else:
+            price_fit = np.full(n, 0.5)
+
+        wanted = np.array([profile.serves_interest(c) for c in self.categories], dtype=bool)
+        interest = (self.one_hot & wanted).any(axis=1).astype(float) if wanted.size else np.zeros(n)
+
+        if profile.stay is not None:
+            lat, lon = np.radians(self.latitude), np.radians(self.longitude)
+            stay_lat, stay_lon = np.radians(profile.stay[0]), np.radians(profile.stay[1])
+            h = (np.sin((lat - stay_lat) / 2) ** 2
+                 + np.cos(stay_lat) * np.cos(lat) * np.sin((lon - stay_lon) / 2) ** 2)
+            km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h.clip(0.0, 1.0)))
+            proximity = np.nan_to_num(np.exp(-km / PROXIMITY_KM), nan=0.0)
+        else:
+            proximity = np.zeros(n)
+
+        return np.column_stack([rating, popularity, price_fit, interest, proximity])
+
+    def scores(self, profile: DiningProfile) -> "np.ndarray":
+        return self.features(profile) @ np.array(profile.weights, dtype=float)
+
+    def top(self, profile: DiningProfile, k: int,
+            max_per_category: Optional[int] = DEFAULT_MAX_PER_CATEGORY) -> List[Business]:
+        """The k best scoring businesses, at most max_per_category per primary category (ties keep Yelp's order)."""
+        n = len(self)
+        if n == 0 or k <= 0:
+            return []
+        score = self.scores(profile)
+        position = np.arange(n)
+        eligible = np.ones(n, dtype=bool)
+        if max_per_category is not None:
+            # Rank of each business within its primary category, best first
+            order = np.lexsort((position, -score, self.primary))
+            group = self.primary[order]
+            starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+            rank = position - np.repeat(starts, np.diff(np.r_[starts, n]))
+            eligible[order] = (rank < max_per_category) | (group < 0)
+        chosen = np.flatnonzero(eligible)
+        chosen = chosen[np.lexsort((chosen, -score[chosen]))][:k]
+        return [self.businesses[i] for i in chosen]
+
+
+def rank_businesses(businesses: Sequence[Business], profile: DiningProfile, k: int,
+                    max_per_category: Optional[int] = DEFAULT_MAX_PER_CATEGORY) -> List[Business]:
+    """The k businesses that best suit profile; the first k in Yelp's order without numpy."""
+    if np is None:
+        return list(businesses)[:k]
+    return DiningCandidates(businesses).top(profile, k, max_per_category)
@@ -0,0 +1,261 @@
+# travel_agent/tools/rate_limit.py
+"""
+Per-provider rate limiting and retries for the tools' upstream calls.
+Each provider has a token bucket (rate, burst) kept in SQLite, so every thread
+and every process on the machine draws from the same quota. Calls that fail
+with 429, a 5xx or a connection error are retried with jittered exponential
+backoff; a Retry-After header takes precedence, and a 429 pauses the
+provider's bucket for everyone until the server's wait is over. Timeouts are
+not retried: each one has already used up the host's whole timeout.
+
+Quotas are read from config/rate_limits.yaml (or TRAVEL_AGENT_RATE_LIMITS).
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import yaml
+import requests
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from tenacity.stop import stop_base
+from tenacity.wait import wait_base
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .deadline import DeadlineExceeded, check_deadline, current_deadline
+
+DEFAULT_CACHE_DIR = os.getenv("TRAVEL_AGENT_CACHE_DIR", ".cache")
+DEFAULT_QUOTAS_PATH = os.getenv(
+    "TRAVEL_AGENT_RATE_LIMITS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "rate_limits.yaml"),
+)
+
+# Used when the YAML file is missing or unreadable
+DEFAULT_QUOTAS: Dict[str, Any] = {
+    'defaults': {'rate': 5, 'burst': 5, 'max_attempts': 4, 'max_wait': 30,
+                 'failure_rate': 0.5, 'min_calls': 5, 'window': 20, 'open_seconds': 30},
+    'providers': {},
+}
+
+# Upstream failures even though there is no HTTP status to look at
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    ConnectionError, TimeoutError) + ((httpx.TransportError,) if httpx else ())
+# Transient failures that are not retried (requests' ConnectTimeout is a ConnectionError too)
+TIMEOUT_ERRORS = (requests.exceptions.Timeout, TimeoutError) + ((httpx.TimeoutException,) if httpx else ())
+
+
+def load_quotas(path: str = DEFAULT_QUOTAS_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            quotas = yaml.safe_load(file) or {}
+    except (OSError, yaml.YAMLError) as e:
+        print(f"Warning: could not load rate limits from {path} ({e}); using defaults")
+        return DEFAULT_QUOTAS
+    return {
+        'defaults': {**DEFAULT_QUOTAS['defaults'], **(quotas.get('defaults') or {})},
+        'providers': quotas.get('providers') or {},
+    }
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a requests/httpx/Amadeus error, if any."""
+    return getattr(getattr(exc, 'response', None), 'status_code', None)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from the error response's Retry-After header (delta or HTTP date)."""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def is_transient(exc: BaseException) -> bool:
+    """A failure of the upstream itself (429, 5xx, timeout, connection error) rather than of the request."""
+    status = status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """A transient failure worth another attempt: anything but a timeout."""
+    return is_transient(exc) and not isinstance(exc, TIMEOUT_ERRORS)
+
+
+class wait_retry_after(wait_base):
+    """The server's Retry-After when it sent one, otherwise the fallback backoff; capped at max_wait."""
+
+    def __init__(self, fallback: wait_base, max_wait: float):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        delay = retry_after(exc) if exc is not None else None
+        return min(self.max_wait, delay if delay is not None else self.fallback(retry_state))
+
+
+class stop_at_deadline(stop_base):
+    """Stop retrying when the next backoff would outlast the kickoff's remaining budget."""
+
+    def __call__(self, retry_state) -> bool:
+        deadline = current_deadline()
+        return deadline is not None and deadline.remaining() <= (retry_state.upcoming_sleep or 0)
+
+
+class RateLimiter:
+    """Token buckets per provider, stored in SQLite so they are shared across processes."""
+
+    def __init__(self, quotas: Optional[Dict[str, Any]] = None, path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        self.quotas = quotas if quotas is not None else load_quotas()
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "rate_limits.sqlite")
+        self.clock = clock
+        self.sleep = sleep
+        self.waited: Dict[str, float] = defaultdict(float)
+        self.retries: Dict[str, int] = defaultdict(int)
+
+        self._lock = threading.Lock()
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: rate limit state unavailable ({e}); limiting this process only")
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " provider TEXT PRIMARY KEY, tokens REAL, updated REAL, paused_until REAL)"
+        )
+
+    def quota(self, provider: str) -> Dict[str, Any]:
+        return {**self.quotas['defaults'], **(self.quotas['providers'].get(provider) or {})}
+
+    def _update(self, provider: str, change: Callable[[float, float, float], tuple]) -> Any:
+        """Atomically refill provider's bucket and apply change(tokens, paused_until, now)."""
+        quota = self.quota(provider)
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so other processes queue behind us
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = self._conn.execute(
+                    "SELECT tokens, updated, paused_until FROM buckets WHERE provider = ?", (provider,)
+                ).fetchone()
+                tokens, paused_until = float(quota['burst']), 0.0
+                if row:
+                    tokens = min(float(quota['burst']), row[0] + max(0.0, now - row[1]) * quota['rate'])
+                    paused_until = row[2]
+                tokens, paused_until, result = change(tokens, paused_until, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (provider, tokens, updated, paused_until) VALUES (?, ?, ?, ?)",
+                    (provider, tokens, now, paused_until)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def _take(self, provider: str) -> float:
+        """Take a token if one is available; otherwise the seconds until one will be."""
+        rate = self.quota(provider)['rate']
+
+        def change(tokens, paused_until, now):
+            if now < paused_until:
+                return tokens, paused_until, paused_until - now
+            if tokens >= 1:
+                return tokens - 1, paused_until, 0.0
+            return tokens, paused_until, (1 - tokens) / rate
+
+        return self._update(provider, change)
+
+    def acquire(self, provider: str) -> None:
+        """Block until provider's quota allows one more request (or raise if the budget can't cover the wait)."""
+        if self.quota(provider)['rate'] <= 0:
+            return
+        deadline = current_deadline()
+        while True:
+            wait = self._take(provider)
+            if wait <= 0:
+                return
+            if deadline is not None and wait >= deadline.remaining():
+                raise DeadlineExceeded(f"{provider} quota frees up after the planning budget runs out")
+            self.waited[provider] += wait
+            self.sleep(wait)
+
+    def pause(self, provider: str, seconds: float) -> None:
+        """Hold every caller of provider back for seconds (after a 429)."""
+        self._update(provider, lambda tokens, paused_until, now: (0.0, max(paused_until, now + seconds), None))
+
+    def call(self, provider: str, call: Callable[[], Any],
+             guard: Optional[Callable[[Callable[[], Any]], Any]] = None) -> Any:
+        """
+        call() within provider's quota, retried with backoff on 429/5xx and connection errors.
+        guard, if given, wraps every attempt (quota wait included), e.g. a circuit breaker's call.
+        """
+        quota = self.quota(provider)
+
+        def before_sleep(retry_state):
+            self.retries[provider] += 1
+            exc = retry_state.outcome.exception()
+            if status_code(exc) == 429:
+                self.pause(provider, retry_state.next_action.sleep)
+            print(f"{provider} request failed ({exc}); retrying in {retry_state.next_action.sleep:.1f}s")
+
+        retrying = Retrying(
+            stop=stop_after_attempt(max(1, int(quota['max_attempts']))) | stop_at_deadline(),
+            wait=wait_retry_after(wait_exponential_jitter(max=quota['max_wait']), quota['max_wait']),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=before_sleep,
+            sleep=self.sleep,
+            reraise=True,
+        )
+
+        def attempt():
+            check_deadline(f"{provider} request")
+            self.acquire(provider)
+            return call()
+
+        return retrying(lambda: guard(attempt)) if guard else retrying(attempt)
+
+    def stats(self) -> Dict[str, Any]:
+        """Seconds spent waiting for quota and retries made, per provider."""
+        return {
+            name: {'waited': round(self.waited[name], 3), 'retries': self.retries[name]}
+            for name in sorted(set(self.waited) | set(self.retries))
+        }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The process-wide limiter, created on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def rate_limited(provider: str, call: Callable[[], Any],
+                 guard: Optional[Callable[[Callable[[], Any]], Any]] = None) -> Any:
+    """call() through the shared limiter (quota + retries), each attempt wrapped in guard."""
+    return get_rate_limiter().call(provider, call, guard)
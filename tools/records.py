@@ -0,0 +1,285 @@
+# travel_agent/tools/records.py
+"""
+Typed results of the tools' API calls.
+Each tool parses its upstream response into these compact, immutable records
+and only renders them to text when handing the result to the LLM: as the
+familiar markdown, or with TRAVEL_AGENT_TOOL_RENDER=compact as one short line
+per record, which keeps tool observations (and the prompts they end up in)
+smaller. Records are hashable and carry a `key`, so results from different
+tools or queries can be deduplicated with unique().
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+RENDER_MODES = ('markdown', 'compact')
+
+R = TypeVar('R')
+
+
+_warned_modes = set()
+
+
+def render_mode() -> str:
+    """'markdown' (default) or 'compact', from TRAVEL_AGENT_TOOL_RENDER; an unknown value falls back to markdown."""
+    mode = os.getenv("TRAVEL_AGENT_TOOL_RENDER", "markdown").strip().lower()
+    if mode not in RENDER_MODES:
+        if mode not in _warned_modes:
+            _warned_modes.add(mode)
+            print(f"Warning: Unknown tool render mode '{mode}' in TRAVEL_AGENT_TOOL_RENDER, expected one of: "
+                  f"{', '.join(RENDER_MODES)}. Using markdown.")
+        return 'markdown'
+    return mode
+
+
+def render(records: Sequence[Any], markdown: Callable[[int, Any], str], mode: Optional[str] = None) -> str:
+    """records as markdown(index, record) blocks, or one compact() line each."""
+    if (mode or render_mode()) == 'compact':
+        return "".join(f"{i}. {record.compact()}\n" for i, record in enumerate(records, 1))
+    return "".join(markdown(i, record) for i, record in enumerate(records, 1))
+
+
+def unique(records: Iterable[R]) -> List[R]:
+    """records without repeats (by key), first occurrence kept."""
+    seen = set()
+    kept = []
+    for record in records:
+        if record.key not in seen:
+            seen.add(record.key)
+            kept.append(record)
+    return kept
+
+
+def _or(value: Any, default: str = 'N/A') -> Any:
+    return default if value is None else value
+
+
+def _join(values: Iterable[Any], sep: str = ", ") -> str:
+    return sep.join(str(v) for v in values if v)
+
+
+@dataclass(frozen=True, slots=True)
+class Business:
+    """A Yelp business."""
+    id: str
+    name: str
+    rating: Optional[float]
+    review_count: int
+    price: str
+    categories: Tuple[str, ...]
+    address: str
+    phone: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @classmethod
+    def from_yelp(cls, business: Dict[str, Any]) -> "Business":
+        coordinates = business.get("coordinates") or {}
+        return cls(
+            id=business.get("id") or "",
+            name=business.get("name", "Unknown"),
+            rating=business.get("rating"),
+            review_count=business.get("review_count", 0),
+            # Yelp leaves price out when it doesn't know it
+            price=business.get("price") or "",
+            categories=tuple(cat.get("title", "") for cat in business.get("categories", [])),
+            address=", ".join(business.get("location", {}).get("display_address", ["Address unavailable"])),
+            phone=business.get("display_phone", "Phone unavailable"),
+            latitude=coordinates.get("latitude"),
+            longitude=coordinates.get("longitude"),
+        )
+
+    @property
+    def key(self) -> Hashable:
+        return ('yelp', self.id or f"{self.name}|{self.address}")
+
+    def compact(self) -> str:
+        return _join([self.name, f"{_or(self.rating)}/5 ({self.review_count})", self.price,
+                      _join(self.categories, "/"), self.address], " | ")
+
+
+@dataclass(frozen=True, slots=True)
+class POI:
+    """A Geoapify place."""
+    place_id: str
+    name: str
+    address: str
+    distance: Optional[int]
+    categories: Tuple[str, ...]
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @classmethod
+    def from_geoapify(cls, feature: Dict[str, Any]) -> "POI":
+        properties = feature.get('properties', {})
+        # GeoJSON points are [lon, lat]
+        point = (feature.get('geometry') or {}).get('coordinates') or [None, None]
+        return cls(
+            place_id=properties.get('place_id') or "",
+            # Try to get a meaningful name, fallback to address parts if needed
+            name=properties.get('name', properties.get('address_line1', 'N/A')),
+            address=properties.get('formatted', 'N/A'),
+            distance=properties.get('distance'),
+            categories=tuple(properties.get('categories', [])),
+            latitude=properties.get('lat', point[1] if len(point) > 1 else None),
+            longitude=properties.get('lon', point[0]),
+        )
+
+    @property
+    def key(self) -> Hashable:
+        return ('geoapify', self.place_id or f"{self.name}|{self.address}")
+
+    def compact(self) -> str:
+        distance = f"{self.distance}m" if self.distance is not None else ""
+        return _join([self.name, self.address, distance], " | ")
+
+
+@dataclass(frozen=True, slots=True)
+class FlightOffer:
+    """An Amadeus flight offer, summarised by its outbound itinerary."""
+    price: str
+    currency: str
+    airlines: Tuple[str, ...]
+    stops: Optional[int]
+
+    @classmethod
+    def from_amadeus(cls, offer: Dict[str, Any]) -> "FlightOffer":
+        itineraries = offer.get('itineraries', [])
+        segments = itineraries[0].get('segments') if itineraries else None
+        return cls(
+            price=offer.get('price', {}).get('total', 'N/A'),
+            currency=offer.get('price', {}).get('currency', ''),
+            # Airline codes involved in the first itinerary's outbound segments
+            airlines=tuple(sorted({segment.get('carrierCode', '??') for segment in segments or []})),
+            stops=len(segments) - 1 if segments else None,
+        )
+
+    @property
+    def key(self) -> Hashable:
+        return ('flight', self.price, self.currency, self.airlines, self.stops)
+
+    def compact(self) -> str:
+        return _join([f"{self.price} {self.currency}".strip(), _join(self.airlines, "/"),
+                      f"{_or(self.stops)} stops"], " | ")
+
+
+@dataclass(frozen=True, slots=True)
+class HotelOffer:
+    """An Amadeus hotel with the price of its first offer."""
+    hotel_id: str
+    name: str
+    address: str
+    city: str
+    country: str
+    rating: Any
+    price: Any
+    currency: str
+
+    @classmethod
+    def from_amadeus(cls, hotel_entry: Dict[str, Any]) -> "HotelOffer":
+        hotel_info = hotel_entry.get('hotel', {})
+        address_info = hotel_info.get('address', {})
+        address_lines = address_info.get('lines', [])
+        price, currency = 'N/A', ''
+        if hotel_entry.get('offers'):
+            price_info = hotel_entry['offers'][0].get('price', {})
+            price = price_info.get('total', price_info.get('base', 'N/A'))  # Try total, fallback to base
+            currency = price_info.get('currency', '')
+        return cls(
+            hotel_id=hotel_info.get('hotelId', 'N/A'),
+            name=hotel_info.get('name', 'N/A'),
+            address=address_lines[0] if address_lines else 'N/A',
+            city=address_info.get('cityName', 'N/A'),
+            country=address_info.get('countryCode', 'N/A'),
+            rating=hotel_info.get('rating', 'N/A'),
+            price=price,
+            currency=currency,
+        )
+
+    @property
+    def key(self) -> Hashable:
+        return ('hotel', self.hotel_id)
+
+    def compact(self) -> str:
+        return _join([self.name, f"{self.rating}*", f"{self.price} {self.currency}".strip(),
+                      f"{self.address}, {self.city}"], " | ")
+
+
+@dataclass(frozen=True, slots=True)
+class TransitRoute:
+    """A Transitland route serving a stop."""
+    name: str
+    agency: str
+
+    @classmethod
+    def from_transitland(cls, route: Dict[str, Any]) -> "TransitRoute":
+        return cls(name=route.get('route_name', 'Unnamed Route'), agency=route.get('agency_name', 'Unknown Agency'))
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.agency})"
+
+    @property
+    def key(self) -> Hashable:
+        return ('route', self.name, self.agency)
+
+    def compact(self) -> str:
+        return f"{self.name}/{self.agency}"
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherReading:
+    """Current OpenWeatherMap conditions (metric units)."""
+    location: str
+    status: str
+    wind_speed: Optional[float]
+    wind_deg: Optional[float]
+    humidity: Optional[float]
+    temp: Optional[float]
+    temp_max: Optional[float]
+    temp_min: Optional[float]
+    feels_like: Optional[float]
+    rain: Tuple[Tuple[str, float], ...]
+    clouds: Optional[float]
+
+    @classmethod
+    def from_openweathermap(cls, location: str, data: Dict[str, Any]) -> "WeatherReading":
+        main, wind = data.get('main', {}), data.get('wind', {})
+        return cls(
+            location=location,
+            status=(data.get('weather') or [{}])[0].get('description', 'N/A'),
+            wind_speed=wind.get('speed'),
+            wind_deg=wind.get('deg'),
+            humidity=main.get('humidity'),
+            temp=main.get('temp'),
+            temp_max=main.get('temp_max'),
+            temp_min=main.get('temp_min'),
+            feels_like=main.get('feels_like'),
+            rain=tuple(sorted((data.get('rain') or {}).items())),
+            clouds=data.get('clouds', {}).get('all'),
+        )
+
+    @property
+    def key(self) -> Hashable:
+        return ('weather', self.location.lower())
+
+    def markdown(self) -> str:
+        """Worded like the langchain OpenWeatherMap wrapper's output."""
+        return (
+            f"In {self.location}, the current weather is as follows:\n"
+            f"Detailed status: {self.status}\n"
+            f"Wind speed: {self.wind_speed} m/s, direction: {self.wind_deg}°\n"
+            f"Humidity: {self.humidity}%\n"
+            f"Temperature: \n"
+            f"  - Current: {self.temp}°C\n"
+            f"  - High: {self.temp_max}°C\n"
+            f"  - Low: {self.temp_min}°C\n"
+            f"  - Feels like: {self.feels_like}°C\n"
+            f"Rain: {dict(self.rain)}\n"
+            f"Cloud cover: {self.clouds}%"
+        )
+
+    def compact(self) -> str:
+        rain = f"rain {_join(f'{v}mm/{k}' for k, v in self.rain)}" if self.rain else ""
+        return _join([self.status, f"{self.temp}°C ({self.temp_min}–{self.temp_max}, feels {self.feels_like})",
+                      f"humidity {self.humidity}%", f"wind {self.wind_speed} m/s", f"clouds {self.clouds}%", rain], ", ")
@@ -0,0 +1,338 @@
+# travel_agent/tools/response_cache.py
+"""
+Persistent cache between the tools and their upstream APIs.
+Responses are stored under a canonical key of (provider, request), so the same
+query asked with different casing, spacing, parameter order or API key hits the
+same entry. Each provider has its own TTL; past it an entry is still served for
+a stale window while a background refresh replaces it. The store (SQLite by
+default) is bounded in bytes and evicts least-recently-used entries first.
+
+TRAVEL_AGENT_RESPONSE_CACHE selects the store: "sqlite" (default), "memory" or "off".
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .cassette import get_cassette
+from .circuit_breaker import CircuitOpenError
+from .deadline import DeadlineExceeded
+from .single_flight import get_single_flight
+
+DEFAULT_CACHE_DIR = os.getenv("TRAVEL_AGENT_CACHE_DIR", ".cache")
+DEFAULT_MAX_BYTES = int(os.getenv("TRAVEL_AGENT_RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024
+DEFAULT_TTL = 3600
+
+MINUTE, HOUR, DAY = 60, 3600, 24 * 3600
+
+# How long a response is fresh, per provider
+PROVIDER_TTLS: Dict[str, float] = {
+    "yelp": DAY,
+    "geoapify": 7 * DAY,
+    "transitland": 7 * DAY,
+    "wikipedia": 14 * DAY,
+    "openweathermap": 10 * MINUTE,
+    "amadeus_flights": 15 * MINUTE,
+    "amadeus_hotels": HOUR,
+    # Web search results are not cached
+    "serper": 0,
+}
+
+# How long past its TTL a response may still be served while it is refreshed
+STALE_TTLS: Dict[str, float] = {
+    "yelp": DAY,
+    "geoapify": 7 * DAY,
+    "transitland": 7 * DAY,
+    "wikipedia": 30 * DAY,
+    "openweathermap": 20 * MINUTE,
+    "amadeus_flights": 5 * MINUTE,
+    "amadeus_hotels": 30 * MINUTE,
+}
+
+# Request fields that identify the caller rather than the query
+# (OpenWeatherMap calls its key "appid")
+SECRET_FIELDS = {"apikey", "api_key", "appid", "key", "authorization", "client_secret", "token"}
+
+
+# Free-text request fields the upstream APIs match regardless of case and spacing;
+# every other string (URLs, codes, filters) is kept exactly as given
+FOLDED_FIELDS = {"term", "location", "q", "query", "categories"}
+
+
+def canonical_request(value: Any, fold: bool = False) -> Any:
+    """JSON-ready form of a request with secrets and None fields dropped, FOLDED_FIELDS case- and space-folded."""
+    if isinstance(value, dict):
+        return {str(k).lower(): canonical_request(v, str(k).lower() in FOLDED_FIELDS)
+                for k, v in sorted(value.items(), key=lambda kv: str(kv[0]).lower())
+                if v is not None and str(k).lower() not in SECRET_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [canonical_request(v, fold) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        # ~1 m at the equator; coordinates from different geocodes of the same place collapse
+        return round(value, 5)
+    if isinstance(value, int):
+        return value
+    return " ".join(str(value).lower().split()) if fold else str(value)
+
+
+def canonical_key(provider: str, request: Any) -> str:
+    """Stable hash of provider and canonical_request(request)."""
+    body = json.dumps([provider, canonical_request(request)], sort_keys=True, separators=(",", ":"))
+    return provider + ":" + hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class MemoryResponseStore:
+    """In-process store with the same interface as SQLiteResponseStore."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """(payload, fetched_at) for key, marking it recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: str, provider: str, payload: str, fetched_at: float) -> int:
+        """Store payload under key; returns how many entries were evicted to make room."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= len(old[1])
+            self._entries[key] = (provider, payload, fetched_at)
+            self._bytes += len(payload)
+            evicted = 0
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, dropped, _) = self._entries.popitem(last=False)
+                self._bytes -= len(dropped)
+                evicted += 1
+            return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= len(old[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def size(self) -> Tuple[int, int]:
+        """(entries, payload bytes)."""
+        with self._lock:
+            return len(self._entries), self._bytes
+
+
+class SQLiteResponseStore:
+    """Responses in one SQLite table, evicted least recently used once over max_bytes."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "responses.sqlite")
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, provider TEXT, payload TEXT, bytes INTEGER,"
+                " fetched_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, provider: str, payload: str, fetched_at: float) -> int:
+        size = len(payload.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, payload, bytes, fetched_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (key, provider, payload, size, fetched_at, time.time())
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for old_key, old_size in self._conn.execute(
+                        "SELECT key, bytes FROM responses WHERE key != ? ORDER BY last_access", (key,)).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+                    evicted += 1
+            return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def size(self) -> Tuple[int, int]:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM responses").fetchone()
+        return row[0], row[1]
+
+
+class ResponseCache:
+    """
+    fetch(provider, request, loader) returns a cached response or calls loader().
+    Fresh entries are returned as-is; stale ones are returned immediately and
+    refreshed in the background; expired or missing ones are loaded inline.
+    Loader results must be JSON-serializable; a loader that raises is not cached.
+    """
+
+    def __init__(self, store=None, ttls: Optional[Dict[str, float]] = None,
+                 stale_ttls: Optional[Dict[str, float]] = None, default_ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.store = store if store is not None else SQLiteResponseStore()
+        self.ttls = {**PROVIDER_TTLS, **(ttls or {})}
+        self.stale_ttls = {**STALE_TTLS, **(stale_ttls or {})}
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresher: Optional[ThreadPoolExecutor] = None
+
+    def _count(self, provider: str, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[provider][counter] += n
+
+    def _store(self, key: str, provider: str, value: Any) -> None:
+        evicted = self.store.put(key, provider, json.dumps(value), self.clock())
+        if evicted:
+            self._count(provider, "evictions", evicted)
+
+    def _refresh(self, key: str, provider: str, loader: Callable[[], Any]) -> None:
+        try:
+            self._store(key, provider, loader())
+            self._count(provider, "refreshes")
+        except Exception as e:
+            # Keep serving the stale copy until it expires
+            print(f"Background refresh for {provider} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key: str, provider: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._refresher is None:
+                self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="response-refresh")
+        self._refresher.submit(self._refresh, key, provider, loader)
+
+    def fetch(self, provider: str, request: Any, loader: Callable[[], Any]) -> Any:
+        key = canonical_key(provider, request)
+        ttl = self.ttls.get(provider, self.default_ttl)
+        if ttl <= 0:
+            return loader()
+
+        entry = self.store.get(key)
+        if entry is not None:
+            payload, fetched_at = entry
+            age = self.clock() - fetched_at
+            if age <= ttl:
+                self._count(provider, "hits")
+                return json.loads(payload)
+            if age <= ttl + self.stale_ttls.get(provider, 0):
+                self._count(provider, "stale_hits")
+                self._schedule_refresh(key, provider, loader)
+                return json.loads(payload)
+
+        self._count(provider, "misses")
+        try:
+            value = loader()
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            if entry is None:
+                raise
+            # The provider is failing fast or time is up; an expired answer beats none
+            self._count(provider, "breaker_fallbacks" if isinstance(e, CircuitOpenError) else "deadline_fallbacks")
+            return json.loads(entry[0])
+        self._store(key, provider, value)
+        return value
+
+    def wait_for_refreshes(self) -> None:
+        """Block until scheduled background refreshes have finished (tests, shutdown)."""
+        with self._lock:
+            refresher, self._refresher = self._refresher, None
+        if refresher is not None:
+            refresher.shutdown(wait=True)
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider hit/stale/miss/refresh/eviction counters plus the store size."""
+        entries, size = self.store.size()
+        with self._lock:
+            per_provider = {name: dict(counts) for name, counts in sorted(self.counters.items())}
+        return {'entries': entries, 'bytes': size, 'per_provider': per_provider}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide cache, created on first use; None when TRAVEL_AGENT_RESPONSE_CACHE=off."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = os.getenv("TRAVEL_AGENT_RESPONSE_CACHE", "sqlite").lower()
+            if backend in ("off", "0", "none"):
+                return None
+            try:
+                store = MemoryResponseStore() if backend == "memory" else SQLiteResponseStore()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: response cache unavailable ({e}); using an in-memory cache")
+                store = MemoryResponseStore()
+            _cache = ResponseCache(store)
+        return _cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Replace the process-wide cache, e.g. with a different store; None resets to the default."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def cached_call(provider: str, request: Any, loader: Callable[[], Any]) -> Any:
+    """loader() through the shared response cache (or directly when it is off).
+
+    Concurrent identical calls are coalesced into one, so a miss reaches the upstream once.
+    While a cassette is recording or replaying (tools.cassette) it takes the cache's place.
+    """
+    key = canonical_key(provider, request)
+    cassette = get_cassette()
+    if cassette is not None:
+        call = lambda: cassette.call(provider, key, canonical_request(request), loader)
+    else:
+        cache = get_response_cache()
+        call = loader if cache is None else (lambda: cache.fetch(provider, request, loader))
+    return get_single_flight().do(provider, key, call)
@@ -3,6 +3,9 @@ from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Type, Optional
 
+from .circuit_breaker import guarded_call
+from .response_cache import cached_call
+
 # Define the input schema for the Serper tool
 class SerperDevToolSchema(BaseModel):
     """Input schema for SerperDevTool."""
@@ -70,7 +73,9 @@ class SerperDevTool(BaseTool):
         try:
             # Execute the search using the initialized original tool's _run method
             # The original tool's _run likely expects the query directly
-            result = self.original_tool._run(search_query=query) # Note: Original tool might expect 'search_query' kwarg
+            # Waits for the Serper quota and retries on 429/5xx
+            result = cached_call("serper", {"query": query}, lambda: guarded_call(
+                "serper", lambda: self.original_tool._run(search_query=query))) # Note: Original tool might expect 'search_query' kwarg
             return result
         except Exception as e:
             # Catch errors during the API call
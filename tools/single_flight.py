@@ -0,0 +1,86 @@
+# travel_agent/tools/single_flight.py
+"""
+Single-flight coalescing of upstream requests.
+Agents that share a tool, and trips planned concurrently, often issue the same
+request at the same moment. The first caller for a request key (tools use
+response_cache.canonical_key) runs it; callers arriving while it is in flight
+wait for and share its result. A failure is not shared: it may only be the
+leader's (its deadline, or its timeout clipped to that deadline), so waiting
+callers with budget left make the call again. Nothing is kept once the call
+returns; repeats after that are the response cache's job.
+"""
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .deadline import check_deadline
+
+
+class SingleFlight:
+    """In-flight request registry with per-provider call/coalesced/rerun counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _join(self, provider: str, key: Hashable) -> Tuple[Future, bool]:
+        """(future of the call in flight for key, whether this caller has to run it)."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                return future, True
+            self.counters[provider]['coalesced'] += 1
+            return future, False
+
+    def _lead(self, key: Hashable, future: Future, call: Callable[[], Any]) -> None:
+        try:
+            future.set_result(call())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def do(self, provider: str, key: Hashable, call: Callable[[], Any]) -> Any:
+        """
+        Result of call(), shared with every caller of the same key while it runs.
+        Only results are shared. A caller whose leader failed, perhaps on the
+        leader's own deadline or its timeout clipped to it, makes the call once
+        more on its own budget (coalesced with the others doing the same).
+        """
+        with self._lock:
+            self.counters[provider]['calls'] += 1
+        for attempt in range(2):
+            future, leader = self._join(provider, key)
+            if leader:
+                self._lead(key, future, call)
+                return future.result()
+            try:
+                return future.result()
+            except Exception:
+                if attempt:
+                    raise
+                check_deadline(f"{provider} request")
+                with self._lock:
+                    self.counters[provider]['reruns'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls and coalesced calls per provider plus totals."""
+        with self._lock:
+            per_provider = {name: dict(counts) for name, counts in sorted(self.counters.items())}
+        return {
+            'calls': sum(c.get('calls', 0) for c in per_provider.values()),
+            'coalesced': sum(c.get('coalesced', 0) for c in per_provider.values()),
+            'per_provider': per_provider,
+        }
+
+
+_flights = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """The process-wide registry shared by all tools."""
+    return _flights
@@ -1,10 +1,12 @@
 # travel_agent/tools/transport_tools.py
 import os
-import requests
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Optional, Type, List, Dict, ClassVar
 
+from .http_client import base_url, http_get_json, HTTP_ERRORS, HTTP_TIMEOUTS
+from .records import TransitRoute, render, render_mode
+
 # Store key in .env: TRANSITLAND_API_KEY=YOUR_KEY
 TRANSITLAND_API_KEY = os.getenv("TRANSITLAND_API_KEY")
 
@@ -32,19 +34,20 @@ class PublicTransportSearchTool(BaseTool):
     Optionally filter by vehicle type (e.g., 'bus', 'train').
     """
     args_schema: Type[BaseModel] = PublicTransportInput
+    base_url: Optional[str] = None  # defaults to TRANSITLAND_BASE_URL or the public API
 
     def _run(self, latitude: float, longitude: float, radius: int = 1000, vehicle_type: Optional[str] = None, location_name: Optional[str] = "this location") -> str:
         """Executes the Transitland route search."""
         try:
             # Try to access the API directly through the REST endpoint instead of routes endpoint
             # This is an alternative approach that might work better
-            base_url = "https://transit.land/api/v2/rest/stops"
+            endpoint = f"{self.base_url or base_url('transitland')}/api/v2/rest/stops"
             
             params = {
                 'lat': latitude,
                 'lon': longitude,
                 'radius': radius,
-                'apikey': TRANSITLAND_API_KEY,  # Use apikey parameter as documented
+                'apikey': TRANSITLAND_API_KEY or os.getenv("TRANSITLAND_API_KEY"),  # Use apikey parameter as documented
             }
             
             headers = {
@@ -52,50 +55,41 @@ class PublicTransportSearchTool(BaseTool):
                 'User-Agent': 'TravelAgentCrew/1.0'
             }
             
-            # Increase timeout from 10 to 20 seconds
-            response = requests.get(base_url, params=params, headers=headers, timeout=20)
+            # transit.land gets a 20 second timeout from the shared client; stops are cached for days
+            data = http_get_json(endpoint, params=params, headers=headers, provider="transitland")
             
-            # Check if the request was successful
-            if response.status_code == 200:
-                data = response.json()
-                if 'stops' in data and data['stops']:
-                    # Process the stops data to extract route information
-                    stops_count = len(data['stops'])
-                    routes_set = set()
-                    
-                    # Extract unique routes from the stops
-                    for stop in data['stops']:
-                        if 'routes' in stop:
-                            for route in stop['routes']:
-                                route_name = route.get('route_name', 'Unnamed Route')
-                                agency_name = route.get('agency_name', 'Unknown Agency')
-                                route_id = f"{route_name} ({agency_name})"
-                                routes_set.add(route_id)
-                    
-                    # Format the results
-                    results_str = f"Public Transport Options near {location_name} ({latitude}, {longitude}):\n\n"
-                    results_str += f"Found {stops_count} transit stops within {radius}m.\n\n"
-                    
-                    if routes_set:
-                        results_str += "Routes serving this area:\n"
-                        for i, route in enumerate(sorted(list(routes_set)), 1):
-                            results_str += f"{i}. {route}\n"
-                    else:
-                        results_str += "No specific route information available for these stops.\n"
-                    
-                    results_str += "\nNote: This information is based on available transit data and may not include all routes or recent changes."
-                    return results_str
+            if 'stops' in data and data['stops']:
+                # Process the stops data to extract route information
+                stops_count = len(data['stops'])
+                
+                # Extract unique routes from the stops
+                routes = {TransitRoute.from_transitland(route) for stop in data['stops'] for route in stop.get('routes', [])}
+                
+                # Format the results
+                results_str = f"Public Transport Options near {location_name} ({latitude}, {longitude}):\n\n"
+                results_str += f"Found {stops_count} transit stops within {radius}m.\n\n"
+                
+                if routes:
+                    results_str += "Routes serving this area:\n"
+                    results_str += render(sorted(routes, key=lambda r: r.label), lambda i, route: f"{i}. {route.label}\n")
                 else:
-                    return f"No transit stops found near {location_name} ({latitude}, {longitude}) within {radius}m. The area may not have public transportation coverage in our database."
-            else:
-                # Handle API error
-                print(f"API Error: {response.status_code} - {response.text}")
-                return self._get_fallback_message(latitude, longitude, location_name)
+                    results_str += "No specific route information available for these stops.\n"
                 
-        except requests.exceptions.Timeout:
+                if render_mode() == 'markdown':
+                    results_str += "\nNote: This information is based on available transit data and may not include all routes or recent changes."
+                return results_str
+            else:
+                return f"No transit stops found near {location_name} ({latitude}, {longitude}) within {radius}m. The area may not have public transportation coverage in our database."
+
+        except HTTP_TIMEOUTS:
             print(f"Timeout while accessing Transitland API for {location_name}")
             return self._get_fallback_message(latitude, longitude, location_name)
             
+        except HTTP_ERRORS as e:
+            # Non-2xx responses raise here and are not cached
+            print(f"API Error: {e}")
+            return self._get_fallback_message(latitude, longitude, location_name)
+            
         except Exception as e:
             print(f"Error calling Transitland API: {str(e)}")
             return self._get_fallback_message(latitude, longitude, location_name)
@@ -7,6 +7,10 @@ from langchain_community.utilities.openweathermap import OpenWeatherMapAPIWrappe
 from typing import Optional, Any
 from pydantic import BaseModel, Field
 
+from .http_client import base_url as default_base_url, http_get_json
+from .records import WeatherReading, render_mode
+from .response_cache import cached_call
+
 class WeatherInput(BaseModel):
     """Input for the WeatherForecastTool."""
     location: str = Field(..., description="The city and country, e.g., 'Paris, France'")
@@ -21,12 +25,17 @@ class WeatherForecastTool(BaseTool):
     Optionally include a date in YYYY-MM-DD format for a forecast.
     """
     weather_api: Any = None
+    # When set (or OPENWEATHERMAP_BASE_URL is), the REST API at this URL is called directly
+    base_url: Optional[str] = None
     
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
         """Initialize the OpenWeatherMap API wrapper."""
         super().__init__()
+        self.base_url = base_url or default_base_url("openweathermap")
         api_key = os.getenv("OPENWEATHERMAP_API_KEY")
-        if not api_key:
+        if self.base_url:
+            self.weather_api = None
+        elif not api_key:
             # For development without API key, provide mock data
             self.weather_api = None
             print("WARNING: OPENWEATHERMAP_API_KEY not set, using mock weather data")
@@ -36,13 +45,17 @@ class WeatherForecastTool(BaseTool):
     def _run(self, location: str, date: Optional[str] = None) -> str:
         """Run the weather forecast tool."""
         try:
+            if self.base_url:
+                weather_data = self._fetch_rest(location)
             # Check if we have a real API wrapper
-            if not self.weather_api:
+            elif not self.weather_api:
                 # Return mock data if no API key
                 return self._get_mock_weather(location, date)
-            
-            # Get current weather - OpenWeatherMap's free tier is limited in forecast abilities
-            weather_data = self.weather_api.run(location)
+            else:
+                # Get current weather - OpenWeatherMap's free tier is limited in forecast abilities
+                # Readings are cached for a few minutes per location
+                weather_data = cached_call("openweathermap", {"location": location},
+                                           lambda: self.weather_api.run(location))
             
             # Include date information in the response if provided
             if date:
@@ -56,6 +69,16 @@ class WeatherForecastTool(BaseTool):
         except Exception as e:
             return f"Error getting weather data: {str(e)}"
     
+    def _fetch_rest(self, location: str) -> str:
+        """Current weather from the REST API at base_url, rendered like the langchain wrapper's output."""
+        data = http_get_json(
+            f"{self.base_url}/data/2.5/weather",
+            params={'q': location, 'appid': os.getenv("OPENWEATHERMAP_API_KEY"), 'units': 'metric'},
+            provider="openweathermap"
+        )
+        reading = WeatherReading.from_openweathermap(location, data)
+        return reading.compact() if render_mode() == 'compact' else reading.markdown()
+    
     def _get_mock_weather(self, location: str, date: Optional[str] = None) -> str:
         """Return mock weather data when no API key is available."""
         if date:
@@ -6,6 +6,30 @@ from langchain_community.utilities.wikipedia import WikipediaAPIWrapper
 from typing import Optional, Any
 from pydantic import BaseModel, Field
 
+from .response_cache import cached_call
+
+
+class NoWikipediaResult(LookupError):
+    """The wrapper answered with a message instead of page summaries."""
+
+
+def _search(wiki_api: WikipediaAPIWrapper, query: str) -> str:
+    """Wikipedia summaries for query, cached for days; "" when there are none, which is not cached."""
+    def load():
+        result = wiki_api.run(query)
+        # Summaries start with "Page: "; anything else ("No good Wikipedia Search Result
+        # was found", errors) must not stay in the cache for the Wikipedia TTL
+        if not result or not result.startswith("Page: "):
+            raise NoWikipediaResult(result)
+        return result
+
+    try:
+        return cached_call("wikipedia", {"query": query, "top_k": wiki_api.top_k_results}, load)
+    except NoWikipediaResult as e:
+        print(f"Wikipedia search for {query!r} found nothing: {e}")
+        return ""
+
+
 class HistoricalInfoInput(BaseModel):
     """Input for the HistoricalInfoTool."""
     query: str = Field(..., description="The search query, e.g., 'History of Paris'")
@@ -32,7 +56,7 @@ class HistoricalInfoTool(BaseTool):
             history_query = f"history of {query}"
             
             # Get information from Wikipedia
-            wiki_result = self.wiki_api.run(history_query)
+            wiki_result = _search(self.wiki_api, history_query)
             
             # Format the response
             if not wiki_result:
@@ -67,7 +91,7 @@ class CulturalCustomsTool(BaseTool):
             culture_query = f"culture customs traditions etiquette of {location}"
             
             # Get information from Wikipedia
-            wiki_result = self.wiki_api.run(culture_query)
+            wiki_result = _search(self.wiki_api, culture_query)
             
             # Format the response
             if not wiki_result:
@@ -99,7 +123,7 @@ class FunFactsTool(BaseTool):
         """Run the fun facts tool."""
         try:
             # Get general information from Wikipedia
-            wiki_result = self.wiki_api.run(query)
+            wiki_result = _search(self.wiki_api, query)
             
             # Format the response
             if not wiki_result:
@@ -0,0 +1,102 @@
+# travel_agent/tools/yelp_query.py
+"""
+Parser for the free-text queries agents send to the Yelp tools, e.g.
+"Italian restaurants in Paris, France price:2,3 sort:review_count limit 20".
+The query is tokenized by one compiled pattern in a single pass into a frozen,
+hashable YelpQuerySpec: the search term, the location (the words after "in" or
+"near", up to a parameter, a full stop or a second comma), the price tiers
+("price:1,2" or "$$"), sort order, limit and minimum rating. Specs are memoized
+on the raw query string and can be used directly as cache keys.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+DEFAULT_SORT = "rating"
+DEFAULT_LIMIT = 10
+SORT_ORDERS = ("rating", "review_count", "distance")
+LOCATION_WORDS = {"in", "near"}
+
+_TOKEN = re.compile(r"""
+    (?P<sort>\bsort(?:_by)?\s*[:=]?\s*(?P<sort_value>rating|review_count|distance)\b)
+  | (?P<param>\b(?P<key>price|limit|(?:min_)?rating)\s*[:=]?\s*(?P<value>\d+(?:\.\d+)?(?:\s*,\s*\d+)*)\+?)
+  | (?P<dollars>(?<!\S)\${1,4}(?![^\s,.;!?()]))
+  | (?P<sep>[,.;!?()])
+  | (?P<word>[^\s,.;!?()]+)
+""", re.IGNORECASE | re.VERBOSE)
+
+
+@dataclass(frozen=True, slots=True)
+class YelpQuerySpec:
+    """What a Yelp tool query asks for."""
+    term: str
+    location: Optional[str]
+    prices: FrozenSet[int] = frozenset()
+    sort_by: str = DEFAULT_SORT
+    limit: int = DEFAULT_LIMIT
+    min_rating: Optional[float] = None
+
+    @property
+    def price(self) -> Optional[str]:
+        """Yelp's price parameter ("1,2"), or None for any price."""
+        return ",".join(str(p) for p in sorted(self.prices)) or None
+
+
+@lru_cache(maxsize=4096)
+def parse_yelp_query(query: str) -> YelpQuerySpec:
+    """The spec of a Yelp tool query; the same string always returns the same (cached) spec."""
+    term, location = [], []
+    prices = set()
+    sort_by, limit, min_rating = DEFAULT_SORT, DEFAULT_LIMIT, None
+    # "term": before the location; "location": reading it; "done": location read
+    state, commas, opener = "term", 0, None
+
+    for token in _TOKEN.finditer(query):
+        kind = token.lastgroup
+        if kind == "word":
+            word = token.group()
+            if state == "location":
+                location.append(word.lower())
+            elif state == "term" and word.lower() in LOCATION_WORDS:
+                state, opener = "location", word
+            else:
+                term.append(word)
+            continue
+
+        # Anything but a word ends the location, except its first comma ("Paris, France")
+        if state == "location":
+            if kind == "sep" and token.group() == "," and location and commas == 0:
+                commas += 1
+                location.append(",")
+                continue
+            state = "done" if location else "term"
+            if not location:
+                term.append(opener)
+
+        if kind == "sort":
+            sort_by = token.group("sort_value").lower()
+        elif kind == "dollars":
+            prices.add(len(token.group()))
+        elif kind == "param":
+            key, value = token.group("key").lower(), token.group("value")
+            numbers = [v.strip() for v in value.split(",")]
+            if key == "price":
+                prices.update(int(float(v)) for v in numbers if 1 <= float(v) <= 4)
+            elif key == "limit":
+                limit = int(float(numbers[0]))
+            else:
+                min_rating = float(numbers[0])
+
+    if state == "location" and not location:
+        term.append(opener)
+    while location and location[-1] == ",":
+        location.pop()
+    return YelpQuerySpec(
+        term=" ".join(term),
+        location=" ".join(location).replace(" ,", ",") or None,
+        prices=frozenset(prices),
+        sort_by=sort_by,
+        limit=limit,
+        min_rating=min_rating,
+    )
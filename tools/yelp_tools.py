@@ -3,18 +3,204 @@ Enhanced Yelp tools for fetching restaurant and culinary experience information.
 """
 import os
 import re
-import requests
-from typing import Dict, Any, List, Optional
+from collections import deque
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterator, List, Optional, Set
 from crewai.tools import BaseTool
 
+from .business_store import category_of, city_key, get_business_store
+from .cassette import get_cassette
+from .http_client import base_url, http_get_json, HTTP_ERRORS
+from .ranking import current_dining_profile, rank_businesses
+from .records import Business, render, unique
+from .yelp_query import parse_yelp_query
+from .response_cache import canonical_key
+
+# Sub-requests a single multi-query tool call may have in flight at once
+YELP_MAX_CONCURRENCY = int(os.getenv("YELP_MAX_CONCURRENCY", "4"))
+# Yelp returns at most 50 businesses per request and pages no further than offset + limit = 1000
+YELP_PAGE_SIZE = 50
+YELP_MAX_RESULTS = 1000
+# Candidates the restaurant search re-ranks for the trip being planned
+YELP_RANK_POOL = int(os.getenv("YELP_RANK_POOL", "50"))
+# Only these orders are re-ranked; "sort:distance" or "sort:review_count" is kept as asked
+RANKED_SORTS = ("rating", "best_match")
+
+# "tokyo food ..." names the place up front when there is no "in <place>"
+_LEADING_PLACE = re.compile(r'^([a-zA-Z\s]+)\s+(?:food|dish|cuisine|specialties)')
+
+
+def _fan_out(call: Callable[..., Dict[str, Any]], calls: List[tuple]) -> List[Dict[str, Any]]:
+    """Run call(*args) for each args tuple concurrently, returning results in the same order."""
+    if len(calls) <= 1 or YELP_MAX_CONCURRENCY <= 1:
+        return [call(*args) for args in calls]
+    with ThreadPoolExecutor(max_workers=min(YELP_MAX_CONCURRENCY, len(calls)),
+                            thread_name_prefix="yelp") as pool:
+        # Each sub-request runs in a copy of the caller's context, so it sees the kickoff deadline
+        futures = [pool.submit(copy_context().run, call, *args) for args in calls]
+        return [future.result() for future in futures]
+
+
+def _fetch(api_key: str, endpoint_base: Optional[str], term: str, location: str, limit: int,
+           sort_by: str = "rating", price: Optional[str] = None, offset: int = 0) -> Dict[str, Any]:
+    """One page of Yelp business search: {"businesses": [Business], "total": n} or {"error": message}."""
+    endpoint = f"{endpoint_base or base_url('yelp')}/v3/businesses/search"
+    headers = {
+        "Authorization": f"Bearer {api_key}"
+    }
+    params = {
+        "term": term,
+        "location": location,
+        "sort_by": sort_by,
+        "limit": limit
+    }
+    if price:
+        params["price"] = price
+    if offset:
+        params["offset"] = offset
+    
+    try:
+        data = http_get_json(endpoint, headers=headers, params=params, provider="yelp")
+    except HTTP_ERRORS as e:
+        return {"error": f"Error calling Yelp API: {str(e)}"}
+    businesses = [Business.from_yelp(b) for b in data.get("businesses") or []]
+    return {"businesses": businesses, "total": data.get("total", len(businesses))}
+
+
+def _pages(api_key: str, endpoint_base: Optional[str], term: str, location: str, limit: int,
+           sort_by: str = "rating", price: Optional[str] = None, offset: int = 0,
+           expect: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    The pages of a search for limit businesses from offset, in order, as _fetch results.
+    Pages are fetched concurrently, up to YELP_MAX_CONCURRENCY at a time: the first wave
+    covers the expect businesses the caller thinks it needs (default: all of limit), and
+    each further page is only started once the caller asks for more. Stops after an
+    error page or past Yelp's total; closing the generator drops the pages not yet started.
+    """
+    end = min(offset + limit, YELP_MAX_RESULTS)
+    starts = deque(range(offset, end, YELP_PAGE_SIZE))
+    if len(starts) <= 1:
+        if starts:
+            yield _fetch(api_key, endpoint_base, term, location, end - offset, sort_by, price, offset)
+        return
+
+    total = end
+    pending = deque()
+    pool = ThreadPoolExecutor(max_workers=min(YELP_MAX_CONCURRENCY, len(starts)), thread_name_prefix="yelp-page")
+
+    def submit(pages: int) -> None:
+        while starts and len(pending) < pages:
+            start = starts.popleft()
+            if start < total:
+                # Each page runs in a copy of the caller's context, so it sees the kickoff deadline
+                pending.append(pool.submit(copy_context().run, _fetch, api_key, endpoint_base, term, location,
+                                           min(YELP_PAGE_SIZE, end - start), sort_by, price, start))
+
+    try:
+        submit(min(YELP_MAX_CONCURRENCY, -(-(expect or limit) // YELP_PAGE_SIZE)))
+        while pending:
+            page = pending.popleft().result()
+            yield page
+            if "error" in page:
+                return
+            total = min(total, page["total"])
+            submit(YELP_MAX_CONCURRENCY)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _stream(api_key: str, endpoint_base: Optional[str], term: str, location: str, limit: int,
+            sort_by: str = "rating", price: Optional[str] = None,
+            expect: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yelp business search as a stream of pages, answered from the shared business store
+    as far as it can be. Whatever was fetched is kept in the store, also when the caller
+    stops reading early.
+    """
+    # Recording/replaying needs every request to reach the cassette
+    store = get_business_store() if get_cassette() is None else None
+    if store is None:
+        yield from _pages(api_key, endpoint_base, term, location, limit, sort_by, price, expect=expect)
+        return
+
+    city = city_key(location)
+    search = canonical_key("yelp", {"term": term, "sort_by": sort_by, "price": price})
+    known = store.search(city, search)
+    have: List[Business] = []
+    if known is not None:
+        have, total = known
+        if len(have) >= min(limit, total):
+            store.count("hits")
+            yield {"businesses": have[:limit], "total": total}
+            return
+        store.count("partial_hits")
+    else:
+        # A bare category ("italian restaurants") the store already knows enough businesses for
+        category = category_of(term, location) if sort_by == "rating" and not price else None
+        if category:
+            businesses = store.by_category(city, category, limit)
+            if len(businesses) >= limit:
+                store.count("category_hits")
+                yield {"businesses": businesses, "total": len(businesses)}
+                return
+        store.count("misses")
+
+    if have:
+        yield {"businesses": have, "total": total}
+    # Only the pages the store is missing go upstream
+    gathered, total = list(have), None
+    pages = _pages(api_key, endpoint_base, term, location, limit - len(have), sort_by, price,
+                   offset=len(have), expect=expect and max(expect - len(have), 1))
+    try:
+        for page in pages:
+            if "error" in page:
+                if not gathered:
+                    yield page
+                return
+            new = [b for b in page["businesses"] if b.id]
+            store.put(city, new)
+            gathered.extend(new)
+            total = page["total"]
+            yield {"businesses": new, "total": total}
+    finally:
+        pages.close()
+        if total is not None:
+            store.record_search(city, search, unique(gathered), total)
+
+
+def _search(api_key: str, endpoint_base: Optional[str], term: str, location: str, limit: int,
+            sort_by: str = "rating", price: Optional[str] = None) -> Dict[str, Any]:
+    """All of a _stream search: {"businesses": [Business], "total": n} or {"error": message}."""
+    businesses: List[Business] = []
+    total = 0
+    for page in _stream(api_key, endpoint_base, term, location, limit, sort_by, price):
+        if "error" in page:
+            return page
+        businesses.extend(page["businesses"])
+        total = page["total"]
+    return {"businesses": unique(businesses), "total": total}
+
+
+def _rating(business: Business) -> Any:
+    return "N/A" if business.rating is None else business.rating
+
+
+def _price(business: Business) -> str:
+    return business.price or "Price N/A"
+
+
 class YelpRestaurantSearchTool(BaseTool):
     """Tool for searching restaurants using Yelp Fusion API."""
     name: str = "yelp_restaurant_search"
     description: str = "Search for restaurants, cafes, and bars using Yelp"
+    api_key: Optional[str] = None
+    base_url: Optional[str] = None
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None):
         super().__init__()
         self.api_key = api_key or os.getenv('YELP_API_KEY')
+        self.base_url = base_url
         if not self.api_key:
             raise ValueError("Yelp API key is required.")
     
@@ -29,88 +215,66 @@ class YelpRestaurantSearchTool(BaseTool):
             Formatted string with restaurant results
         """
         # Parse query to extract location and other parameters
-        location = self._extract_location(query)
-        term = self._clean_query(query, location)
-        price = self._extract_price(query)
-        sort_by = self._extract_sort(query)
-        limit = self._extract_limit(query)
+        spec = parse_yelp_query(query)
+        location = spec.location
+        term = self._search_term(spec.term)
+        price, sort_by, min_rating = spec.price, spec.sort_by, spec.min_rating
+        limit = max(1, min(spec.limit, YELP_MAX_RESULTS))  # Paged past 50, up to Yelp's offset cap
         
         if not location:
             return "Error: Location is required for restaurant search. Please specify a location (e.g., 'restaurants in Paris')."
         
-        # Call Yelp API
-        results = self._api_call(term, location, price, sort_by, limit)
+        # Within a kickoff, gather a larger candidate pool and keep the best for this trip
+        profile = current_dining_profile() if sort_by in RANKED_SORTS else None
+        wanted = max(limit, YELP_RANK_POOL) if profile else limit
+        
+        # Call Yelp API; with a rating filter, page through the candidates until enough pass it
+        pool = wanted if min_rating is None else YELP_MAX_RESULTS
+        pages = _stream(self.api_key, self.base_url, term, location, pool, sort_by, price, expect=wanted)
+        results = self._collect(pages, wanted, min_rating)
+        if profile and results.get("businesses"):
+            results["businesses"] = rank_businesses(results["businesses"], profile, limit)
         
         # Format results
         return self._format_results(results, location)
     
-    def _extract_location(self, query: str) -> Optional[str]:
-        """Extract location from query."""
-        location_match = re.search(r'in\s+([^,\.]+(?:,\s*[^,\.]+)?)', query.lower())
-        if location_match:
-            return location_match.group(1).strip()
-        return None
-    
-    def _clean_query(self, query: str, location: str) -> str:
-        """Clean query by removing location and parameters."""
-        if location:
-            query = query.replace(f"in {location}", "").strip()
-        
-        # Remove price, sort, and limit parameters
-        query = re.sub(r'price:?\s*\d+(?:,\s*\d+)*', '', query, flags=re.IGNORECASE)
-        query = re.sub(r'sort:?\s*(?:rating|review_count|distance)', '', query, flags=re.IGNORECASE)
-        query = re.sub(r'limit:?\s*\d+', '', query, flags=re.IGNORECASE)
-        
-        # Add keywords for better results if not present
+    def _search_term(self, term: str) -> str:
+        """Search term with keywords added for better results if not present."""
         keywords = ["restaurant", "food", "dining", "eat"]
-        if not any(keyword in query.lower() for keyword in keywords):
-            query += " restaurant food"
-            
-        return query.strip()
-    
-    def _extract_price(self, query: str) -> Optional[str]:
-        """Extract price parameter from query."""
-        price_match = re.search(r'price:?\s*(\d+(?:,\s*\d+)*)', query, flags=re.IGNORECASE)
-        if price_match:
-            return price_match.group(1).replace(" ", "")
-        return None
-    
-    def _extract_sort(self, query: str) -> str:
-        """Extract sort parameter from query."""
-        sort_match = re.search(r'sort:?\s*(rating|review_count|distance)', query, flags=re.IGNORECASE)
-        if sort_match:
-            return sort_match.group(1).lower()
-        return "rating"  # Default
-    
-    def _extract_limit(self, query: str) -> int:
-        """Extract limit parameter from query."""
-        limit_match = re.search(r'limit:?\s*(\d+)', query, flags=re.IGNORECASE)
-        if limit_match:
-            return min(int(limit_match.group(1)), 50)  # Yelp API max is 50
-        return 10  # Default
+        if not any(keyword in term.lower() for keyword in keywords):
+            term += " restaurant food"
+        return term.strip()
     
     def _api_call(self, term: str, location: str, price: Optional[str] = None, 
                  sort_by: str = "rating", limit: int = 10) -> Dict[str, Any]:
-        """Call Yelp Fusion API."""
-        endpoint = "https://api.yelp.com/v3/businesses/search"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        params = {
-            "term": term,
-            "location": location,
-            "sort_by": sort_by,
-            "limit": limit
-        }
-        if price:
-            params["price"] = price
-        
+        """Search Yelp Fusion API (through the shared business store)."""
+        return _search(self.api_key, self.base_url, term, location, limit, sort_by, price)
+    
+    def _collect(self, pages: Iterator[Dict[str, Any]], limit: int,
+                 min_rating: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Take businesses from pages as they arrive, stopping once limit of them pass the
+        rating filter (Yelp already applies the price filter).
+        """
+        businesses: List[Business] = []
+        seen: Set[Any] = set()
         try:
-            response = requests.get(endpoint, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Error calling Yelp API: {str(e)}"}
+            for page in pages:
+                if "error" in page:
+                    # Keep what earlier pages found
+                    return {"businesses": businesses} if seen else page
+                for business in page["businesses"]:
+                    if business.key in seen:
+                        continue
+                    seen.add(business.key)
+                    if min_rating is not None and (business.rating or 0) < min_rating:
+                        continue
+                    businesses.append(business)
+                    if len(businesses) >= limit:
+                        return {"businesses": businesses}
+        finally:
+            pages.close()
+        return {"businesses": businesses}
     
     def _format_results(self, results: Dict[str, Any], location: str) -> str:
         """Format API results into readable text."""
@@ -121,32 +285,25 @@ class YelpRestaurantSearchTool(BaseTool):
             return f"No restaurants found in {location} matching your criteria."
         
         businesses = results["businesses"]
-        formatted_output = f"Top Restaurants in {location}:\n\n"
-        
-        for i, business in enumerate(businesses):
-            name = business.get("name", "Unknown")
-            rating = business.get("rating", "N/A")
-            review_count = business.get("review_count", 0)
-            price = business.get("price", "$")
-            categories = ", ".join([cat.get("title", "") for cat in business.get("categories", [])])
-            address = ", ".join(business.get("location", {}).get("display_address", ["Address unavailable"]))
-            phone = business.get("display_phone", "Phone unavailable")
-            
-            formatted_output += f"🍽️ **{name}** ({categories}) - {price}\n"
-            formatted_output += f"   Rating: {rating}/5.0 ({review_count} reviews)\n"
-            formatted_output += f"   Address: {address}\n"
-            formatted_output += f"   Phone: {phone}\n\n"
-        
-        return formatted_output
+        return f"Top Restaurants in {location}:\n\n" + render(businesses, lambda i, b: (
+            f"🍽️ **{b.name}** ({', '.join(b.categories)}) - {_price(b)}\n"
+            f"   Rating: {_rating(b)}/5.0 ({b.review_count} reviews)\n"
+            f"   Address: {b.address}\n"
+            f"   Phone: {b.phone}\n\n"
+        ))
 
 class YelpCulinaryExperienceTool(BaseTool):
     """Tool for finding unique culinary experiences using Yelp Fusion API."""
     name: str = "yelp_culinary_experiences"
     description: str = "Find food tours, cooking classes, markets and unique food experiences"
+    api_key: Optional[str] = None
+    base_url: Optional[str] = None
+    experience_types: Dict[str, str] = {}
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None):
         super().__init__()
         self.api_key = api_key or os.getenv('YELP_API_KEY')
+        self.base_url = base_url
         if not self.api_key:
             raise ValueError("Yelp API key is required.")
         
@@ -169,17 +326,18 @@ class YelpCulinaryExperienceTool(BaseTool):
             Formatted string with culinary experience results
         """
         # Parse query
-        location = self._extract_location(query)
+        location = parse_yelp_query(query).location
         experience_type = self._extract_experience_type(query)
         
         if not location:
             return "Error: Location is required for culinary experience search. Please specify a location (e.g., 'food tours in Paris')."
         
-        # Call Yelp API for each experience type
+        # Call Yelp API for each experience type, concurrently
         if experience_type == "all":
             results = []
-            for exp_type, search_term in self.experience_types.items():
-                exp_results = self._api_call(search_term, location, limit=5)
+            searches = list(self.experience_types.items())
+            responses = _fan_out(self._api_call, [(search_term, location, 5) for _, search_term in searches])
+            for (exp_type, _), exp_results in zip(searches, responses):
                 if "error" not in exp_results and "businesses" in exp_results and exp_results["businesses"]:
                     results.append((exp_type, exp_results))
         else:
@@ -190,13 +348,6 @@ class YelpCulinaryExperienceTool(BaseTool):
         # Format results
         return self._format_results(results, location)
     
-    def _extract_location(self, query: str) -> Optional[str]:
-        """Extract location from query."""
-        location_match = re.search(r'in\s+([^,\.]+(?:,\s*[^,\.]+)?)', query.lower())
-        if location_match:
-            return location_match.group(1).strip()
-        return None
-    
     def _extract_experience_type(self, query: str) -> str:
         """Extract experience type from query."""
         query_lower = query.lower()
@@ -217,24 +368,8 @@ class YelpCulinaryExperienceTool(BaseTool):
         return "all"  # Default to all types
     
     def _api_call(self, term: str, location: str, limit: int = 10) -> Dict[str, Any]:
-        """Call Yelp Fusion API."""
-        endpoint = "https://api.yelp.com/v3/businesses/search"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        params = {
-            "term": term,
-            "location": location,
-            "sort_by": "rating",
-            "limit": limit
-        }
-        
-        try:
-            response = requests.get(endpoint, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Error calling Yelp API: {str(e)}"}
+        """Search Yelp Fusion API (through the shared business store)."""
+        return _search(self.api_key, self.base_url, term, location, limit)
     
     def _format_results(self, results: List[tuple], location: str) -> str:
         """Format API results into readable text."""
@@ -256,18 +391,13 @@ class YelpCulinaryExperienceTool(BaseTool):
             formatted_output += f"## {exp_type.replace('_', ' ').title()}s\n\n"
             
             # Add businesses
-            for business in api_results["businesses"]:
-                name = business.get("name", "Unknown")
-                rating = business.get("rating", "N/A")
-                review_count = business.get("review_count", 0)
-                price = business.get("price", "$")
-                categories = ", ".join([cat.get("title", "") for cat in business.get("categories", [])])
-                address = ", ".join(business.get("location", {}).get("display_address", ["Address unavailable"]))
-                
-                formatted_output += f"🍳 **{name}** - {price}\n"
-                formatted_output += f"   Rating: {rating}/5.0 ({review_count} reviews)\n"
-                formatted_output += f"   Categories: {categories}\n"
-                formatted_output += f"   Address: {address}\n\n"
+            businesses = api_results["businesses"]
+            formatted_output += render(businesses, lambda i, b: (
+                f"🍳 **{b.name}** - {_price(b)}\n"
+                f"   Rating: {_rating(b)}/5.0 ({b.review_count} reviews)\n"
+                f"   Categories: {', '.join(b.categories)}\n"
+                f"   Address: {b.address}\n\n"
+            ))
         
         return formatted_output
 
@@ -275,10 +405,13 @@ class LocalFoodSpecialtiesTool(BaseTool):
     """Tool for finding local food specialties using Yelp Fusion API."""
     name: str = "local_food_specialties"
     description: str = "Find local and traditional food specialties in a destination"
+    api_key: Optional[str] = None
+    base_url: Optional[str] = None
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None):
         super().__init__()
         self.api_key = api_key or os.getenv('YELP_API_KEY')
+        self.base_url = base_url
         if not self.api_key:
             raise ValueError("Yelp API key is required.")
     
@@ -307,55 +440,31 @@ class LocalFoodSpecialtiesTool(BaseTool):
         ]
         
         all_results = []
-        for term in search_terms:
-            results = self._api_call(f"{term} {location}", location, limit=5)
+        for results in _fan_out(self._api_call, [(f"{term} {location}", location, 5) for term in search_terms]):
             if "error" not in results and "businesses" in results and results["businesses"]:
-                all_results.extend(results["businesses"])
+                all_results.extend(b for b in results["businesses"] if b.id)
         
-        # Remove duplicates
-        unique_businesses = {}
-        for business in all_results:
-            business_id = business.get("id")
-            if business_id and business_id not in unique_businesses:
-                unique_businesses[business_id] = business
-        
-        # Format results
-        return self._format_results(list(unique_businesses.values()), location)
+        # Format results, each business once
+        return self._format_results(unique(all_results), location)
     
     def _extract_location(self, query: str) -> Optional[str]:
         """Extract location from query."""
-        location_match = re.search(r'in\s+([^,\.]+(?:,\s*[^,\.]+)?)', query.lower())
-        if location_match:
-            return location_match.group(1).strip()
+        spec = parse_yelp_query(query)
+        if spec.location:
+            return spec.location
         
         # Try to find location at the beginning
-        location_match = re.search(r'^([a-zA-Z\s]+)\s+(?:food|dish|cuisine|specialties)', query.lower())
+        location_match = _LEADING_PLACE.search(spec.term.lower())
         if location_match:
             return location_match.group(1).strip()
             
         return None
     
     def _api_call(self, term: str, location: str, limit: int = 10) -> Dict[str, Any]:
-        """Call Yelp Fusion API."""
-        endpoint = "https://api.yelp.com/v3/businesses/search"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        params = {
-            "term": term,
-            "location": location,
-            "sort_by": "rating",
-            "limit": limit
-        }
-        
-        try:
-            response = requests.get(endpoint, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Error calling Yelp API: {str(e)}"}
+        """Search Yelp Fusion API (through the shared business store)."""
+        return _search(self.api_key, self.base_url, term, location, limit)
     
-    def _format_results(self, businesses: List[Dict[str, Any]], location: str) -> str:
+    def _format_results(self, businesses: List[Business], location: str) -> str:
         """Format API results into readable text."""
         if not businesses:
             return f"No local food specialties found for {location}."
@@ -365,9 +474,7 @@ class LocalFoodSpecialtiesTool(BaseTool):
         # Group by categories
         category_businesses = {}
         for business in businesses:
-            categories = business.get("categories", [])
-            for category in categories:
-                cat_title = category.get("title", "")
+            for cat_title in business.categories:
                 if cat_title and cat_title not in ["Restaurants", "Food"]:
                     if cat_title not in category_businesses:
                         category_businesses[cat_title] = []
@@ -377,14 +484,10 @@ class LocalFoodSpecialtiesTool(BaseTool):
         for category, cat_businesses in category_businesses.items():
             formatted_output += f"## {category}\n\n"
             
-            for business in cat_businesses[:3]:  # Limit to 3 per category
-                name = business.get("name", "Unknown")
-                rating = business.get("rating", "N/A")
-                price = business.get("price", "$")
-                address = ", ".join(business.get("location", {}).get("display_address", ["Address unavailable"]))
-                
-                formatted_output += f"🥘 **{name}** - {price}\n"
-                formatted_output += f"   Rating: {rating}/5.0\n"
-                formatted_output += f"   Address: {address}\n\n"
+            formatted_output += render(cat_businesses[:3], lambda i, b: (  # Limit to 3 per category
+                f"🥘 **{b.name}** - {_price(b)}\n"
+                f"   Rating: {_rating(b)}/5.0\n"
+                f"   Address: {b.address}\n\n"
+            ))
         
         return formatted_output
\ No newline at end of file